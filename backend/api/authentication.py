@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from api.metrics import count_cache
+from base.models import User
+
+# Seconds a resolved user stays cached. Saves invalidate it through signals;
+# the timeout bounds staleness after bulk updates or in other processes.
+USER_CACHE_TIMEOUT = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 5)
+# Token claims written by CustomTokenObtainPairSerializer.get_token
+ROLE_CLAIM = 'role'
+COMMUNITY_CLAIM = 'community'
+
+
+def user_cache_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+def invalidate_cached_users(*user_ids):
+    keys = [user_cache_key(user_id) for user_id in user_ids if user_id is not None]
+    if keys:
+        cache.delete_many(keys)
+
+
+def token_claims(user, community_id=None):
+    """Role and administered community uuid embedded in the user's tokens."""
+    return {ROLE_CLAIM: user.role, COMMUNITY_CLAIM: str(community_id) if community_id else None}
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user from the cache. A miss
+    loads the user and its administered community in one query, so
+    `user.role` and `user.administered_community` are free afterwards, and
+    hot requests run without any authentication query. Tokens whose role
+    claim no longer matches the user, or that name a community the user no
+    longer administers, are rejected, so clients log in again.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        count_cache('auth_user', hits=int(user is not None), misses=int(user is None))
+        if user is None:
+            user = (
+                User.objects.select_related('administered_community')
+                .filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+            )
+            if user is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            cache.set(key, user, USER_CACHE_TIMEOUT)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        if ROLE_CLAIM in validated_token:
+            community = getattr(user, 'administered_community', None)
+            claims = token_claims(user, community.pk if community else None)
+            # A community created after login is fine; a lost one or a changed role is not
+            if validated_token[ROLE_CLAIM] != claims[ROLE_CLAIM] or (
+                validated_token.get(COMMUNITY_CLAIM) not in (None, claims[COMMUNITY_CLAIM])
+            ):
+                raise AuthenticationFailed(_("The user's role or community has changed."), code="claims_changed")
+        return user
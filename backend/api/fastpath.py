@@ -0,0 +1,215 @@
+from collections import OrderedDict
+
+import orjson
+from django.contrib.gis.db.models.functions import AsGeoJSON
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import PKOnlyObject, PrimaryKeyRelatedField
+from rest_framework_gis.fields import GeometryField
+from rest_framework_gis.serializers import GeoFeatureModelSerializer
+
+from api.renderers import orjson_dumps
+from api.serializers.mixins import OmittedGeometryField, PrecomputedGeometryField
+
+# Decimals GDAL's GeoJSON writer keeps, which GeometryField output goes through
+GEOJSON_PRECISION = 15
+
+
+class Unsupported(Exception):
+    """The serializer uses a field the fast path cannot reproduce; use the serializer."""
+
+
+def _alias(column):
+    return f'{column}_geojson'
+
+
+def _as_floats(coords):
+    # PostGIS prints integral coordinates as `10`, GDAL as `10.0`
+    if coords and not isinstance(coords[0], list):
+        return [float(c) for c in coords]
+    return [_as_floats(c) for c in coords]
+
+
+def geometry_from_geojson(text):
+    """GeometryField's dict for a geometry PostGIS rendered with ST_AsGeoJSON."""
+    geometry = orjson.loads(text)
+    for part in geometry.get('geometries', [geometry]):
+        if 'coordinates' in part:
+            part['coordinates'] = _as_floats(part['coordinates'])
+    return geometry
+
+
+class FastRepresentation:
+    """
+    Produces what `serializer.to_representation` would for many rows, from
+    `.values()` dicts instead of model instances: geometries come rendered
+    by PostGIS (ST_AsGeoJSON) and scalar columns go through the serializer's
+    own fields, so the output is the same data. Raises Unsupported for
+    fields that are not plain model columns, FKs, geometries or reverse-FK
+    nested serializers.
+    """
+
+    def __init__(self, serializer):
+        self.serializer = serializer
+        self.model = serializer.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.geo_feature = isinstance(serializer, GeoFeatureModelSerializer)
+        if self.geo_feature and (serializer.Meta.auto_bbox or serializer.Meta.bbox_geo_field):
+            raise Unsupported("bbox")
+        # (name, kind, column, field) in output order
+        self.fields = []
+        # name -> (child FastRepresentation, fk attname on the child, list serializer)
+        self.nested = {}
+        self.geometries = serializer.context.get('geometries')
+        self.nested_rows = {}
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, OmittedGeometryField):
+                self.fields.append((name, 'omitted', None, field))
+            elif isinstance(field, PrecomputedGeometryField):
+                self.fields.append((name, 'precomputed', None, field))
+            elif isinstance(field, GeometryField):
+                if field.precision is not None or field.remove_dupes or field.auto_bbox or field.transform:
+                    raise Unsupported(name)
+                self.fields.append((name, 'geometry', self._column(field.source), field))
+            elif isinstance(field, serializers.ListSerializer):
+                relation = self._relation(field.source)
+                self.nested[name] = (FastRepresentation(field.child), relation.field.attname, field)
+                self.fields.append((name, 'nested', None, field))
+            elif isinstance(field, PrimaryKeyRelatedField):
+                self.fields.append((name, 'related', self._column(field.source), field))
+            elif isinstance(field, (serializers.RelatedField, serializers.BaseSerializer)):
+                raise Unsupported(name)
+            else:
+                self.fields.append((name, 'value', self._column(field.source), field))
+
+    def _column(self, source):
+        try:
+            model_field = self.model._meta.get_field(source)
+        except FieldDoesNotExist:
+            raise Unsupported(source)
+        if not model_field.concrete:
+            raise Unsupported(source)
+        return model_field.attname
+
+    def _relation(self, source):
+        try:
+            relation = self.model._meta.get_field(source)
+        except FieldDoesNotExist:
+            raise Unsupported(source)
+        if not relation.one_to_many:
+            raise Unsupported(source)
+        return relation
+
+    def values(self, queryset, extra=()):
+        """`queryset` as dicts holding exactly the columns the representation reads."""
+        columns = {self.pk, *extra}
+        geometries = {}
+        for name, kind, column, field in self.fields:
+            if kind in ('value', 'related'):
+                columns.add(column)
+            elif kind == 'geometry':
+                geometries[_alias(column)] = AsGeoJSON(column, precision=GEOJSON_PRECISION)
+        return queryset.prefetch_related(None).values(*columns).annotate(**geometries)
+
+    def load_nested(self, rows):
+        """Fetch the nested serializers' rows for `rows`: one query per nested field."""
+        pks = [row[self.pk] for row in rows]
+        for name, (child, fk, list_serializer) in self.nested.items():
+            grouped = {}
+            queryset = child.model._default_manager.filter(**{f'{fk}__in': pks})
+            child_rows = list(child.values(queryset, extra=[fk]))
+            for row in child_rows:
+                grouped.setdefault(row[fk], []).append(row)
+            child.load_nested(child_rows)
+            self.nested_rows[name] = grouped
+
+    def geometry_targets(self, rows):
+        """(model, field name, pks) of precomputed geometries, like SimplifiedGeometryMixin.geometry_targets."""
+        pks = [row[self.pk] for row in rows]
+        for name, kind, column, field in self.fields:
+            if kind == 'precomputed':
+                yield self.model, field.field_name, pks
+        for name, (child, fk, list_serializer) in self.nested.items():
+            child_rows = [row for group in self.nested_rows[name].values() for row in group]
+            yield from child.geometry_targets(child_rows)
+
+    def represent(self, row):
+        data = OrderedDict()
+        for name, kind, column, field in self.fields:
+            if kind == 'value':
+                value = row[column]
+                data[name] = None if value is None else field.to_representation(value)
+            elif kind == 'related':
+                value = row[column]
+                data[name] = None if value is None else field.to_representation(PKOnlyObject(pk=value))
+            elif kind == 'geometry':
+                text = row[_alias(column)]
+                data[name] = None if text is None else geometry_from_geojson(text)
+            elif kind == 'precomputed':
+                data[name] = self.geometries.get((name, row[self.pk]))
+            elif kind == 'omitted':
+                data[name] = None
+            else:
+                child, _, list_serializer = self.nested[name]
+                data[name] = child.represent_many(self.nested_rows[name].get(row[self.pk], []))
+        if not self.geo_feature:
+            return data
+
+        meta = self.serializer.Meta
+        feature = OrderedDict()
+        if meta.id_field:
+            feature['id'] = data.pop(meta.id_field)
+        feature['type'] = 'Feature'
+        feature['geometry'] = data.pop(meta.geo_field) if meta.geo_field else None
+        feature['properties'] = data
+        return feature
+
+    def represent_many(self, rows):
+        items = [self.represent(row) for row in rows]
+        if self.geo_feature:
+            return OrderedDict((('type', 'FeatureCollection'), ('features', items)))
+        return items
+
+
+# Rows per server-side cursor fetch, and bytes gathered before a streamed export yields
+EXPORT_CHUNK_SIZE = 2000
+STREAM_FLUSH_BYTES = 64 * 1024
+
+
+def stream_features(fast, queryset, fmt='geojson', chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Iterator of a GeoJSON FeatureCollection (fmt 'geojson') or one Feature per
+    line (fmt 'ndjson') for every row of `queryset`, in STREAM_FLUSH_BYTES pieces.
+    Rows are read through a server-side cursor `chunk_size` at a time, so
+    memory stays flat however many features there are. `fast` must be a
+    FastRepresentation of a GeoFeatureModelSerializer without nested fields.
+    """
+    if not fast.geo_feature or fast.nested:
+        raise Unsupported("nested or non-GeoJSON serializers")
+    # Checked before the first chunk is requested, while an error can still be returned
+    return _stream(fast, fast.values(queryset).iterator(chunk_size=chunk_size), fmt == 'geojson')
+
+
+def _stream(fast, rows, geojson):
+    buffer = [b'{"type":"FeatureCollection","features":['] if geojson else []
+    size, first = 0, True
+    for row in rows:
+        feature = orjson_dumps(fast.represent(row))
+        if geojson:
+            if not first:
+                buffer.append(b',')
+            buffer.append(feature)
+        else:
+            buffer.append(feature + b'\n')
+        first = False
+        size += len(feature) + 1
+        if size >= STREAM_FLUSH_BYTES:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if geojson:
+        buffer.append(b']}')
+    if buffer:
+        yield b''.join(buffer)
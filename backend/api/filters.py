@@ -0,0 +1,113 @@
+import math
+
+from django.contrib.gis.geos import GEOSException, GEOSGeometry, Point, Polygon
+from django.contrib.gis.measure import D
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from api.utils.soil_classification import CROP_NAMES, TEXTURE_CLASSES
+
+METERS_PER_DEGREE = 111320
+
+
+def _floats(value, count, name):
+    try:
+        numbers = [float(v) for v in value.split(',')]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count or not all(math.isfinite(n) for n in numbers):
+        raise ValidationError({name: f"Expected {count} comma-separated numbers."})
+    return numbers
+
+
+class GeometryFilterBackend(BaseFilterBackend):
+    """
+    Spatial filters on the view's `geo_filter_field`, all answered from the
+    geometry's GiST index:
+
+    - ?in_bbox=min_lon,min_lat,max_lon,max_lat   intersects the box
+    - ?intersects=<GeoJSON or WKT geometry>      intersects the geometry
+    - ?within_distance=lon,lat,meters            within that many metres of the point
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        field = view.geo_filter_field
+        params = request.query_params
+
+        if params.get('in_bbox'):
+            min_lon, min_lat, max_lon, max_lat = _floats(params['in_bbox'], 4, 'in_bbox')
+            if min_lon > max_lon or min_lat > max_lat:
+                raise ValidationError({'in_bbox': "Expected min_lon,min_lat,max_lon,max_lat."})
+            bbox = Polygon.from_bbox((min_lon, min_lat, max_lon, max_lat))
+            bbox.srid = 4326
+            queryset = queryset.filter(**{f'{field}__intersects': bbox})
+
+        if params.get('intersects'):
+            try:
+                geometry = GEOSGeometry(params['intersects'])
+            except (GEOSException, ValueError, TypeError):
+                raise ValidationError({'intersects': "Expected a GeoJSON or WKT geometry."})
+            if geometry.srid is None:
+                geometry.srid = 4326
+            queryset = queryset.filter(**{f'{field}__intersects': geometry})
+
+        if params.get('within_distance'):
+            lon, lat, meters = _floats(params['within_distance'], 3, 'within_distance')
+            if meters < 0:
+                raise ValidationError({'within_distance': "Distance must not be negative."})
+            point = Point(lon, lat, srid=4326)
+            # Index-backed ST_DWithin in degrees, wide enough for the latitude,
+            # then the exact distance in metres on the few remaining rows.
+            degrees = meters / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+            queryset = queryset.filter(**{
+                f'{field}__dwithin': (point, degrees),
+                f'{field}__distance_lte': (point, D(m=meters)),
+            })
+
+        return queryset
+
+
+def _choices(value, allowed, name):
+    by_key = {choice.lower(): choice for choice in allowed}
+    chosen = [by_key.get(v.strip().lower()) for v in value.split(',') if v.strip()]
+    if not chosen or None in chosen:
+        raise ValidationError({name: f"Expected comma-separated values from: {', '.join(allowed)}."})
+    return chosen
+
+
+class SoilFilterBackend(BaseFilterBackend):
+    """
+    Filters on the typed soil columns of field boundaries, each backed by an
+    index (B-tree for ranges, GIN for crops):
+
+    - ?ph_min= / ?ph_max=                  soil_ph range
+    - ?organic_carbon_min= / _max=         organic_carbon range (g/kg)
+    - ?sand_min= / ?silt_max= / ...        texture percentage ranges
+    - ?soil_type=Loam,Clay loam            any of these USDA texture classes
+    - ?crop=Maize,Beans                    all of these crops recommended
+    - ?crop_any=Maize,Beans                at least one of them recommended
+    """
+    RANGES = {
+        'ph': 'soil_ph',
+        'organic_carbon': 'organic_carbon',
+        'sand': 'sand_pct',
+        'silt': 'silt_pct',
+        'clay': 'clay_pct',
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        filters = {}
+        for param, column in self.RANGES.items():
+            for bound, lookup in (('min', 'gte'), ('max', 'lte')):
+                name = f'{param}_{bound}'
+                if params.get(name) not in (None, ''):
+                    filters[f'{column}__{lookup}'] = _floats(params[name], 1, name)[0]
+
+        if params.get('soil_type'):
+            filters['soil_type__in'] = _choices(params['soil_type'], TEXTURE_CLASSES, 'soil_type')
+        if params.get('crop'):
+            filters['recommended_crops__contains'] = _choices(params['crop'], CROP_NAMES, 'crop')
+        if params.get('crop_any'):
+            filters['recommended_crops__overlap'] = _choices(params['crop_any'], CROP_NAMES, 'crop_any')
+        return queryset.filter(**filters) if filters else queryset
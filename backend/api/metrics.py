@@ -0,0 +1,194 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Min
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from base.models import Job
+
+logger = logging.getLogger(__name__)
+
+# Requests slower than this are logged with their context (see MetricsMiddleware)
+SLOW_REQUEST_SECONDS = getattr(settings, 'SLOW_REQUEST_SECONDS', 1.0)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', "Time until the view returned a response.",
+    ['method', 'endpoint', 'status'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', "Database queries run per request.",
+    ['endpoint'], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_duration_seconds', "Time spent in database queries per request.",
+    ['endpoint'], buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+PROVIDER_LATENCY = Histogram(
+    'soil_provider_call_duration_seconds', "External soil data calls (Earth Engine, moisture API, ...).",
+    ['provider', 'outcome'], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+SOIL_ANALYSIS_LATENCY = Histogram(
+    'soil_analysis_duration_seconds', "analyze_soil / analyze_soil_batch calls, providers included.",
+    ['kind'], buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+CACHE_LOOKUPS = Counter(
+    'cache_lookups_total', "Cache lookups; hit ratio = hit / (hit + miss).", ['cache', 'result'],
+)
+
+
+def count_cache(name, hits=0, misses=0):
+    if hits:
+        CACHE_LOOKUPS.labels(name, 'hit').inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(name, 'miss').inc(misses)
+
+
+@contextmanager
+def timed(histogram, *labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(*labels).observe(time.perf_counter() - started)
+
+
+def add_request_context(request, **context):
+    """Attach values (e.g. field_count) to the slow-request log line of this request."""
+    request = getattr(request, '_request', request)
+    if not hasattr(request, '_metrics_context'):
+        request._metrics_context = {}
+    request._metrics_context.update(context)
+
+
+# -------------------- MIDDLEWARE -------------------- #
+
+class QueryTimer:
+    """connection.execute_wrapper counting the queries of one request and their total time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """
+    Records latency, DB query count and DB time per endpoint (the URL route,
+    e.g. 'api/v1/farms/<pk>/', so labels stay bounded) and logs requests
+    slower than SLOW_REQUEST_SECONDS with the user's role, community and any
+    add_request_context() values. Streamed bodies are produced after the
+    view returns and are not included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = match.route if match is not None else 'unmatched'
+        if endpoint == 'metrics':
+            return response
+        REQUEST_LATENCY.labels(request.method, endpoint, response.status_code).observe(elapsed)
+        REQUEST_QUERIES.labels(endpoint).observe(timer.count)
+        REQUEST_DB_TIME.labels(endpoint).observe(timer.seconds)
+
+        if elapsed >= SLOW_REQUEST_SECONDS:
+            context = self.context(request)
+            context.update(
+                method=request.method, path=request.path, endpoint=endpoint, status=response.status_code,
+                seconds=round(elapsed, 3), db_queries=timer.count, db_seconds=round(timer.seconds, 3),
+            )
+            logger.warning(
+                "Slow request %s %s: %.0f ms, %d queries (%.0f ms)",
+                request.method, request.path, elapsed * 1000, timer.count, timer.seconds * 1000,
+                extra=context,
+            )
+        return response
+
+    def context(self, request):
+        context = dict(getattr(request, '_metrics_context', {}))
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            community = getattr(user, 'administered_community', None) if user.role == 'community' else None
+            context.update(
+                user=str(user.pk), role=user.role, community=str(community.pk) if community else None,
+            )
+        return context
+
+
+# -------------------- JOB QUEUE / ENDPOINT -------------------- #
+
+class JobQueueCollector:
+    """Job counts per kind and status, and the oldest runnable pending job's age, read at scrape time."""
+
+    def describe(self):
+        # Keeps registration from querying the database
+        return []
+
+    def collect(self):
+        jobs = GaugeMetricFamily('job_queue_jobs', "Background jobs by kind and status.", labels=['kind', 'status'])
+        for row in Job.objects.order_by().values('kind', 'status').annotate(count=Count('pk')):
+            jobs.add_metric([row['kind'], row['status']], row['count'])
+        yield jobs
+
+        oldest = Job.objects.filter(status='pending', run_after__lte=timezone.now()).aggregate(oldest=Min('run_after'))
+        age = GaugeMetricFamily('job_queue_oldest_pending_seconds', "Wait of the oldest runnable pending job.")
+        age.add_metric([], (timezone.now() - oldest['oldest']).total_seconds() if oldest['oldest'] else 0)
+        yield age
+
+
+def registry():
+    """
+    The registry to expose. With PROMETHEUS_MULTIPROC_DIR set (several
+    gunicorn workers), metrics are merged from every worker's files.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        merged = CollectorRegistry()
+        multiprocess.MultiProcessCollector(merged)
+        merged.register(JobQueueCollector())
+        return merged
+    return REGISTRY
+
+
+REGISTRY.register(JobQueueCollector())
+
+
+def metrics_view(request):
+    """
+    Prometheus text exposition of the metrics above, for scrapers sending
+    `Authorization: Bearer <METRICS_TOKEN>` or staff signed in to the admin.
+    Without METRICS_TOKEN only staff get through.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    user = getattr(request, 'user', None)
+    staff = user is not None and user.is_authenticated and (user.is_staff or user.is_admin)
+    if not staff:
+        if not token:
+            return HttpResponse(status=403)
+        if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponse(status=401)
+    return HttpResponse(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
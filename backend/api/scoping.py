@@ -0,0 +1,49 @@
+import uuid
+
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+
+from base.models import Community, Farm, FieldBoundary
+
+
+def is_community_member(user, community):
+    """System admins, the community's admin and farmers with a farm in it."""
+    return user.is_admin or community.admin_id == user.pk or community.farms.filter(owner=user).exists()
+
+
+def member_community(user, community_uuid):
+    """The community named by a ?community= value, if the user may see it; 400/404/403 otherwise."""
+    try:
+        pk = uuid.UUID(str(community_uuid))
+    except ValueError:
+        raise ValidationError({'community': "Must be a valid UUID."})
+    community = Community.objects.filter(pk=pk).first()
+    if community is None:
+        raise NotFound("Community not found.")
+    if not is_community_member(user, community):
+        raise PermissionDenied("You are not a member of this community.")
+    return community
+
+
+def farm_scope(user, community_uuid=None):
+    """
+    (scope name, scope key, Farm queryset) visible to the user: a given
+    community's farms (members only), a community admin's territory, or the
+    user's own farms. The key identifies the visible set, so responses can
+    be cached per scope.
+    """
+    if community_uuid:
+        community = member_community(user, community_uuid)
+        return 'community', f"community:{community.pk}", Farm.objects.filter(community=community)
+    if user.role == 'community':
+        community = user.administered_community
+        return 'community_admin', f"community:{community.pk}", Farm.objects.filter(community=community)
+    return 'owner', f"user:{user.pk}", Farm.objects.filter(owner=user)
+
+
+def field_boundary_scope(user):
+    """(scope name, scope key, FieldBoundary queryset) visible to the user."""
+    if user.role == 'community':
+        # Community can see all field boundaries of all farms in their territory
+        community = user.administered_community
+        return 'community_admin', f"community:{community.pk}", FieldBoundary.objects.filter(farm__community=community)
+    return 'owner', f"user:{user.pk}", FieldBoundary.objects.filter(farm__owner=user)
@@ -1,3 +1,4 @@
 from .user import *
 from .farm import *
-from .fieldboundary import *
\ No newline at end of file
+from .fieldboundary import *
+from .job import *
\ No newline at end of file
@@ -2,8 +2,11 @@ from rest_framework_gis.serializers import GeometryField
 from rest_framework import serializers
 from base.models import Farm
 from .fieldboundary import FieldBoundarySerializer  # if using modular files
+from .mixins import PrecomputedGeometryMixin, SparseFieldsetsMixin
+
+class FarmSerializer(SparseFieldsetsMixin, PrecomputedGeometryMixin, serializers.ModelSerializer):
+    geometry_fields = ('coordinates',)
 
-class FarmSerializer(serializers.ModelSerializer):
     coordinates = GeometryField()
     field_boundaries = FieldBoundarySerializer(many=True, read_only=True)
     owner = serializers.HiddenField(default=serializers.CurrentUserDefault())
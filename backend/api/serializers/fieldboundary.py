@@ -1,14 +1,17 @@
 from rest_framework_gis.serializers import GeoFeatureModelSerializer
 from rest_framework import serializers
 from base.models import FieldBoundary
+from .mixins import PrecomputedGeometryMixin, SparseFieldsetsMixin
+
+class FieldBoundarySerializer(SparseFieldsetsMixin, PrecomputedGeometryMixin, GeoFeatureModelSerializer):
+    geometry_fields = ('boundary',)
 
-class FieldBoundarySerializer(GeoFeatureModelSerializer):
     class Meta:
         model = FieldBoundary
         geo_field = 'boundary'  # The PolygonField
         fields = [
             'uuid', 'farm', 'boundary', 'area_hectares',
-            'soil_type', 'soil_texture', 'soil_ph',
-            'organic_carbon', 'recommended_crops', 'created_at'
+            'soil_type', 'soil_texture', 'sand_pct', 'silt_pct', 'clay_pct', 'soil_ph',
+            'organic_carbon', 'recommended_crops', 'soil_analyzed_at', 'created_at'
         ]
-        read_only_fields = ['uuid', 'created_at']
+        read_only_fields = ['uuid', 'soil_analyzed_at', 'created_at']
@@ -0,0 +1,12 @@
+from rest_framework import serializers
+from base.models import Job
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            'uuid', 'kind', 'status', 'attempts', 'max_attempts',
+            'run_after', 'last_error', 'progress', 'result',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
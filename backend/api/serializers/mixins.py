@@ -0,0 +1,118 @@
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _csv_param(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+def sparse_fieldsets(request):
+    """
+    Parse ?fields=, ?omit= and ?include_geometry= from a request.
+    Returns (fields or None, omit, include_geometry).
+    """
+    include_geometry = request.query_params.get('include_geometry', 'true').lower() not in ('false', '0', 'no')
+    return _csv_param(request, 'fields'), _csv_param(request, 'omit') or set(), include_geometry
+
+
+def field_requested(request, name, top_level=True, geometry=False):
+    """
+    Whether a GET response will contain the field, so views can skip loading
+    (defer/prefetch) what SparseFieldsetsMixin is going to drop anyway.
+    """
+    if request.method not in SAFE_METHODS:
+        return True
+    only, omit, include_geometry = sparse_fieldsets(request)
+    if geometry and not include_geometry:
+        return False
+    if top_level and (name in omit or (only is not None and name not in only)):
+        return False
+    return True
+
+
+class OmittedGeometryField(serializers.Field):
+    """Stands in for a GeoFeature geo_field dropped from the response; renders as null."""
+
+    def __init__(self, **kwargs):
+        kwargs.update(read_only=True, source='*')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return None
+
+
+class PrecomputedGeometryField(serializers.Field):
+    """
+    Renders a geometry that the view already produced as GeoJSON (e.g.
+    simplified in PostGIS), looked up in context['geometries'] by
+    (field name, pk) instead of serializing the model's GEOS geometry.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.update(read_only=True, source='*')
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return self.context['geometries'].get((self.field_name, instance.pk))
+
+
+class PrecomputedGeometryMixin:
+    """
+    Swaps `geometry_fields` for PrecomputedGeometryField when the view passed
+    precomputed geometries in the serializer context.
+    """
+    geometry_fields = ()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('geometries') is not None:
+            for name in self.geometry_fields:
+                if name in fields:
+                    fields[name] = PrecomputedGeometryField()
+        return fields
+
+
+class SparseFieldsetsMixin:
+    """
+    Lets GET requests trim the serialized output:
+
+    - ?fields=a,b keeps only the listed fields of the top-level serializer
+    - ?omit=a,b drops the listed fields of the top-level serializer
+    - ?include_geometry=false drops `geometry_fields` at every nesting level
+
+    A GeoFeature's id and geometry keys are always present; a dropped
+    geometry is rendered as `"geometry": null`.
+    """
+    geometry_fields = ()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return fields
+
+        only, omit, include_geometry = sparse_fieldsets(request)
+        drop = set()
+        if self._is_top_level():
+            if only is not None:
+                drop |= set(fields) - only
+            drop |= omit
+        if not include_geometry:
+            drop |= set(self.geometry_fields)
+
+        meta = getattr(self, 'Meta', None)
+        geo_field = getattr(meta, 'geo_field', None)
+        id_field = getattr(meta, 'id_field', None)
+        for name in drop & set(fields):
+            if name == geo_field:
+                fields[name] = OmittedGeometryField()
+            elif name != id_field:
+                fields.pop(name)
+        return fields
+
+    def _is_top_level(self):
+        root = self.root
+        return self is root or (self.parent is root and isinstance(root, serializers.ListSerializer))
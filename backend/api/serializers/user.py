@@ -1,9 +1,14 @@
+import logging
+
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from base.models import User, Community, AdminAccessRequest
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from api.authentication import token_claims
 from django.contrib.auth import authenticate
 
+logger = logging.getLogger(__name__)
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -43,12 +48,10 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     username_field = User.EMAIL_FIELD  # Use email as the username field
 
     def validate(self, attrs):
-        print(f"CustomTokenObtainPairSerializer.validate called with attrs: {attrs}")
         if 'email' in attrs:
             attrs['username'] = attrs['email']
-        print(f"Authenticating with username: {attrs.get('username')}, password: {'*' * len(attrs.get('password', ''))}")
         user = authenticate(username=attrs.get('username'), password=attrs.get('password'))
-        print(f"authenticate() returned: {user}")
+        logger.debug("Token login for %s: %s", attrs.get('username'), "ok" if user else "rejected")
         if user is None:
             raise serializers.ValidationError("No active account found with the given credentials")
         # Generate token for the authenticated user directly
@@ -65,12 +68,16 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             'first_name': user.first_name,
             'last_name': user.last_name,
         }
-        print(f"Returning token data: {data}")
         return data
 
     @classmethod
     def get_token(cls, user):
-        return super().get_token(user)
+        # Role and community travel in the token (and the access tokens refreshed from it)
+        token = super().get_token(user)
+        community_id = Community.objects.filter(admin=user).values_list('pk', flat=True).first()
+        for claim, value in token_claims(user, community_id).items():
+            token[claim] = value
+        return token
 
 class UserLoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -80,15 +87,10 @@ class UserLoginSerializer(serializers.Serializer):
         email = data.get('email')
         password = data.get('password')
 
-        # Debug print for login attempts
-        print(f"Login attempt: email={email}, password={'*' * len(password) if password else None}")
-
         try:
             user_obj = User.objects.get(email=email)
-            print(f"User found: username={user_obj.username}, is_active={user_obj.is_active}")
             user = authenticate(username=user_obj.username, password=password)
         except User.DoesNotExist:
-            print("User with this email does not exist.")
             user = None
 
         if user and user.is_active:
@@ -99,7 +101,7 @@ class UserLoginSerializer(serializers.Serializer):
                 'is_admin': user.is_admin
             }
         else:
-            print("Invalid email or password.")
+            logger.debug("Login rejected for %s", email)
             raise serializers.ValidationError("Invalid email or password.")
 
 class CommunitySerializer(serializers.ModelSerializer):
@@ -0,0 +1,40 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from api.authentication import invalidate_cached_users
+from api.serializers.user import UserSerializer
+from base.models import Community, User
+
+
+# -------------------- AUTHENTICATION CACHE -------------------- #
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_cached_users(instance.pk)
+
+
+@receiver(pre_save, sender=Community)
+def community_admin_before(sender, instance, **kwargs):
+    instance._admin_before = None
+    if not instance._state.adding:
+        instance._admin_before = Community.objects.filter(pk=instance.pk).values_list('admin_id', flat=True).first()
+
+
+@receiver(post_save, sender=Community)
+@receiver(post_delete, sender=Community)
+def community_admin_changed(sender, instance, **kwargs):
+    # Cached users carry their administered community
+    invalidate_cached_users(instance.admin_id, getattr(instance, '_admin_before', None))
+
+
+# -------------------- RESPONSE VERSIONS -------------------- #
+
+@receiver(post_save, sender=User)
+@receiver(pre_delete, sender=User)
+def community_admin_touched(sender, instance, update_fields=None, **kwargs):
+    # Communities nest their admin's profile, so its edits must change the community's ETag
+    if update_fields is not None and not set(update_fields) & set(UserSerializer.Meta.fields):
+        return  # e.g. update_last_login on every token
+    Community.objects.filter(admin=instance).update(updated_at=timezone.now())
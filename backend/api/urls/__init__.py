@@ -2,9 +2,17 @@ from django.urls import path, include
 from api.urls import user as user_urls
 from api.urls import farm as farm_urls
 from api.urls import fieldboundary as fieldboundary_urls
+from api.urls import job as job_urls
+from api.urls import tiles as tiles_urls
+from api.urls import community as community_urls
+from api.urls import export as export_urls
 
 urlpatterns = [
     path("users/", include((user_urls.urlpatterns))),
     path("", include((fieldboundary_urls.urlpatterns))),
     path("", include((farm_urls.urlpatterns))),
+    path("", include((job_urls.urlpatterns))),
+    path("", include((tiles_urls.urlpatterns))),
+    path("", include((community_urls.urlpatterns))),
+    path("", include((export_urls.urlpatterns))),
 ]
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from api.views import CommunityStatsView
+
+urlpatterns = [
+    path('communities/<uuid:pk>/stats/', CommunityStatsView.as_view(), name='community-stats'),
+]
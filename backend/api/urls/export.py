@@ -0,0 +1,7 @@
+from django.urls import path
+
+from api.views import AnalyticsExportView
+
+urlpatterns = [
+    path('exports/<str:layer>/', AnalyticsExportView.as_view(), name='analytics-export'),
+]
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from api.views import VectorTileView
+
+urlpatterns = [
+    path('tiles/<str:layer>/<int:z>/<int:x>/<int:y>.mvt', VectorTileView.as_view(), name='vector-tile'),
+]
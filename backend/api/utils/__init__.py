@@ -1 +1,5 @@
-from .soil import *
\ No newline at end of file
+from .jobs import *
+from .soil import *
+from .field_import import *
+from .community_stats import *
+from .soil_history import *
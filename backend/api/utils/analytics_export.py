@@ -0,0 +1,186 @@
+import json
+import os
+import shutil
+import tempfile
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pyogrio
+from django.contrib.gis.db.models.functions import AsWKB
+from django.db import connection
+
+from base.models import Farm, FieldBoundary
+
+# Rows per server-side cursor fetch, i.e. per Arrow record batch / Parquet row group
+ARROW_BATCH_SIZE = 10000
+GEOMETRY_COLUMN = 'geometry'
+# --format / ?format= values and the file extension each writes
+EXPORT_FORMATS = {'parquet': '.parquet', 'fgb': '.fgb'}
+TIMESTAMP = pa.timestamp('us', tz='UTC')
+
+
+class AnalyticsExportError(Exception):
+    pass
+
+
+def _text(values):
+    # UUIDs come back from psycopg2 as uuid.UUID
+    return [None if value is None else str(value) for value in values]
+
+
+def _wkb(values):
+    # bytea comes back from psycopg2 as memoryview
+    return [None if value is None else bytes(value) for value in values]
+
+
+# layer -> (model, geometry field, [(column, ORM lookup, Arrow type, converter or None)])
+LAYERS = {
+    'farms': (Farm, 'coordinates', [
+        ('uuid', 'uuid', pa.string(), _text),
+        ('name', 'name', pa.string(), None),
+        ('owner_id', 'owner_id', pa.string(), _text),
+        ('community_id', 'community_id', pa.string(), _text),
+        ('created_at', 'created_at', TIMESTAMP, None),
+        ('updated_at', 'updated_at', TIMESTAMP, None),
+    ]),
+    'fields': (FieldBoundary, 'boundary', [
+        ('uuid', 'uuid', pa.string(), _text),
+        ('farm_id', 'farm_id', pa.string(), _text),
+        ('farm_name', 'farm__name', pa.string(), None),
+        ('owner_id', 'farm__owner_id', pa.string(), _text),
+        ('community_id', 'farm__community_id', pa.string(), _text),
+        ('area_hectares', 'area_hectares', pa.float64(), None),
+        ('soil_type', 'soil_type', pa.string(), None),
+        ('soil_texture', 'soil_texture', pa.string(), None),
+        ('sand_pct', 'sand_pct', pa.float64(), None),
+        ('silt_pct', 'silt_pct', pa.float64(), None),
+        ('clay_pct', 'clay_pct', pa.float64(), None),
+        ('soil_ph', 'soil_ph', pa.float64(), None),
+        ('organic_carbon', 'organic_carbon', pa.float64(), None),
+        ('recommended_crops', 'recommended_crops', pa.list_(pa.string()), None),
+        ('soil_analyzed_at', 'soil_analyzed_at', TIMESTAMP, None),
+        ('created_at', 'created_at', TIMESTAMP, None),
+        ('updated_at', 'updated_at', TIMESTAMP, None),
+    ]),
+}
+
+
+def layer_schema(layer):
+    _, _, columns = LAYERS[layer]
+    return pa.schema(
+        [pa.field(name, arrow_type) for name, _, arrow_type, _ in columns]
+        + [pa.field(GEOMETRY_COLUMN, pa.binary())]
+    )
+
+
+def record_batches(layer, community=None, batch_size=ARROW_BATCH_SIZE):
+    """
+    Yield Arrow record batches of a layer (`farms` or `fields`), optionally
+    limited to one community. The SQL Django compiles for the layer's
+    columns plus ST_AsBinary(geometry) runs on a server-side cursor, and
+    every fetchmany() becomes one batch built column by column, so memory
+    is bounded by `batch_size` and no model instances are created.
+    """
+    if layer not in LAYERS:
+        raise AnalyticsExportError(f"Unknown layer {layer!r}; expected one of: {', '.join(LAYERS)}.")
+    model, geometry_field, columns = LAYERS[layer]
+    queryset = model._default_manager.all()
+    if community is not None:
+        queryset = queryset.filter(**{'community' if model is Farm else 'farm__community': community})
+    queryset = (
+        queryset.order_by('created_at', 'uuid')
+        .annotate(**{f'{GEOMETRY_COLUMN}_wkb': AsWKB(geometry_field)})
+        .values_list(*[lookup for _, lookup, _, _ in columns], f'{GEOMETRY_COLUMN}_wkb')
+    )
+    sql, params = queryset.query.sql_with_params()
+    schema = layer_schema(layer)
+    converters = [converter for _, _, _, converter in columns] + [_wkb]
+
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            arrays = [
+                pa.array(converter(values) if converter else list(values), type=field.type)
+                for values, converter, field in zip(zip(*rows), converters, schema)
+            ]
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def geoparquet_metadata():
+    """GeoParquet 1.1 `geo` file metadata: WKB polygons in lon/lat (the default OGC:CRS84)."""
+    return {
+        'version': '1.1.0',
+        'primary_column': GEOMETRY_COLUMN,
+        'columns': {GEOMETRY_COLUMN: {'encoding': 'WKB', 'geometry_types': ['Polygon']}},
+    }
+
+
+def write_geoparquet(layer, path, community=None, batch_size=ARROW_BATCH_SIZE):
+    """Write a layer to a GeoParquet file, one row group per record batch. Returns the row count."""
+    schema = layer_schema(layer).with_metadata({'geo': json.dumps(geoparquet_metadata())})
+    rows = 0
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for batch in record_batches(layer, community, batch_size):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def write_flatgeobuf(layer, path, community=None, batch_size=ARROW_BATCH_SIZE):
+    """
+    Write a layer to a FlatGeobuf file with a packed Hilbert R-tree spatial
+    index, through GDAL (pyogrio). FlatGeobuf has no list type, so crop
+    lists are written comma-separated. Returns the row count.
+    """
+    rows = 0
+
+    def batches():
+        nonlocal rows
+        for batch in record_batches(layer, community, batch_size):
+            rows += batch.num_rows
+            yield _flatten_lists(batch)
+
+    schema = _flatten_lists(layer_schema(layer).empty_table()).schema
+    reader = pa.RecordBatchReader.from_batches(schema, batches())
+    pyogrio.write_arrow(
+        reader, path, layer=layer, driver='FlatGeobuf', geometry_name=GEOMETRY_COLUMN,
+        geometry_type='Polygon', crs='EPSG:4326', SPATIAL_INDEX='YES',
+    )
+    return rows
+
+
+def _flatten_lists(data):
+    for i, field in enumerate(data.schema):
+        if pa.types.is_list(field.type):
+            data = data.set_column(i, field.name, pc.binary_join(data.column(i), ', '))
+    return data
+
+
+WRITERS = {'parquet': write_geoparquet, 'fgb': write_flatgeobuf}
+
+
+def export_layer(layer, fmt, path, community=None, batch_size=ARROW_BATCH_SIZE):
+    """Write `layer` as `fmt` ('parquet' or 'fgb') to `path`. Returns the row count."""
+    if fmt not in WRITERS:
+        raise AnalyticsExportError(f"Unknown format {fmt!r}; expected one of: {', '.join(WRITERS)}.")
+    if layer not in LAYERS:
+        raise AnalyticsExportError(f"Unknown layer {layer!r}; expected one of: {', '.join(LAYERS)}.")
+    return WRITERS[fmt](layer, path, community=community, batch_size=batch_size)
+
+
+def export_layer_file(layer, fmt, community=None):
+    """
+    Export to a temporary file and return it open for reading; the file is
+    already unlinked, so it disappears once the handle is closed.
+    """
+    directory = tempfile.mkdtemp(prefix='analytics-export-')
+    try:
+        path = os.path.join(directory, f'{layer}{EXPORT_FORMATS[fmt]}')
+        export_layer(layer, fmt, path, community=community)
+        return open(path, 'rb')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,42 @@
+from collections import defaultdict
+
+from base.models import CommunityAggregate
+from base.stats import ORGANIC_CARBON_BIN, PH_BIN
+
+
+def _histogram(buckets, width):
+    return [
+        {'from': float(bucket), 'to': float(bucket) + width, 'count': int(round(count))}
+        for bucket, count in sorted(buckets.items(), key=lambda item: float(item[0]))
+    ]
+
+
+def _distribution(buckets):
+    return {
+        name: int(round(count))
+        for name, count in sorted(buckets.items(), key=lambda item: (-item[1], item[0]))
+    }
+
+
+def community_stats(community):
+    """Dashboard totals of a community, read from its stored aggregates in one query."""
+    metrics, updated_at = defaultdict(dict), None
+    rows = CommunityAggregate.objects.filter(community=community).values_list('metric', 'bucket', 'value', 'updated_at')
+    for metric, bucket, value, updated in rows:
+        # Rounding drops bins emptied by float subtraction
+        if round(value, 6):
+            metrics[metric][bucket] = value
+        updated_at = max(updated_at, updated) if updated_at else updated
+    return {
+        'community': str(community.pk),
+        'name': community.name,
+        'farms': int(round(metrics['farms'].get('', 0))),
+        'fields': int(round(metrics['fields'].get('', 0))),
+        'analyzed_fields': int(round(metrics['analyzed'].get('', 0))),
+        'total_hectares': round(metrics['hectares'].get('', 0), 2),
+        'ph_histogram': _histogram(metrics['ph'], PH_BIN),
+        'organic_carbon_histogram': _histogram(metrics['organic_carbon'], ORGANIC_CARBON_BIN),
+        'texture_classes': _distribution(metrics['texture']),
+        'recommended_crops': _distribution(metrics['crop']),
+        'updated_at': updated_at,
+    }
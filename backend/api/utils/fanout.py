@@ -0,0 +1,259 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from requests.adapters import HTTPAdapter
+
+from api.metrics import PROVIDER_LATENCY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10
+
+
+class ProviderUnavailable(Exception):
+    """A provider call was skipped (open circuit) or did not answer in time."""
+
+
+def provider_setting(name, key, default):
+    """settings.SOIL_PROVIDERS[name][key], falling back to the '*' entry, then `default`."""
+    providers = getattr(settings, 'SOIL_PROVIDERS', {})
+    for entry in (providers.get(name, {}), providers.get('*', {})):
+        if key in entry:
+            return entry[key]
+    return default
+
+
+def provider_timeout(name):
+    return provider_setting(name, 'TIMEOUT', DEFAULT_TIMEOUT)
+
+
+# -------------------- HTTP SESSION -------------------- #
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Process-wide requests.Session: keeps TCP/TLS connections to provider
+    APIs alive between calls instead of reconnecting for every polygon.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            size = getattr(settings, 'SOIL_PROVIDER_WORKERS', 16)
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+# -------------------- CIRCUIT BREAKER -------------------- #
+
+class CircuitBreaker:
+    """
+    Stops calling a provider after `failure_threshold` consecutive failures.
+    Once `reset_timeout` seconds have passed, one trial call is let through
+    (half-open). Success closes the circuit again; failure re-opens it.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self.lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("Circuit for provider '%s' opened after %s failures", self.name, self.failures)
+                self.opened_at = time.monotonic()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=provider_setting(name, 'FAILURE_THRESHOLD', 5),
+                reset_timeout=provider_setting(name, 'RESET_TIMEOUT', 60),
+            )
+        return _breakers[name]
+
+
+def guarded(name, func):
+    """Wrap a provider fetch so it respects and feeds the provider's circuit breaker."""
+    breaker = get_breaker(name)
+
+    def call(*args, **kwargs):
+        if not breaker.allow():
+            PROVIDER_LATENCY.labels(name, 'circuit_open').observe(0)
+            raise ProviderUnavailable(f"Circuit open for provider '{name}'")
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            PROVIDER_LATENCY.labels(name, 'error').observe(time.perf_counter() - started)
+            breaker.record_failure()
+            raise
+        PROVIDER_LATENCY.labels(name, 'ok').observe(time.perf_counter() - started)
+        breaker.record_success()
+        return result
+    return call
+
+
+# -------------------- RATE LIMIT -------------------- #
+
+RATE_WINDOW = 60
+# fan_out call bookkeeping for the current thread (see _timed)
+_current = threading.local()
+
+
+def acquire(name):
+    """
+    Block until the provider's RATE_LIMIT (requests per minute) allows one
+    more request. Counters live in the default Django cache, so the limit is
+    global when that cache is shared between processes (e.g. Redis).
+    Time spent waiting here does not count against the fan-out timeout.
+    """
+    limit = provider_setting(name, 'RATE_LIMIT', None)
+    if not limit:
+        return
+    while True:
+        window = int(time.time() // RATE_WINDOW)
+        key = f"ratelimit:{name}:{window}"
+        cache.add(key, 0, timeout=RATE_WINDOW * 2)
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(key, 1, timeout=RATE_WINDOW * 2)
+            count = 1
+        if count <= limit:
+            break
+        time.sleep(RATE_WINDOW - time.time() % RATE_WINDOW + 0.05)
+    started = getattr(_current, 'started', None)
+    if started is not None:
+        started['at'] = time.monotonic()
+
+
+# -------------------- FAN-OUT -------------------- #
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'SOIL_PROVIDER_WORKERS', 16),
+                thread_name_prefix='provider',
+            )
+        return _pool
+
+
+def _result(future, timeout, started, cap):
+    # The timeout runs from when the call actually starts, not from when it was queued
+    while True:
+        now = time.monotonic()
+        begun = started.get('at')
+        deadline = min((begun if begun is not None else now) + timeout, cap)
+        try:
+            return future.result(timeout=max(deadline - now, 0))
+        except FutureTimeoutError:
+            begun = started.get('at')
+            if time.monotonic() >= (cap if begun is None else min(begun + timeout, cap)):
+                raise
+
+
+def _timed(func, started):
+    def run():
+        started['at'] = time.monotonic()
+        _current.started = started
+        # Cache lookups (DatabaseCacheBackend) may query from provider threads
+        close_old_connections()
+        try:
+            return func()
+        finally:
+            _current.started = None
+            close_old_connections()
+    return run
+
+
+def fan_out(calls):
+    """
+    Run provider calls concurrently on a bounded thread pool.
+
+    `calls` maps a key to (provider name, zero-argument callable). Each call
+    gets its provider's timeout from the moment it starts running, so total
+    latency is that of the slowest provider rather than the sum.
+    SOIL_FANOUT_MAX_WAIT caps the wait for the whole set. A call that fails
+    or times out does not fail the others.
+    Returns (results, errors): dicts keyed like `calls`; failed keys appear
+    only in `errors`, with the exception.
+    """
+    pool = get_pool()
+    cap = time.monotonic() + getattr(settings, 'SOIL_FANOUT_MAX_WAIT', 120)
+    futures = {}
+    for key, (name, func) in calls.items():
+        started = {}
+        futures[key] = (name, started, pool.submit(_timed(func, started)))
+
+    results, errors = {}, {}
+    for key, (name, started, future) in futures.items():
+        try:
+            results[key] = _result(future, provider_timeout(name), started, cap)
+        except FutureTimeoutError:
+            # Threads cannot be interrupted; an unstarted call is dropped, a running one is abandoned
+            future.cancel()
+            get_breaker(name).record_failure()
+            errors[key] = ProviderUnavailable(f"Provider '{name}' timed out after {provider_timeout(name)}s")
+        except Exception as exc:
+            errors[key] = exc
+        if key in errors:
+            logger.warning("Provider '%s' failed: %s", name, errors[key])
+    return results, errors
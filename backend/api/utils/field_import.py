@@ -0,0 +1,231 @@
+import logging
+import os
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.gis.gdal import CoordTransform, DataSource, GDALException, SpatialReference
+from django.contrib.gis.geos import GEOSException, GEOSGeometry, WKBWriter
+from django.db import transaction
+
+from base.area import polygons_area_hectares
+from base.models import Farm, FieldBoundary, User
+from base.stats import add_fields
+from .jobs import enqueue, job_handler, report_progress
+from .soil import enqueue_soil_analysis_batch
+
+logger = logging.getLogger(__name__)
+
+# .zip is a zipped shapefile (.shp/.shx/.dbf/.prj), read in place through GDAL's /vsizip/
+SUPPORTED_EXTENSIONS = ('.geojson', '.json', '.gpkg', '.zip')
+IMPORT_BATCH_SIZE = 2000
+# Polygons per queued soil analysis job (one Earth Engine reduceRegions call)
+ANALYSIS_BATCH_SIZE = 200
+# Only the first few rejected features are reported back in detail
+MAX_REPORTED_ERRORS = 50
+
+
+class FieldImportError(Exception):
+    pass
+
+
+def open_datasource(path):
+    if path.lower().endswith('.zip'):
+        path = f"/vsizip/{path}"
+    try:
+        return DataSource(path)
+    except GDALException as exc:
+        raise FieldImportError(f"Could not read {os.path.basename(path)}: {exc}")
+
+
+def iter_features(path):
+    """
+    Stream (OGR geometry in EPSG:4326, properties) for every feature of every
+    layer. Features are read one at a time, so memory does not grow with the
+    file size.
+    """
+    wgs84 = SpatialReference(4326)
+    for layer in open_datasource(path):
+        transform = None
+        if layer.srs is not None and layer.srs.srid != 4326:
+            transform = CoordTransform(layer.srs, wgs84)
+        names = layer.fields
+        for feature in layer:
+            geometry = feature.geom
+            if transform is not None:
+                geometry.transform(transform)
+            yield geometry, {name: feature.get(name) for name in names}
+
+
+def _flatten_polygons(geometry):
+    if geometry.geom_type == 'Polygon':
+        return [geometry]
+    if geometry.geom_type in ('MultiPolygon', 'GeometryCollection'):
+        return [polygon for part in geometry for polygon in _flatten_polygons(part)]
+    return []
+
+
+def repair_polygons(ogr_geometry):
+    """
+    Turn one feature geometry into valid 2D EPSG:4326 polygons: invalid rings
+    are repaired with GEOS MakeValid, multi-part features become one polygon
+    per part, and empty, point or line results are dropped.
+    Returns (polygons, whether a repair was needed).
+    """
+    writer = WKBWriter()
+    writer.outdim = 2
+    geometry = GEOSGeometry(writer.write(ogr_geometry.geos), srid=4326)
+    if geometry.empty:
+        return [], False
+    repaired = not geometry.valid
+    if repaired:
+        geometry = geometry.make_valid()
+    polygons = []
+    for polygon in _flatten_polygons(geometry):
+        if polygon.empty or polygon.area == 0:
+            continue
+        polygon.srid = 4326
+        polygons.append(polygon)
+    return polygons, repaired
+
+
+class FieldImporter:
+    """
+    Bulk-create FieldBoundary rows from a GeoJSON, GeoPackage or zipped
+    Shapefile.
+
+    Every feature goes to `farm`, or, with `farm_property`, to the farm whose
+    uuid is in that feature property. When `owner` is given only their farms
+    are accepted. Rows are inserted `batch_size` at a time with bulk_create,
+    areas are computed for the whole batch at once, and soil analyses are
+    queued as batch jobs instead of one job per field.
+    """
+
+    def __init__(self, farm=None, farm_property=None, owner=None, batch_size=IMPORT_BATCH_SIZE,
+                 analyze=True, on_progress=None):
+        if farm is None and not farm_property:
+            raise FieldImportError("Either a farm or a farm property is required.")
+        self.farm = farm
+        self.farm_property = farm_property
+        self.owner = owner
+        self.batch_size = batch_size
+        self.analyze = analyze
+        self.on_progress = on_progress
+        self.farm_ids = {}
+        self.stats = {'read': 0, 'imported': 0, 'repaired': 0, 'skipped': 0, 'analysis_jobs': 0}
+        self.errors = []
+
+    def run(self, path):
+        started = time.monotonic()
+        batch = []
+        for index, (geometry, properties) in enumerate(iter_features(path)):
+            self.stats['read'] += 1
+            farm_id = self.resolve_farm(index, properties)
+            if farm_id is None:
+                continue
+            try:
+                polygons, repaired = repair_polygons(geometry)
+            except (GDALException, GEOSException) as exc:
+                self.reject(index, f"Invalid geometry: {exc}")
+                continue
+            if not polygons:
+                self.reject(index, "No polygon in geometry")
+                continue
+            self.stats['repaired'] += repaired
+            batch.extend(FieldBoundary(farm_id=farm_id, boundary=polygon) for polygon in polygons)
+            if len(batch) >= self.batch_size:
+                self.flush(batch, started)
+                batch = []
+        if batch:
+            self.flush(batch, started)
+        self.stats['seconds'] = round(time.monotonic() - started, 2)
+        return {**self.stats, 'errors': self.errors}
+
+    def resolve_farm(self, index, properties):
+        if not self.farm_property:
+            return self.farm.pk
+        value = properties.get(self.farm_property)
+        if value is None and self.farm is not None:
+            return self.farm.pk
+        try:
+            farm_uuid = uuid.UUID(str(value))
+        except ValueError:
+            self.reject(index, f"'{self.farm_property}' is not a farm uuid: {value!r}")
+            return None
+        if farm_uuid not in self.farm_ids:
+            farms = Farm.objects.filter(pk=farm_uuid)
+            if self.owner is not None:
+                farms = farms.filter(owner=self.owner)
+            self.farm_ids[farm_uuid] = farms.values_list('pk', flat=True).first()
+        if self.farm_ids[farm_uuid] is None:
+            self.reject(index, f"Unknown farm {farm_uuid}")
+        return self.farm_ids[farm_uuid]
+
+    def reject(self, index, reason):
+        self.stats['skipped'] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'feature': index, 'error': reason})
+
+    def flush(self, batch, started):
+        # bulk_create skips save(), so areas are filled in here, one vectorized pass per batch
+        for field, area in zip(batch, polygons_area_hectares([field.boundary for field in batch])):
+            field.area_hectares = area
+        with transaction.atomic():
+            created = FieldBoundary.objects.bulk_create(batch, batch_size=self.batch_size)
+            pks = [field.pk for field in created]
+            if self.analyze:
+                for i in range(0, len(pks), ANALYSIS_BATCH_SIZE):
+                    enqueue_soil_analysis_batch(pks[i:i + ANALYSIS_BATCH_SIZE], owner=self.owner)
+                    self.stats['analysis_jobs'] += 1
+            # bulk_create skips post_save, so community aggregates are updated here
+            add_fields(created)
+
+        self.stats['imported'] += len(created)
+        elapsed = time.monotonic() - started
+        self.stats['fields_per_second'] = round(self.stats['imported'] / elapsed, 1) if elapsed else None
+        if self.on_progress is not None:
+            self.on_progress(dict(self.stats))
+
+
+def save_upload(upload):
+    """Store an uploaded file under FIELD_IMPORT_ROOT and return its path."""
+    extension = os.path.splitext(upload.name)[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise FieldImportError(
+            f"Unsupported file type '{extension}'. Use one of: {', '.join(SUPPORTED_EXTENSIONS)}."
+        )
+    os.makedirs(settings.FIELD_IMPORT_ROOT, exist_ok=True)
+    path = os.path.join(settings.FIELD_IMPORT_ROOT, f"{uuid.uuid4()}{extension}")
+    with open(path, 'wb') as out:
+        for chunk in upload.chunks():
+            out.write(chunk)
+    return path
+
+
+def enqueue_field_import(path, owner, farm=None, farm_property=None, analyze=True):
+    # A retry would insert the already imported rows again, so imports run once
+    return enqueue('field_import', {
+        'path': path,
+        'farm': str(farm.pk) if farm is not None else None,
+        'farm_property': farm_property,
+        'analyze': analyze,
+    }, owner=owner, max_attempts=1)
+
+
+@job_handler('field_import')
+def run_field_import_job(job):
+    payload = job.payload
+    try:
+        importer = FieldImporter(
+            farm=Farm.objects.get(pk=payload['farm']) if payload.get('farm') else None,
+            farm_property=payload.get('farm_property'),
+            owner=User.objects.get(pk=job.owner_id) if job.owner_id else None,
+            analyze=payload.get('analyze', True),
+            on_progress=lambda stats: report_progress(job, **stats),
+        )
+        result = importer.run(payload['path'])
+    finally:
+        if os.path.exists(payload['path']):
+            os.remove(payload['path'])
+    logger.info("Field import job %s: %s", job.pk, {k: v for k, v in result.items() if k != 'errors'})
+    return result
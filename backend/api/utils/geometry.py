@@ -0,0 +1,129 @@
+import json
+
+from django.contrib.gis.db.models.functions import AsGeoJSON, GeomOutputGeoFunc, NUMERIC_TYPES
+from django.core.cache import cache
+from rest_framework.exceptions import ValidationError
+
+from api.metrics import count_cache
+
+MAX_ZOOM = 22
+MAX_PRECISION = 15
+# Zooms are grouped in bands of this width; each band shares one simplified variant
+ZOOM_BAND_WIDTH = 2
+SIMPLIFIED_CACHE_TIMEOUT = 24 * 3600
+
+
+class SimplifyPreserveTopology(GeomOutputGeoFunc):
+    """PostGIS ST_SimplifyPreserveTopology(geom, tolerance)."""
+    function = 'ST_SimplifyPreserveTopology'
+
+    def __init__(self, expression, tolerance, **extra):
+        super().__init__(expression, self._handle_param(tolerance, 'tolerance', NUMERIC_TYPES), **extra)
+
+
+def zoom_to_tolerance(zoom):
+    """Half the width of a 256px web-map pixel at `zoom`, in degrees."""
+    return 360 / (256 * 2 ** zoom) / 2
+
+
+def zoom_band(zoom):
+    return zoom // ZOOM_BAND_WIDTH
+
+
+def band_tolerance(band):
+    # Use the finest zoom in the band so no zoom in it looks over-simplified
+    return zoom_to_tolerance(band * ZOOM_BAND_WIDTH + ZOOM_BAND_WIDTH - 1)
+
+
+def _int_param(params, name, lo, hi):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValidationError({name: f"Must be an integer between {lo} and {hi}."})
+    if not lo <= value <= hi:
+        raise ValidationError({name: f"Must be an integer between {lo} and {hi}."})
+    return value
+
+
+def geometry_options(request):
+    """
+    Parse ?simplify=<tolerance in degrees>, ?zoom=<z> and ?precision=<digits>.
+    Returns None when the request asks for full-resolution geometries,
+    otherwise a dict with `tolerance`, `band` (zoom band, None for an explicit
+    tolerance) and `precision`.
+    """
+    params = request.query_params
+    zoom = _int_param(params, 'zoom', 0, MAX_ZOOM)
+    precision = _int_param(params, 'precision', 0, MAX_PRECISION)
+    tolerance = band = None
+
+    simplify = params.get('simplify')
+    if simplify not in (None, ''):
+        try:
+            tolerance = float(simplify)
+        except ValueError:
+            tolerance = -1
+        if not 0 <= tolerance <= 1:
+            raise ValidationError({'simplify': "Must be a tolerance in degrees between 0 and 1."})
+    elif zoom is not None:
+        band = zoom_band(zoom)
+        tolerance = band_tolerance(band)
+
+    if tolerance is None and precision is None:
+        return None
+    return {'tolerance': tolerance, 'band': band, 'precision': precision}
+
+
+# -------------------- CACHING -------------------- #
+
+def _simplified_key(model, field_name, updated_at, options, pk):
+    return (
+        f"simplified:{model._meta.label_lower}:{field_name}:{pk}:{updated_at.isoformat()}:"
+        f"{options['band']}:{options['precision']}"
+    )
+
+
+def simplified_geometries(model, field_name, pks, options):
+    """
+    GeoJSON dicts for the given rows' geometry, simplified and rounded in
+    PostGIS according to `options` (see geometry_options). Zoom-band variants
+    are cached per row version (pk and updated_at), so an edit only
+    invalidates that row's entries. Returns {pk: geojson dict or None}.
+    """
+    pks = list(pks)
+    if not pks:
+        return {}
+    cacheable = options['band'] is not None
+    keys = {}
+    found = {}
+    if cacheable:
+        versions = model._default_manager.filter(pk__in=pks).values_list('pk', 'updated_at')
+        keys = {pk: _simplified_key(model, field_name, updated_at, options, pk) for pk, updated_at in versions}
+        cached = cache.get_many(list(keys.values()))
+        found = {pk: cached[key] for pk, key in keys.items() if key in cached}
+
+    missing = [pk for pk in pks if pk not in found]
+    if cacheable:
+        count_cache('simplified_geometry', hits=len(found), misses=len(missing))
+    if missing:
+        expression = field_name
+        if options['tolerance'] is not None:
+            expression = SimplifyPreserveTopology(field_name, options['tolerance'])
+        precision = options['precision'] if options['precision'] is not None else MAX_PRECISION
+        rows = (
+            model._default_manager
+            .filter(pk__in=missing)
+            .annotate(geometry_json=AsGeoJSON(expression, precision=precision))
+            .values_list('pk', 'geometry_json')
+        )
+        fetched = dict(rows)
+        found.update(fetched)
+        if cacheable:
+            cache.set_many(
+                {keys[pk]: value for pk, value in fetched.items() if pk in keys}, SIMPLIFIED_CACHE_TIMEOUT,
+            )
+
+    return {pk: json.loads(found[pk]) if found.get(pk) else None for pk in pks}
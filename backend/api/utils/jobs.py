@@ -0,0 +1,194 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from base.models import Job
+
+logger = logging.getLogger(__name__)
+
+# kind -> callable(job) returning a JSON-serializable result
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    """Register the function that runs jobs of the given kind."""
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind, payload=None, owner=None, max_attempts=None):
+    """
+    Create a pending job and hand it to the configured executor once the
+    surrounding transaction commits.
+    """
+    job = Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        owner=owner,
+        max_attempts=max_attempts or getattr(settings, 'JOB_MAX_ATTEMPTS', 3),
+    )
+    transaction.on_commit(lambda: get_executor().submit(job.pk))
+    return job
+
+
+def report_progress(job, **progress):
+    """Merge counters into job.progress and persist them without touching other columns."""
+    job.progress = {**(job.progress or {}), **progress}
+    Job.objects.filter(pk=job.pk).update(progress=job.progress, updated_at=timezone.now())
+
+
+def retry_delay(attempts):
+    """Exponential backoff: JOB_RETRY_BACKOFF seconds, doubled per attempt."""
+    base = getattr(settings, 'JOB_RETRY_BACKOFF', 5)
+    cap = getattr(settings, 'JOB_RETRY_BACKOFF_MAX', 300)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), cap))
+
+
+def claim_job(job_id=None, kinds=None):
+    """
+    Atomically move one due pending job to 'running' and return it, or None.
+    SKIP LOCKED lets any number of workers poll the table concurrently.
+    """
+    with transaction.atomic():
+        qs = Job.objects.select_for_update(skip_locked=True).filter(
+            status='pending', run_after__lte=timezone.now()
+        )
+        if job_id is not None:
+            qs = qs.filter(pk=job_id)
+        if kinds:
+            qs = qs.filter(kind__in=kinds)
+        job = qs.order_by('run_after').first()
+        if job is None:
+            return None
+        job.status = 'running'
+        job.attempts += 1
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'attempts', 'started_at', 'updated_at'])
+    return job
+
+
+def run_job(job):
+    """Run a claimed job, then record success, schedule a retry or give up."""
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind '{job.kind}'")
+        result = handler(job)
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed on attempt %s", job.pk, job.kind, job.attempts)
+        job.last_error = f"{type(exc).__name__}: {exc}"
+        if job.attempts < job.max_attempts:
+            job.status = 'pending'
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+        else:
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+    else:
+        job.status = 'succeeded'
+        job.result = result
+        job.last_error = None
+        job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'last_error', 'run_after', 'finished_at', 'updated_at'])
+    return job
+
+
+def process_job(job_id):
+    """Claim and run one specific job. Returns the job, or None if it was not due."""
+    job = claim_job(job_id=job_id)
+    if job is None:
+        return None
+    return run_job(job)
+
+
+def requeue_stale_jobs(older_than):
+    """
+    Put 'running' jobs whose worker died back in the queue: those not updated
+    since `older_than`. report_progress() keeps long jobs alive. Jobs that
+    used up their attempts are marked failed instead, so a job enqueued with
+    max_attempts=1 (e.g. a field import) never runs twice. Returns
+    (requeued, failed) counts.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status='running', updated_at__lt=older_than)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', last_error="Worker stopped while the job was running", finished_at=now, updated_at=now,
+    )
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+        status='pending', run_after=now, updated_at=now,
+    )
+    return requeued, failed
+
+
+# -------------------- EXECUTORS -------------------- #
+
+class InlineJobExecutor:
+    """
+    Runs jobs synchronously in the calling thread, retrying immediately
+    instead of waiting out the backoff. Meant for tests and local debugging.
+    """
+
+    def submit(self, job_id):
+        while True:
+            job = Job.objects.filter(pk=job_id, status='pending').first()
+            if job is None:
+                return
+            job.run_after = timezone.now()
+            job.save(update_fields=['run_after'])
+            process_job(job_id)
+
+
+class ThreadPoolJobExecutor:
+    """
+    Runs jobs on a bounded in-process thread pool; retries are resubmitted
+    after their backoff delay. Jobs stay in the table, so anything lost on a
+    restart is picked up by `manage.py run_jobs`.
+    """
+
+    def __init__(self, max_workers=None):
+        self.pool = ThreadPoolExecutor(
+            max_workers=max_workers or getattr(settings, 'JOB_WORKERS', 4),
+            thread_name_prefix='job',
+        )
+
+    def submit(self, job_id):
+        self.pool.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        close_old_connections()
+        try:
+            job = process_job(job_id)
+            if job is not None and job.status == 'pending':
+                delay = (job.run_after - timezone.now()).total_seconds()
+                timer = threading.Timer(max(delay, 0), self.submit, [job_id])
+                timer.daemon = True
+                timer.start()
+        finally:
+            close_old_connections()
+
+
+class QueueOnlyJobExecutor:
+    """Leaves jobs in the table for external `manage.py run_jobs` workers."""
+
+    def submit(self, job_id):
+        pass
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor():
+    path = getattr(settings, 'JOB_EXECUTOR', 'api.utils.jobs.ThreadPoolJobExecutor')
+    with _executors_lock:
+        if path not in _executors:
+            _executors[path] = import_string(path)()
+        return _executors[path]
@@ -0,0 +1,281 @@
+import json
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+
+from .fanout import acquire
+from .soil_tiles import get_tile_store
+
+logger = logging.getLogger(__name__)
+
+# SoilGrids layers via Earth Engine, keyed by the band name they get in the stacked image
+SOILGRIDS_LAYERS = {
+    'sand': 'projects/soilgrids-isric/sand_mean',
+    'silt': 'projects/soilgrids-isric/silt_mean',
+    'clay': 'projects/soilgrids-isric/clay_mean',
+    'ph': 'projects/soilgrids-isric/phh2o_mean',
+    'organic_carbon': 'projects/soilgrids-isric/orc_mean'
+}
+SOILGRIDS_SCALE = 250
+
+
+def conventional_units(stats):
+    """
+    SoilGrids means in mapped units -> the units stored and scored downstream:
+    organic carbon dg/kg -> g/kg. Texture stays in g/kg (only proportions are
+    used) and pH x 10 is undone by soil_classification.normalize_ph.
+    """
+    oc = stats.get('organic_carbon')
+    return {**stats, 'organic_carbon': oc / 10 if oc is not None else None}
+
+
+def _as_geojson(polygon_geojson):
+    """Accept a GeoJSON dict or string (e.g. ``field.boundary.geojson``)."""
+    if isinstance(polygon_geojson, str):
+        return json.loads(polygon_geojson)
+    return polygon_geojson
+
+
+# -------------------- EARTH ENGINE -------------------- #
+
+_ee = None
+_ee_lock = threading.Lock()
+
+
+def earthengine():
+    """
+    The initialized `ee` module. Importing and authenticating Earth Engine
+    costs seconds and needs the network, so it happens on first use rather
+    than when Django starts.
+    """
+    global _ee
+    if _ee is None:
+        with _ee_lock:
+            if _ee is None:
+                import ee
+                ee.Initialize(project=getattr(settings, 'EARTHENGINE_PROJECT', 'ecosystemplus'))
+                _ee = ee
+    return _ee
+
+
+def soilgrids_image():
+    """
+    Stack every SoilGrids layer into one multi-band image so a single
+    reduction returns all of them in one Earth Engine round trip.
+    """
+    ee = earthengine()
+    bands = [
+        ee.ImageCollection(asset).first().select(0).rename(key)
+        for key, asset in SOILGRIDS_LAYERS.items()
+    ]
+    return ee.Image.cat(bands)
+
+
+# -------------------- REGISTRY -------------------- #
+
+# name -> SoilGridsProvider subclass; selected with settings.SOIL_ANALYSIS_ENGINE
+SOILGRIDS_PROVIDERS = {}
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def register_provider(name):
+    """Register a SoilGridsProvider subclass under `name`."""
+    def decorator(cls):
+        cls.name = name
+        SOILGRIDS_PROVIDERS[name] = cls
+        return cls
+    return decorator
+
+
+def get_provider(name=None):
+    """The (shared) provider instance for `name`, default settings.SOIL_ANALYSIS_ENGINE."""
+    name = name or getattr(settings, 'SOIL_ANALYSIS_ENGINE', 'earthengine')
+    with _instances_lock:
+        if name not in _instances:
+            try:
+                _instances[name] = SOILGRIDS_PROVIDERS[name]()
+            except KeyError:
+                raise LookupError(
+                    f"Unknown soil analysis engine '{name}'. Choose from: {', '.join(SOILGRIDS_PROVIDERS)}"
+                )
+        return _instances[name]
+
+
+def check_providers(names=None):
+    """
+    Run the health check of each provider (default: all registered).
+    Returns {name: {'ok': bool, 'detail': str, 'ms': float}}.
+    """
+    report = {}
+    for name in names or SOILGRIDS_PROVIDERS:
+        started = time.monotonic()
+        try:
+            detail = get_provider(name).health_check()
+            ok = True
+        except Exception as exc:
+            detail, ok = f"{type(exc).__name__}: {exc}", False
+        report[name] = {'ok': ok, 'detail': detail, 'ms': round((time.monotonic() - started) * 1000, 1)}
+    return report
+
+
+class SoilGridsProvider(ABC):
+    """
+    Source of SoilGrids layer means ({layer: mean or None}) over a polygon,
+    with organic carbon in g/kg whatever the backend stores (see
+    conventional_units).
+    """
+    name = None
+    # soil_cache source results are stored under, one per provider since each
+    # samples at its own resolution; None bypasses the cache
+    cache_source = None
+
+    @abstractmethod
+    def fetch_stats(self, polygon_geojson):
+        """{layer: mean or None} over one polygon."""
+
+    def fetch_stats_batch(self, polygons_geojson):
+        return [self.fetch_stats(p) for p in polygons_geojson]
+
+    @abstractmethod
+    def health_check(self):
+        """Raise if the provider cannot serve requests; return a short status otherwise."""
+
+
+@register_provider('earthengine')
+class EarthEngineProvider(SoilGridsProvider):
+    cache_source = 'soilgrids'
+
+    def fetch_stats(self, polygon_geojson):
+        """
+        Mean of every SoilGrids layer over the polygon, with one getInfo() call.
+        """
+        ee = earthengine()
+        polygon_geojson = _as_geojson(polygon_geojson)
+        geom = ee.Geometry.Polygon(polygon_geojson['coordinates'])
+        acquire(self.name)
+        stats = soilgrids_image().reduceRegion(
+            reducer=ee.Reducer.mean(),
+            geometry=geom,
+            scale=SOILGRIDS_SCALE
+        ).getInfo() or {}
+        return conventional_units({key: stats.get(key) for key in SOILGRIDS_LAYERS})
+
+    def fetch_stats_batch(self, polygons_geojson):
+        """
+        Same as fetch_stats for many polygons at once: the polygons are sent as
+        one FeatureCollection and reduced with reduceRegions, so the whole
+        batch costs a single getInfo() call. Results keep the input order.
+        """
+        polygons_geojson = [_as_geojson(p) for p in polygons_geojson]
+        if not polygons_geojson:
+            return []
+
+        ee = earthengine()
+        features = ee.FeatureCollection([
+            ee.Feature(ee.Geometry.Polygon(polygon['coordinates']), {'idx': idx})
+            for idx, polygon in enumerate(polygons_geojson)
+        ])
+        reduced = soilgrids_image().reduceRegions(
+            collection=features,
+            reducer=ee.Reducer.mean(),
+            scale=SOILGRIDS_SCALE
+        )
+        # Geometries are not needed back, only the reduced band means
+        acquire(self.name)
+        info = reduced.select(['idx'] + list(SOILGRIDS_LAYERS), None, False).getInfo()
+
+        results = [{key: None for key in SOILGRIDS_LAYERS} for _ in polygons_geojson]
+        for feature in info.get('features', []):
+            props = feature.get('properties', {})
+            results[int(props['idx'])] = conventional_units({key: props.get(key) for key in SOILGRIDS_LAYERS})
+        return results
+
+    def health_check(self):
+        ee = earthengine()
+        ee.Number(1).getInfo()
+        return f"initialized (project {getattr(settings, 'EARTHENGINE_PROJECT', 'ecosystemplus')})"
+
+
+@register_provider('local_tiles')
+class LocalTilesProvider(SoilGridsProvider):
+    """
+    SoilGrids means from the local tile store built by
+    `manage.py build_soil_tiles`: no network, a few milliseconds per polygon.
+    """
+    cache_source = 'soilgrids_local'
+
+    def fetch_stats(self, polygon_geojson):
+        stats = get_tile_store().zonal_means(_as_geojson(polygon_geojson), list(SOILGRIDS_LAYERS))
+        return conventional_units(stats)
+
+    def health_check(self):
+        store = get_tile_store()
+        manifest = store.manifest()
+        if not manifest.get('regions'):
+            raise RuntimeError(f"No tiles in {store.root}; run `manage.py build_soil_tiles`")
+        return f"regions {', '.join(manifest['regions'])} in {store.root}, updated {manifest.get('updated_at')}"
+
+
+@register_provider('synthetic')
+class SyntheticProvider(SoilGridsProvider):
+    """
+    Offline stand-in with plausible SoilGrids-like values that vary smoothly
+    with the polygon's centroid. Neighbouring fields get similar soils, and a
+    polygon always gets the same values. SOIL_SYNTHETIC_LATENCY simulates a
+    remote backend for load tests: 'CALL' seconds per request plus 'POLYGON'
+    seconds per polygon.
+    """
+
+    def __init__(self):
+        latency = getattr(settings, 'SOIL_SYNTHETIC_LATENCY', {})
+        self.call_latency = latency.get('CALL', 0)
+        self.polygon_latency = latency.get('POLYGON', 0)
+
+    @staticmethod
+    def _wave(lon, lat, fx, fy, phase):
+        # Smooth 0..1 field over lon/lat
+        return (math.sin(lon * fx + phase) * math.cos(lat * fy + phase) + 1) / 2
+
+    def values_at(self, lon, lat):
+        sand = 20 + 50 * self._wave(lon, lat, 1.7, 2.3, 0.0)
+        clay = min(10 + 30 * self._wave(lon, lat, 2.9, 1.3, 1.0), 95 - sand)
+        return {
+            'sand': round(sand, 2),
+            'silt': round(100 - sand - clay, 2),
+            'clay': round(clay, 2),
+            'ph': round(4.5 + 3.5 * self._wave(lon, lat, 0.8, 1.9, 2.0), 2),
+            # g/kg, like the SoilGrids providers after conventional_units()
+            'organic_carbon': round(5 + 55 * self._wave(lon, lat, 3.1, 2.7, 3.0), 2),
+        }
+
+    def _stats(self, polygon_geojson):
+        ring = _as_geojson(polygon_geojson)['coordinates'][0][:-1]
+        lon = sum(point[0] for point in ring) / len(ring)
+        lat = sum(point[1] for point in ring) / len(ring)
+        return self.values_at(lon, lat)
+
+    def fetch_stats(self, polygon_geojson):
+        if self.call_latency or self.polygon_latency:
+            time.sleep(self.call_latency + self.polygon_latency)
+        return self._stats(polygon_geojson)
+
+    def fetch_stats_batch(self, polygons_geojson):
+        if self.call_latency or self.polygon_latency:
+            time.sleep(self.call_latency + self.polygon_latency * len(polygons_geojson))
+        return [self._stats(p) for p in polygons_geojson]
+
+    def health_check(self):
+        return f"ok (latency {self.call_latency}s/call + {self.polygon_latency}s/polygon)"
+
+
+@register_provider('fake')
+class FakeProvider(SyntheticProvider):
+    """SyntheticProvider without simulated latency, for tests and local development."""
+
+    def __init__(self):
+        self.call_latency = self.polygon_latency = 0
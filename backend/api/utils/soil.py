@@ -1,64 +1,321 @@
-import ee
-import requests
+import json
+import time
+from datetime import timedelta
+
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.metrics import SOIL_ANALYSIS_LATENCY, timed
+from base.models import FieldBoundary, Job
+from base.stats import STATS_COLUMNS, apply_field_updates
+from . import soil_cache
+from .fanout import ProviderUnavailable, fan_out, get_session, guarded, provider_timeout
+from .jobs import enqueue, job_handler, report_progress
+from .providers import _as_geojson, get_provider
+from .soil_classification import classify_soils, normalize_ph
+from .soil_history import record_soil_history
+
+# Unique geometries per analyze_soil_batch call in bulk reanalysis
+REANALYSIS_BATCH_SIZE = 200
+
+
+def fetch_moisture(polygon_geojson):
+    """
+    Get moisture via FAO API (example endpoint). HTTP errors raise, so they
+    count against the provider's circuit breaker and are never cached.
+    """
+    url = getattr(settings, 'SOIL_MOISTURE_API_URL', None)
+    if not url:
+        return None
+    polygon_geojson = _as_geojson(polygon_geojson)
+    resp = get_session().get(
+        url,
+        params={'geojson': json.dumps(polygon_geojson)},
+        timeout=provider_timeout('moisture'),
+    )
+    resp.raise_for_status()
+    return resp.json().get('moisture')
+
+
+def texture_percentages(stats):
+    """(sand, silt, clay) as percentages summing to 100 from raw SoilGrids means, or None."""
+    sand, silt, clay = (stats or {}).get('sand'), (stats or {}).get('silt'), (stats or {}).get('clay')
+    if None in (sand, silt, clay) or not sand + silt + clay:
+        return None
+    total = sand + silt + clay
+    return tuple(round(100 * value / total, 1) for value in (sand, silt, clay))
+
+
+def texture_description(stats):
+    """'40% sand, 40% silt, 20% clay' from raw SoilGrids means, or None."""
+    percentages = texture_percentages(stats)
+    if percentages is None:
+        return None
+    sand, silt, clay = (round(value) for value in percentages)
+    return f"{sand}% sand, {silt}% silt, {clay}% clay"
+
+
+def summarize_soils(stats_list, moistures):
+    """
+    Turn raw SoilGrids means (from a provider; None when it failed) and
+    moisture into FieldBoundary soil attributes for many fields at once. USDA
+    texture classes and crop suitability are computed in one vectorized pass
+    (see soil_classification).
+    """
+    classified = classify_soils(stats_list, moistures)
+    summaries = []
+    for stats, moisture, result in zip(stats_list, moistures, classified):
+        stats = stats or {}
+        ph, oc = stats.get('ph'), stats.get('organic_carbon')
+        sand, silt, clay = texture_percentages(stats) or (None, None, None)
+        summaries.append({
+            "soil_type": result['soil_type'],
+            "soil_texture": texture_description(stats),
+            "sand_pct": sand,
+            "silt_pct": silt,
+            "clay_pct": clay,
+            "soil_ph": round(float(normalize_ph(ph)), 2) if ph else None,
+            "organic_carbon": round(float(oc), 2) if oc else None,
+            "moisture": moisture,
+            "recommended_crops": result['recommended_crops'],
+        })
+    return summaries
 
-# Initialize once
-ee.Initialize(project='ecosystemplus')
 
-def analyze_soil(polygon_geojson):
+def summarize_soil(stats, moisture):
+    return summarize_soils([stats], [moisture])[0]
+
+
+def _stats_lookup(polygon_or_polygons, refresh, batch=False):
+    """
+    Zero-argument callable fetching SoilGrids stats from the configured
+    provider, through the soil cache unless the provider opts out.
+    """
+    provider = get_provider()
+    fetch = guarded('soilgrids', provider.fetch_stats_batch if batch else provider.fetch_stats)
+    if provider.cache_source is None:
+        return lambda: fetch(polygon_or_polygons)
+    lookup = soil_cache.cached_many if batch else soil_cache.cached
+    return lambda: lookup(provider.cache_source, polygon_or_polygons, fetch, refresh=refresh)
+
+
+def _partial(soil_data, errors):
+    # Providers that failed; apply_soil_data keeps the field's previous values for them
+    soil_data['unavailable'] = sorted({name for name, _ in errors})
+    return soil_data
+
+
+def analyze_soil(polygon_geojson, refresh=False):
     """
     Clip FAO SoilGrids and Earth Engine datasets to the polygon,
     return summarized soil attributes and crop recommendations.
+    Raw data is cached per normalized geometry; pass refresh=True to bypass
+    cached entries (fresh results are still written back).
+
+    Providers are queried concurrently, each with its own timeout and circuit
+    breaker. If one fails, the result is built from the others and lists it
+    under 'unavailable'; ProviderUnavailable is raised only if all fail.
     """
+    polygon_geojson = _as_geojson(polygon_geojson)
+    with timed(SOIL_ANALYSIS_LATENCY, 'single'):
+        results, errors = fan_out({
+            ('soilgrids', 0): ('soilgrids', _stats_lookup(polygon_geojson, refresh)),
+            ('moisture', 0): ('moisture', lambda: soil_cache.cached(
+                'moisture', polygon_geojson, guarded('moisture', fetch_moisture), refresh=refresh)),
+        })
+    if not results:
+        raise ProviderUnavailable(f"All soil providers failed: {errors}")
+    soil_data = summarize_soil(results.get(('soilgrids', 0)), results.get(('moisture', 0)))
+    return _partial(soil_data, errors)
 
-    # 1. Parse boundary
-    geom = ee.Geometry.Polygon(polygon_geojson['coordinates'])
 
-    # 2. SoilGrids layers via Earth Engine
-    layers = {
-        'sand': 'projects/soilgrids-isric/sand_mean',
-        'silt': 'projects/soilgrids-isric/silt_mean',
-        'clay': 'projects/soilgrids-isric/clay_mean',
-        'ph': 'projects/soilgrids-isric/phh2o_mean',
-        'organic_carbon': 'projects/soilgrids-isric/orc_mean'
+def analyze_soil_batch(polygons_geojson, refresh=False):
+    """
+    analyze_soil for many polygons: SoilGrids stats for every uncached polygon
+    come from one reduceRegions call, running alongside the per-polygon
+    moisture requests. Returns results in input order.
+    """
+    polygons_geojson = [_as_geojson(p) for p in polygons_geojson]
+    if not polygons_geojson:
+        return []
+    fetch_moisture_guarded = guarded('moisture', fetch_moisture)
+    calls = {
+        ('soilgrids', 0): ('soilgrids', _stats_lookup(polygons_geojson, refresh, batch=True)),
     }
+    for idx, polygon in enumerate(polygons_geojson):
+        calls[('moisture', idx)] = ('moisture', lambda polygon=polygon: soil_cache.cached(
+            'moisture', polygon, fetch_moisture_guarded, refresh=refresh))
+    with timed(SOIL_ANALYSIS_LATENCY, 'batch'):
+        results, errors = fan_out(calls)
+    if not results:
+        raise ProviderUnavailable(f"All soil providers failed: {errors}")
 
-    stats = {}
-    for key, asset in layers.items():
-        img = ee.ImageCollection(asset).first()
-        mean = img.reduceRegion(
-            reducer=ee.Reducer.mean(),
-            geometry=geom,
-            scale=250
-        ).get(info=key)
-        stats[key] = mean.getInfo()
-
-    # 3. Derive texture
-    sand, silt, clay = stats['sand'], stats['silt'], stats['clay']
-    soil_texture = f"{round(sand)}% sand, {round(silt)}% silt, {round(clay)}% clay"
-
-    # 4. Get moisture via FAO API (example endpoint)
-    resp = requests.get(
-        settings.SOI_MOISTURE_API_URL,
-        params={'geojson': polygon_geojson}
-    )
-    moisture = resp.json().get('moisture') if resp.status_code == 200 else None
-
-    # 5. Recommend crops (example rules)
-    recs = []
-    ph = stats['ph']
-    oc = stats['organic_carbon']
-    if ph and 5.5 <= ph <= 7.0:
-        recs += ['Maize', 'Groundnut']
-    if oc and oc > 5:
-        recs += ['Vegetables']
-    soil_type = 'Loam'  # Simplified example
-    
-    return {
-        "soil_type": soil_type,
-        "soil_texture": soil_texture,
-        "soil_ph": round(ph, 2) if ph else None,
-        "organic_carbon": round(oc, 2) if oc else None,
-        "moisture": moisture,
-        "recommended_crops": ", ".join(recs)
+    stats_list = results.get(('soilgrids', 0)) or [None] * len(polygons_geojson)
+    moistures = [results.get(('moisture', idx)) for idx in range(len(polygons_geojson))]
+    return [
+        _partial(soil_data, [key for key in errors if key[0] == 'soilgrids' or key == ('moisture', idx)])
+        for idx, soil_data in enumerate(summarize_soils(stats_list, moistures))
+    ]
+
+
+def soil_updates(soil_data):
+    """
+    Column values an analyze_soil result changes, leaving gaps from failed
+    providers alone. Only complete results mark the field as freshly analyzed.
+    """
+    columns = {f.attname for f in FieldBoundary._meta.concrete_fields}
+    partial = bool(soil_data.get('unavailable'))
+    updates = {
+        key: value for key, value in soil_data.items()
+        if key in columns and not (partial and value is None)
     }
+    now = timezone.now()
+    if not partial:
+        updates['soil_analyzed_at'] = now
+    if updates:
+        # bulk_update does not apply auto_now
+        updates['updated_at'] = now
+    return updates
+
+
+def apply_soil_data(field, soil_data):
+    """
+    Copy an analyze_soil result onto the field, save just those columns and
+    append it to the field's soil history.
+    """
+    updates = soil_updates(soil_data)
+    for key, value in updates.items():
+        setattr(field, key, value)
+    if updates:
+        field.save(update_fields=list(updates))
+    record_soil_history([([field.pk], soil_data)])
+
+
+def save_soil_results(results):
+    """
+    Write analyze_soil results for many fields: `results` is an iterable of
+    (field pks, soil_data), so fields sharing a geometry share one result.
+    Rows are written with bulk_update, one batch per set of changed columns,
+    and every result is appended to the soil history.
+    """
+    results = list(results)
+    groups, changes = {}, {}
+    for pks, soil_data in results:
+        updates = soil_updates(soil_data)
+        if not updates:
+            continue
+        rows = groups.setdefault(tuple(sorted(updates)), [])
+        rows.extend(FieldBoundary(pk=pk, **updates) for pk in pks)
+        changes.update((pk, updates) for pk in pks)
+    with transaction.atomic():
+        # bulk_update skips post_save; move the community aggregates by the same change
+        before = {
+            pk: values for pk, *values in
+            FieldBoundary.objects.select_for_update(of=('self',)).filter(pk__in=list(changes))
+            .values_list('pk', 'farm__community_id', *STATS_COLUMNS)
+        }
+        for columns, rows in groups.items():
+            FieldBoundary.objects.bulk_update(rows, list(columns), batch_size=500)
+        apply_field_updates(before, changes)
+    record_soil_history(results)
+
+
+def reanalyze_fields(fields, batch_size=REANALYSIS_BATCH_SIZE, fresh_after=None, on_progress=None):
+    """
+    Refresh the soil data of every field in the `fields` queryset.
+
+    Fields analyzed after `fresh_after` are skipped. Fields with identical
+    geometries (same normalized hash) are analyzed once. Unique geometries go
+    to analyze_soil_batch `batch_size` at a time, i.e. one provider request
+    per batch, paced by the provider's rate limit. `on_progress` receives the
+    running stats after each batch. Returns the final stats.
+    """
+    started = time.monotonic()
+    total = fields.count()
+    if fresh_after is not None:
+        fields = fields.filter(Q(soil_analyzed_at__isnull=True) | Q(soil_analyzed_at__lt=fresh_after))
+
+    groups = {}
+    for pk, boundary in fields.values_list('pk', 'boundary').iterator(chunk_size=2000):
+        geojson = json.loads(boundary.geojson)
+        groups.setdefault(soil_cache.geometry_hash(geojson), (geojson, []))[1].append(pk)
+    unique = list(groups.values())
+    queued = sum(len(pks) for _, pks in unique)
+
+    stats = {
+        'fields': total,
+        'skipped_fresh': total - queued,
+        'unique_geometries': len(unique),
+        'analyzed': 0,
+        'partial': 0,
+    }
+    for i in range(0, len(unique), batch_size):
+        chunk = unique[i:i + batch_size]
+        results = analyze_soil_batch([geojson for geojson, _ in chunk])
+        save_soil_results((pks, soil_data) for (_, pks), soil_data in zip(chunk, results))
+
+        stats['analyzed'] += sum(len(pks) for _, pks in chunk)
+        stats['partial'] += sum(len(pks) for (_, pks), data in zip(chunk, results) if data.get('unavailable'))
+        elapsed = time.monotonic() - started
+        rate = stats['analyzed'] / elapsed if elapsed else None
+        stats['fields_per_second'] = round(rate, 1) if rate else None
+        stats['eta_seconds'] = round((queued - stats['analyzed']) / rate) if rate else None
+        if on_progress is not None:
+            on_progress(dict(stats))
+    stats['seconds'] = round(time.monotonic() - started, 2)
+    return stats
+
+
+def enqueue_soil_analysis(field, owner=None):
+    """Queue a background analysis of the field's boundary; returns the Job."""
+    return enqueue('soil_analysis', {'field': str(field.pk)}, owner=owner)
+
+
+@job_handler('soil_analysis')
+def run_soil_analysis_job(job):
+    field = FieldBoundary.objects.get(pk=job.payload['field'])
+    soil_data = analyze_soil(field.boundary.geojson)
+    apply_soil_data(field, soil_data)
+    return soil_data
+
+
+def enqueue_soil_analysis_batch(field_pks, owner=None):
+    """Queue one background analysis covering many fields; returns the Job."""
+    return enqueue('soil_analysis_batch', {'fields': [str(pk) for pk in field_pks]}, owner=owner)
+
+
+@job_handler('soil_analysis_batch')
+def run_soil_analysis_batch_job(job):
+    return reanalyze_fields(FieldBoundary.objects.filter(pk__in=job.payload['fields']))
+
+
+def enqueue_community_reanalysis(community, owner=None, max_age_days=None, force=False):
+    """
+    Queue a refresh of every field in the community, or return the refresh
+    already pending or running for it. Returns (job, created).
+    """
+    existing = Job.objects.filter(
+        kind='community_reanalysis', status__in=('pending', 'running'), payload__community=str(community.pk)
+    ).first()
+    if existing is not None:
+        return existing, False
+    if max_age_days is None:
+        max_age_days = getattr(settings, 'SOIL_REANALYSIS_MAX_AGE_DAYS', 30)
+    return enqueue('community_reanalysis', {
+        'community': str(community.pk),
+        'max_age_days': None if force else max_age_days,
+    }, owner=owner), True
+
+
+@job_handler('community_reanalysis')
+def run_community_reanalysis_job(job):
+    # Retries resume where the failed attempt stopped: refreshed fields are fresh now
+    max_age_days = job.payload.get('max_age_days')
+    fresh_after = job.created_at - timedelta(days=max_age_days) if max_age_days is not None else job.created_at
+    return reanalyze_fields(
+        FieldBoundary.objects.filter(farm__community_id=job.payload['community']),
+        fresh_after=fresh_after,
+        on_progress=lambda stats: report_progress(job, **stats),
+    )
@@ -0,0 +1,273 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from api.metrics import count_cache
+from base.models import SoilAnalysisCacheEntry
+
+# Defaults, overridable per key through settings.SOIL_CACHE
+DEFAULTS = {
+    'BACKEND': 'api.utils.soil_cache.LRUCacheBackend',
+    'OPTIONS': {},
+    # Coordinates are snapped to this many decimals (~1 m) before hashing
+    'SNAP_PRECISION': 5,
+    # Bump a version to invalidate everything cached for that data source
+    'DATASET_VERSIONS': {'soilgrids': 'soilgrids-2.0-gkg', 'soilgrids_local': 'soilgrids-2.0-gkg', 'moisture': '1'},
+    # Seconds; SoilGrids is static, moisture changes daily
+    'TTL': {'soilgrids': 90 * 24 * 3600, 'soilgrids_local': 90 * 24 * 3600, 'moisture': 6 * 3600},
+}
+
+
+def cache_setting(name):
+    return getattr(settings, 'SOIL_CACHE', {}).get(name, DEFAULTS[name])
+
+
+# -------------------- GEOMETRY KEYS -------------------- #
+
+def _signed_area(ring):
+    return sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1])) / 2
+
+
+def _normalize_ring(ring, precision, clockwise):
+    """
+    Snap a ring's coordinates, drop repeated/closing points, orient it and
+    rotate it to start at its smallest vertex, so equivalent rings compare equal.
+    """
+    snapped = []
+    for coord in ring:
+        point = (round(coord[0], precision), round(coord[1], precision))
+        if not snapped or point != snapped[-1]:
+            snapped.append(point)
+    if len(snapped) > 1 and snapped[0] == snapped[-1]:
+        snapped.pop()
+    if (_signed_area(snapped) < 0) != clockwise:
+        snapped.reverse()
+    if snapped:
+        start = snapped.index(min(snapped))
+        snapped = snapped[start:] + snapped[:start]
+        snapped.append(snapped[0])
+    return snapped
+
+
+def _normalize_polygon(rings, precision):
+    # RFC 7946: exterior ring counter-clockwise, holes clockwise
+    exterior = _normalize_ring(rings[0], precision, clockwise=False)
+    holes = sorted(_normalize_ring(ring, precision, clockwise=True) for ring in rings[1:])
+    return [exterior] + holes
+
+
+def normalize_geometry(geojson, precision=None):
+    """Canonical (type, coordinates) for a Polygon or MultiPolygon GeoJSON dict."""
+    if precision is None:
+        precision = cache_setting('SNAP_PRECISION')
+    if geojson['type'] == 'MultiPolygon':
+        coordinates = sorted(_normalize_polygon(p, precision) for p in geojson['coordinates'])
+    else:
+        coordinates = _normalize_polygon(geojson['coordinates'], precision)
+    return {'type': geojson['type'], 'coordinates': coordinates}
+
+
+def geometry_hash(geojson):
+    """Stable hash of a polygon, insensitive to ring orientation, start vertex and sub-metre noise."""
+    canonical = json.dumps(normalize_geometry(geojson), separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def cache_key(source, geojson):
+    version = cache_setting('DATASET_VERSIONS').get(source, '')
+    return f"soil:{source}:{version}:{geometry_hash(geojson)}"
+
+
+# -------------------- BACKENDS -------------------- #
+
+class LRUCacheBackend:
+    """Per-process LRU with TTL. Fast, but not shared between workers."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DjangoCacheBackend:
+    """Stores entries in one of settings.CACHES (e.g. a shared Redis/Memcached)."""
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, ttl):
+        self.cache.set(key, value, timeout=ttl)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class DatabaseCacheBackend:
+    """
+    Stores entries in the SoilAnalysisCacheEntry table, so they survive
+    restarts and are shared by every worker. Expired rows are culled every
+    `cull_every` writes.
+    """
+
+    def __init__(self, cull_every=500):
+        self.cull_every = cull_every
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return (
+            SoilAnalysisCacheEntry.objects
+            .filter(key=key, expires_at__gt=timezone.now())
+            .values_list('value', flat=True)
+            .first()
+        )
+
+    def set(self, key, value, ttl):
+        SoilAnalysisCacheEntry.objects.update_or_create(
+            key=key,
+            defaults={
+                'source': key.split(':')[1],
+                'value': value,
+                'expires_at': timezone.now() + timedelta(seconds=ttl),
+            },
+        )
+        with self._lock:
+            self._writes += 1
+            cull = self._writes % self.cull_every == 0
+        if cull:
+            self.cull()
+
+    def delete(self, key):
+        SoilAnalysisCacheEntry.objects.filter(key=key).delete()
+
+    def cull(self):
+        return SoilAnalysisCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()[0]
+
+    def clear(self):
+        SoilAnalysisCacheEntry.objects.all().delete()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = import_string(cache_setting('BACKEND'))(**cache_setting('OPTIONS'))
+        return _backend
+
+
+# -------------------- COUNTERS -------------------- #
+
+_counters = {}
+_counters_lock = threading.Lock()
+
+
+def _count(source, outcome, n=1):
+    with _counters_lock:
+        counts = _counters.setdefault(source, {'hits': 0, 'misses': 0})
+        counts[outcome] += n
+    count_cache(f'soil_{source}', **{outcome: n})
+
+
+def cache_stats():
+    """Hit/miss counters per data source since process start."""
+    with _counters_lock:
+        stats = {}
+        for source, counts in _counters.items():
+            total = counts['hits'] + counts['misses']
+            stats[source] = {**counts, 'hit_ratio': counts['hits'] / total if total else None}
+        return stats
+
+
+# -------------------- LOOKUPS -------------------- #
+
+def cached(source, geojson, fetch, refresh=False):
+    """
+    Return fetch(geojson) for the data source, served from the cache when a
+    fresh entry exists for the same normalized geometry. None is never cached.
+    """
+    key = cache_key(source, geojson)
+    backend = get_backend()
+    if not refresh:
+        value = backend.get(key)
+        if value is not None:
+            _count(source, 'hits')
+            return value
+    _count(source, 'misses')
+    value = fetch(geojson)
+    if value is not None:
+        backend.set(key, value, cache_setting('TTL')[source])
+    return value
+
+
+def cached_many(source, geojsons, fetch_many, refresh=False):
+    """
+    Batch version of cached(): only the misses are passed (once) to
+    fetch_many, which must return results in input order.
+    """
+    backend = get_backend()
+    keys = [cache_key(source, g) for g in geojsons]
+    values = [None if refresh else backend.get(k) for k in keys]
+    missing = [i for i, value in enumerate(values) if value is None]
+    _count(source, 'hits', len(keys) - len(missing))
+    _count(source, 'misses', len(missing))
+    if missing:
+        ttl = cache_setting('TTL')[source]
+        fetched = fetch_many([geojsons[i] for i in missing])
+        for i, value in zip(missing, fetched):
+            values[i] = value
+            if value is not None:
+                backend.set(keys[i], value, ttl)
+    return values
+
+
+def is_cached(source, geojson):
+    return get_backend().get(cache_key(source, geojson)) is not None
@@ -0,0 +1,194 @@
+import numpy as np
+
+# USDA soil texture classes, in the order classify_texture() tests them
+TEXTURE_CLASSES = [
+    'Sand', 'Loamy sand', 'Sandy loam', 'Loam', 'Silt loam', 'Silt',
+    'Sandy clay loam', 'Clay loam', 'Silty clay loam', 'Sandy clay', 'Silty clay', 'Clay',
+]
+
+INF = np.inf
+
+# Crop suitability matrix. Ranges are (min, optimum low, optimum high, max):
+# a factor is 1 inside the optimum, falls linearly to 0 at min/max and is 0
+# outside. Texture classes score 1 when preferred, 0.5 when tolerated, else 0.
+# Organic carbon is in g/kg (see providers.conventional_units), moisture in the
+# units of the moisture API.
+CROPS = {
+    'Maize': {
+        'ph': (5.0, 5.5, 7.0, 8.0),
+        'preferred': {'Loam', 'Silt loam', 'Sandy loam', 'Clay loam', 'Silty clay loam'},
+        'tolerated': {'Sandy clay loam', 'Loamy sand', 'Silty clay', 'Clay'},
+    },
+    'Groundnut': {
+        'ph': (5.0, 5.5, 6.5, 7.5),
+        'preferred': {'Sandy loam', 'Loamy sand', 'Loam'},
+        'tolerated': {'Sand', 'Sandy clay loam', 'Silt loam'},
+    },
+    'Cassava': {
+        'ph': (4.5, 5.5, 6.5, 7.5),
+        'preferred': {'Sandy loam', 'Loamy sand', 'Loam'},
+        'tolerated': {'Sand', 'Sandy clay loam', 'Clay loam', 'Silt loam'},
+    },
+    'Sorghum': {
+        'ph': (5.0, 5.5, 7.5, 8.5),
+        'preferred': {'Loam', 'Clay loam', 'Sandy clay loam', 'Silty clay loam'},
+        'tolerated': {'Sandy loam', 'Silt loam', 'Clay', 'Sandy clay'},
+    },
+    'Rice': {
+        'ph': (4.5, 5.5, 6.5, 7.5),
+        'moisture': (15, 25, INF, INF),
+        'preferred': {'Clay', 'Silty clay', 'Clay loam', 'Silty clay loam'},
+        'tolerated': {'Loam', 'Silt loam', 'Sandy clay'},
+    },
+    'Beans': {
+        'ph': (5.5, 6.0, 7.0, 7.5),
+        'preferred': {'Loam', 'Silt loam', 'Sandy loam'},
+        'tolerated': {'Clay loam', 'Sandy clay loam', 'Silty clay loam'},
+    },
+    'Cocoa': {
+        'ph': (4.5, 5.5, 7.0, 8.0),
+        'organic_carbon': (20, 50, INF, INF),
+        'preferred': {'Loam', 'Clay loam', 'Sandy clay loam'},
+        'tolerated': {'Silty clay loam', 'Sandy loam', 'Silt loam'},
+    },
+    'Coffee': {
+        'ph': (4.5, 5.0, 6.0, 7.0),
+        'organic_carbon': (20, 50, INF, INF),
+        'preferred': {'Loam', 'Clay loam', 'Sandy clay loam'},
+        'tolerated': {'Silt loam', 'Sandy loam', 'Silty clay loam'},
+    },
+    'Plantain': {
+        'ph': (4.5, 5.5, 7.0, 8.0),
+        'preferred': {'Loam', 'Silt loam', 'Clay loam'},
+        'tolerated': {'Sandy loam', 'Silty clay loam', 'Sandy clay loam'},
+    },
+    'Vegetables': {
+        'ph': (5.5, 6.0, 7.0, 7.5),
+        'organic_carbon': (30, 50, INF, INF),
+        'preferred': {'Loam', 'Sandy loam', 'Silt loam'},
+        'tolerated': {'Clay loam', 'Loamy sand', 'Silty clay loam'},
+    },
+}
+RANGE_FACTORS = ('ph', 'organic_carbon', 'moisture')
+OPEN_RANGE = (-INF, -INF, INF, INF)
+# Minimum score for a crop to be recommended, and how many to list at most
+SUITABILITY_THRESHOLD = 0.5
+MAX_RECOMMENDATIONS = 5
+
+CROP_NAMES = list(CROPS)
+# (factor, crop, 4) range bounds
+_RANGES = np.array([
+    [CROPS[crop].get(factor, OPEN_RANGE) for crop in CROP_NAMES]
+    for factor in RANGE_FACTORS
+], dtype=np.float64)
+# (crop, texture class + 1) texture scores; the extra last column (unknown class) is neutral
+_TEXTURE_SCORES = np.array([
+    [1.0 if name in CROPS[crop]['preferred'] else 0.5 if name in CROPS[crop]['tolerated'] else 0.0
+     for name in TEXTURE_CLASSES] + [1.0]
+    for crop in CROP_NAMES
+])
+
+
+def _column(stats_list, key):
+    return np.array([
+        np.nan if not stats or stats.get(key) is None else stats[key] for stats in stats_list
+    ], dtype=np.float64)
+
+
+def classify_texture(sand, silt, clay):
+    """
+    USDA texture class index (into TEXTURE_CLASSES) for arrays of sand, silt
+    and clay, or -1 where a value is missing. Fractions are rescaled to sum to
+    100, so percentages and SoilGrids g/kg both work.
+    """
+    sand, silt, clay = (np.asarray(a, dtype=np.float64) for a in (sand, silt, clay))
+    total = sand + silt + clay
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sand, silt, clay = (100 * a / total for a in (sand, silt, clay))
+    conditions = [
+        silt + 1.5 * clay < 15,
+        silt + 2 * clay < 30,
+        ((clay >= 7) & (clay < 20) & (sand > 52)) | ((clay < 7) & (silt < 50)),
+        (clay >= 7) & (clay < 27) & (silt >= 28) & (silt < 50) & (sand <= 52),
+        ((silt >= 50) & (clay >= 12) & (clay < 27)) | ((silt >= 50) & (silt < 80) & (clay < 12)),
+        (silt >= 80) & (clay < 12),
+        (clay >= 20) & (clay < 35) & (silt < 28) & (sand > 45),
+        (clay >= 27) & (clay < 40) & (sand > 20) & (sand <= 45),
+        (clay >= 27) & (clay < 40) & (sand <= 20),
+        (clay >= 35) & (sand > 45),
+        (clay >= 40) & (silt >= 40),
+        clay >= 40,
+    ]
+    classes = np.select(conditions, np.arange(len(TEXTURE_CLASSES)), default=-1)
+    classes[~np.isfinite(total) | (total <= 0)] = -1
+    return classes
+
+
+def _range_factor(values, ranges):
+    """(crop, field) scores of `values` (field,) against trapezoid `ranges` (crop, 4); NaN is neutral."""
+    values = values[np.newaxis, :]
+    lo, opt_lo, opt_hi, hi = (ranges[:, i, np.newaxis] for i in range(4))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rising = np.where(values >= opt_lo, 1.0, (values - lo) / (opt_lo - lo))
+        falling = np.where(values <= opt_hi, 1.0, (hi - values) / (hi - opt_hi))
+    score = np.clip(np.minimum(rising, falling), 0, 1)
+    return np.where(np.isnan(values), 1.0, score)
+
+
+def crop_suitability(ph, organic_carbon, moisture, texture_classes):
+    """
+    Suitability in [0, 1] of every crop for every field: the product of the
+    pH, organic carbon, moisture and texture factors. Arguments are arrays
+    with one entry per field (NaN / -1 when unknown). Returns (crops, fields).
+    """
+    scores = _TEXTURE_SCORES[:, np.asarray(texture_classes)]
+    for ranges, values in zip(_RANGES, (ph, organic_carbon, moisture)):
+        scores = scores * _range_factor(np.asarray(values, dtype=np.float64), ranges)
+    return scores
+
+
+def recommend(scores, threshold=SUITABILITY_THRESHOLD, limit=MAX_RECOMMENDATIONS):
+    """Crop names per field from crop_suitability scores, best first."""
+    order = np.argsort(-scores, axis=0, kind='stable')[:limit]
+    return [
+        [CROP_NAMES[c] for c in order[:, field] if scores[c, field] >= threshold]
+        for field in range(scores.shape[1])
+    ]
+
+
+def normalize_ph(ph):
+    # SoilGrids stores pH x 10; values above 14 cannot be plain pH
+    ph = np.asarray(ph, dtype=np.float64)
+    return np.where(ph > 14, ph / 10, ph)
+
+
+def classify_soils(stats_list, moistures=None):
+    """
+    Texture class and crop recommendations for many fields in one vectorized
+    pass. `stats_list` holds provider stats dicts (or None), `moistures` the
+    matching moisture values. Returns one dict per field with 'soil_type'
+    (USDA class or None) and 'recommended_crops' (list, or None when neither
+    texture, pH nor organic carbon is known: unknown factors score neutral,
+    so such fields would otherwise get every crop).
+    """
+    if not stats_list:
+        return []
+    moistures = moistures if moistures is not None else [None] * len(stats_list)
+    classes = classify_texture(*(_column(stats_list, key) for key in ('sand', 'silt', 'clay')))
+    ph = normalize_ph(_column(stats_list, 'ph'))
+    organic_carbon = _column(stats_list, 'organic_carbon')
+    scores = crop_suitability(
+        ph,
+        organic_carbon,
+        np.array([np.nan if m is None else m for m in moistures], dtype=np.float64),
+        classes,
+    )
+    recommendations = recommend(scores)
+    known = (classes >= 0) | np.isfinite(ph) | np.isfinite(organic_carbon)
+    return [
+        {
+            'soil_type': TEXTURE_CLASSES[c] if c >= 0 else None,
+            'recommended_crops': crops if has_data else None,
+        }
+        for c, crops, has_data in zip(classes.tolist(), recommendations, known.tolist())
+    ]
@@ -0,0 +1,165 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from base.models import SoilHistory
+
+# analyze_soil result keys kept in the history, one array column each
+HISTORY_METRICS = ('moisture', 'soil_ph', 'organic_carbon', 'sand_pct', 'silt_pct', 'clay_pct')
+# ?resolution= values and the date_trunc unit each aggregates to (None: every sample)
+RESOLUTIONS = {'raw': None, 'day': 'day', 'week': 'week', 'month': 'month'}
+RECORD_BATCH_SIZE = 1000
+COMPACTION_BATCH_SIZE = 1000
+SECONDS_PER_DAY = 86400
+
+
+def _table():
+    return connection.ops.quote_name(SoilHistory._meta.db_table)
+
+
+def month_start(moment):
+    return moment.astimezone(dt_timezone.utc).date().replace(day=1)
+
+
+def _month_datetime(month):
+    return datetime.combine(month, time.min, tzinfo=dt_timezone.utc)
+
+
+def record_soil_history(results, at=None):
+    """
+    Append one sample per field to its current month's history row, for an
+    iterable of (field pks, soil_data) like save_soil_results takes. All
+    fields are written with INSERT ... ON CONFLICT statements of up to
+    RECORD_BATCH_SIZE rows.
+    """
+    at = at or timezone.now()
+    month = month_start(at)
+    offset = int((at - _month_datetime(month)).total_seconds())
+    samples = {}
+    for pks, soil_data in results:
+        values = [soil_data.get(metric) for metric in HISTORY_METRICS]
+        if all(value is None for value in values):
+            continue
+        for pk in pks:
+            samples[pk] = values
+    if not samples:
+        return 0
+
+    columns = ', '.join(HISTORY_METRICS)
+    row = '(%s, %s, ARRAY[%s]::integer[], ' + ', '.join(['ARRAY[%s]::double precision[]'] * len(HISTORY_METRICS)) + ', false)'
+    appends = ', '.join(f"{column} = h.{column} || EXCLUDED.{column}" for column in ('offsets', *HISTORY_METRICS))
+    items = list(samples.items())
+    with connection.cursor() as cursor:
+        for i in range(0, len(items), RECORD_BATCH_SIZE):
+            chunk = items[i:i + RECORD_BATCH_SIZE]
+            cursor.execute(
+                f"INSERT INTO {_table()} AS h (field_id, month, offsets, {columns}, compacted) "
+                f"VALUES {', '.join([row] * len(chunk))} "
+                f"ON CONFLICT (field_id, month) DO UPDATE SET {appends}",
+                [p for pk, values in chunk for p in (pk, month, offset, *values)],
+            )
+    return len(items)
+
+
+def field_history(field, start, end, resolution='day'):
+    """
+    Samples of `field` taken in [start, end), averaged per `resolution`
+    bucket in SQL. Returns a list of {'time', 'samples', <metric>: mean}.
+    Compacted months hold daily means, so coarser buckets average those.
+    """
+    unit = RESOLUTIONS[resolution]
+    taken = "(h.month::timestamp + make_interval(secs => s.offset_seconds)) AT TIME ZONE 'UTC'"
+    bucket = taken if unit is None else f"date_trunc('{unit}', {taken}, 'UTC')"
+    metrics = ', '.join(f"avg(s.{metric}) AS {metric}" for metric in HISTORY_METRICS)
+    unnest = ', '.join(f"h.{column}" for column in ('offsets', *HISTORY_METRICS))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {bucket} AS bucket, count(*) AS samples, {metrics} "
+            f"FROM {_table()} h, unnest({unnest}) AS s(offset_seconds, {', '.join(HISTORY_METRICS)}) "
+            f"WHERE h.field_id = %s AND h.month >= %s AND h.month <= %s "
+            f"AND {taken} >= %s AND {taken} < %s "
+            f"GROUP BY 1 ORDER BY 1",
+            [field.pk, month_start(start), month_start(end), start, end],
+        )
+        names = [column[0] for column in cursor.description]
+        rows = cursor.fetchall()
+    series = []
+    for row in rows:
+        point = dict(zip(names, row))
+        point['time'] = point.pop('bucket')
+        series.append({
+            key: round(value, 3) if isinstance(value, float) else value
+            for key, value in point.items()
+        })
+    return series
+
+
+def compact_soil_history(raw_days=None, retention_days=None, batch_size=COMPACTION_BATCH_SIZE):
+    """
+    Apply the history retention policy: months older than `retention_days`
+    (SOIL_HISTORY['RETENTION_DAYS']) are deleted, and months that ended more
+    than `raw_days` (SOIL_HISTORY['RAW_DAYS']) ago are downsampled in SQL to
+    one averaged sample per day. Returns {'deleted': rows, 'compacted': rows}.
+    """
+    policy = getattr(settings, 'SOIL_HISTORY', {})
+    raw_days = policy.get('RAW_DAYS', 90) if raw_days is None else raw_days
+    retention_days = policy.get('RETENTION_DAYS', 5 * 365) if retention_days is None else retention_days
+    today = timezone.now().date()
+
+    deleted, _ = SoilHistory.objects.filter(month__lt=today - timedelta(days=retention_days)).delete()
+
+    # A month is complete once the next one has started; compact those past the raw window
+    cutoff = month_start(_month_datetime(today - timedelta(days=raw_days)))
+    pending = SoilHistory.objects.filter(month__lt=cutoff, compacted=False).order_by('pk').values_list('pk', flat=True)
+    aggregated = ', '.join(f"array_agg({metric} ORDER BY day) AS {metric}" for metric in HISTORY_METRICS)
+    daily = ', '.join(f"avg(s.{metric}) AS {metric}" for metric in HISTORY_METRICS)
+    unnest = ', '.join(f"h.{column}" for column in ('offsets', *HISTORY_METRICS))
+    assignments = ', '.join(f"{column} = d.{column}" for column in ('offsets', *HISTORY_METRICS))
+    compacted = 0
+    while True:
+        pks = list(pending[:batch_size])
+        if not pks:
+            break
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {_table()} AS t SET {assignments}, compacted = true FROM ("
+                f"  SELECT id, array_agg(day ORDER BY day) AS offsets, {aggregated} FROM ("
+                f"    SELECT h.id, s.offset_seconds / {SECONDS_PER_DAY} * {SECONDS_PER_DAY} AS day, {daily} "
+                f"    FROM {_table()} h, unnest({unnest}) AS s(offset_seconds, {', '.join(HISTORY_METRICS)}) "
+                f"    WHERE h.id = ANY(%s) GROUP BY h.id, day"
+                f"  ) per_day GROUP BY id"
+                f") d WHERE t.id = d.id",
+                [pks],
+            )
+        # Rows without samples have nothing to aggregate; mark them too
+        SoilHistory.objects.filter(pk__in=pks, compacted=False).update(compacted=True)
+        compacted += len(pks)
+    return {'deleted': deleted, 'compacted': compacted}
+
+
+def parse_history_range(params, default_days=365):
+    """(start, end) datetimes from ?from= / ?to= (ISO dates or datetimes), default the last year."""
+    end = _parse_moment(params.get('to'), 'to') or timezone.now()
+    start = _parse_moment(params.get('from'), 'from') or end - timedelta(days=default_days)
+    return start, end
+
+
+def _parse_moment(value, name):
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = day and datetime.combine(day, time.min)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValidationError({name: "Expected an ISO 8601 date or datetime."})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, dt_timezone.utc)
+    return moment
@@ -0,0 +1,169 @@
+import json
+import math
+import os
+import threading
+
+import numpy as np
+from django.conf import settings
+
+# Global EPSG:4326 grid shared by every tile: pixel size in degrees (~250 m,
+# the SoilGrids scale used by Earth Engine) and pixels per tile side.
+RESOLUTION = 0.0025
+TILE_SIZE = 512
+TILE_DEGREES = RESOLUTION * TILE_SIZE
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def tile_bounds(tx, ty):
+    """(min_lon, min_lat, max_lon, max_lat) of tile column tx, row ty (rows count down from 90N)."""
+    min_lon = -180 + tx * TILE_DEGREES
+    max_lat = 90 - ty * TILE_DEGREES
+    return min_lon, max_lat - TILE_DEGREES, min_lon + TILE_DEGREES, max_lat
+
+
+def tiles_for_bbox(min_lon, min_lat, max_lon, max_lat):
+    """Every (tx, ty) tile overlapping the bounding box."""
+    tx0 = int(math.floor((min_lon + 180) / TILE_DEGREES))
+    tx1 = int(math.floor((max_lon + 180) / TILE_DEGREES))
+    ty0 = int(math.floor((90 - max_lat) / TILE_DEGREES))
+    ty1 = int(math.floor((90 - min_lat) / TILE_DEGREES))
+    return [(tx, ty) for ty in range(ty0, ty1 + 1) for tx in range(tx0, tx1 + 1)]
+
+
+def points_in_polygon(xs, ys, rings):
+    """
+    Vectorized even-odd point-in-polygon test. xs/ys are broadcastable arrays
+    of point coordinates; rings is the GeoJSON Polygon coordinate list
+    (exterior first, holes after). Loops over edges, never over points.
+    """
+    inside = np.zeros(np.broadcast(xs, ys).shape, dtype=bool)
+    for ring in rings:
+        ring = np.asarray(ring, dtype=np.float64)
+        x1, y1 = ring[:-1, 0], ring[:-1, 1]
+        x2, y2 = ring[1:, 0], ring[1:, 1]
+        for ax, ay, bx, by in zip(x1, y1, x2, y2):
+            if ay == by:
+                continue
+            crosses = (ay > ys) != (by > ys)
+            x_at_y = (bx - ax) * (ys - ay) / (by - ay) + ax
+            inside ^= crosses & (xs < x_at_y)
+    return inside
+
+
+class TileStore:
+    """
+    Local SoilGrids tiles written by `manage.py build_soil_tiles`: one float32
+    .npy file per layer and tile (NaN = no data), opened memory-mapped so only
+    the pixels a polygon touches are read from disk.
+    """
+
+    def __init__(self, root):
+        self.root = str(root)
+        self._arrays = {}
+        self._lock = threading.Lock()
+
+    def path(self, layer, tx, ty):
+        return os.path.join(self.root, layer, f"{tx}_{ty}.npy")
+
+    def manifest(self):
+        path = os.path.join(self.root, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def write_manifest(self, manifest):
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, MANIFEST_NAME)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def has_tile(self, layer, tx, ty):
+        return os.path.exists(self.path(layer, tx, ty))
+
+    def write_tile(self, layer, tx, ty, data):
+        path = self.path(layer, tx, ty)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            np.save(f, np.ascontiguousarray(data, dtype=np.float32))
+        os.replace(path + '.tmp', path)
+        with self._lock:
+            self._arrays.pop((layer, tx, ty), None)
+
+    def read_tile(self, layer, tx, ty):
+        """Memory-mapped tile array, or None when the tile was never built."""
+        key = (layer, tx, ty)
+        with self._lock:
+            if key not in self._arrays:
+                path = self.path(layer, tx, ty)
+                self._arrays[key] = np.load(path, mmap_mode='r') if os.path.exists(path) else None
+            return self._arrays[key]
+
+    def zonal_means(self, polygon_geojson, layers):
+        """
+        Mean of each layer over the pixels whose centres fall inside the
+        polygon. Polygons smaller than a pixel use the pixel under their first
+        vertex. Returns {layer: mean or None}.
+        """
+        rings = polygon_geojson['coordinates']
+        exterior = np.asarray(rings[0], dtype=np.float64)
+        min_lon, min_lat = exterior.min(axis=0)
+        max_lon, max_lat = exterior.max(axis=0)
+
+        sums = dict.fromkeys(layers, 0.0)
+        counts = dict.fromkeys(layers, 0)
+        for tx, ty in tiles_for_bbox(min_lon, min_lat, max_lon, max_lat):
+            tile_min_lon, _, _, tile_max_lat = tile_bounds(tx, ty)
+            # Pixel window of this tile covered by the polygon's bbox
+            col0 = max(int(math.floor((min_lon - tile_min_lon) / RESOLUTION)), 0)
+            col1 = min(int(math.ceil((max_lon - tile_min_lon) / RESOLUTION)), TILE_SIZE)
+            row0 = max(int(math.floor((tile_max_lat - max_lat) / RESOLUTION)), 0)
+            row1 = min(int(math.ceil((tile_max_lat - min_lat) / RESOLUTION)), TILE_SIZE)
+            if col0 >= col1 or row0 >= row1:
+                continue
+
+            xs = tile_min_lon + (np.arange(col0, col1) + 0.5) * RESOLUTION
+            ys = tile_max_lat - (np.arange(row0, row1) + 0.5) * RESOLUTION
+            mask = points_in_polygon(xs[np.newaxis, :], ys[:, np.newaxis], rings)
+            if not mask.any():
+                continue
+
+            for layer in layers:
+                tile = self.read_tile(layer, tx, ty)
+                if tile is None:
+                    continue
+                values = np.asarray(tile[row0:row1, col0:col1])[mask]
+                valid = ~np.isnan(values)
+                sums[layer] += float(values[valid].sum())
+                counts[layer] += int(valid.sum())
+
+        if not any(counts.values()):
+            return self.sample(exterior[0][0], exterior[0][1], layers)
+        return {layer: sums[layer] / counts[layer] if counts[layer] else None for layer in layers}
+
+    def sample(self, lon, lat, layers):
+        """Value of each layer in the pixel containing (lon, lat)."""
+        (tx, ty), = tiles_for_bbox(lon, lat, lon, lat)
+        tile_min_lon, _, _, tile_max_lat = tile_bounds(tx, ty)
+        col = min(int((lon - tile_min_lon) / RESOLUTION), TILE_SIZE - 1)
+        row = min(int((tile_max_lat - lat) / RESOLUTION), TILE_SIZE - 1)
+        result = {}
+        for layer in layers:
+            tile = self.read_tile(layer, tx, ty)
+            value = None if tile is None else float(tile[row, col])
+            result[layer] = None if value is None or math.isnan(value) else value
+        return result
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_tile_store():
+    global _store
+    with _store_lock:
+        if _store is None or _store.root != str(settings.SOIL_TILE_ROOT):
+            _store = TileStore(settings.SOIL_TILE_ROOT)
+        return _store
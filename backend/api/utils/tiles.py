@@ -0,0 +1,108 @@
+import hashlib
+import math
+
+from django.contrib.gis.geos import Polygon
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Max
+
+from base.models import Farm, FieldBoundary
+
+EXTENT = 4096
+BUFFER = 64
+TILE_CACHE_TIMEOUT = 24 * 3600
+
+# layer name -> (model, geometry field, {tile attribute: SQL expression on row alias "t"}).
+# Attributes only read the row's own columns, so its updated_at (see
+# tile_version) changes whenever a cached tile would carry stale properties.
+LAYERS = {
+    'farms': (Farm, 'coordinates', {
+        'uuid': 't.uuid::text',
+        'name': 't.name',
+        'community': 't.community_id::text',
+    }),
+    'field-boundaries': (FieldBoundary, 'boundary', {
+        'uuid': 't.uuid::text',
+        'farm': 't.farm_id::text',
+        'area_hectares': 't.area_hectares',
+    }),
+}
+
+
+def render_tile(layer, scoped_queryset, z, x, y):
+    """
+    Mapbox Vector Tile bytes for one layer and z/x/y, built in PostGIS with
+    ST_AsMVT/ST_AsMVTGeom. Only rows of `scoped_queryset` are included; the
+    bbox test against the tile envelope uses the geometry's GiST index.
+    """
+    model, geom_field, attributes = LAYERS[layer]
+    qn = connection.ops.quote_name
+    geom_column = qn(model._meta.get_field(geom_field).column)
+    pk_column = qn(model._meta.pk.column)
+    scope_sql, scope_params = scoped_queryset.order_by().values('pk').query.sql_with_params()
+    columns = ', '.join(f"{expression} AS {qn(name)}" for name, expression in attributes.items())
+    sql = f"""
+        WITH bounds AS (SELECT ST_TileEnvelope(%s, %s, %s) AS geom),
+        mvtgeom AS (
+            SELECT ST_AsMVTGeom(ST_Transform(t.{geom_column}, 3857), bounds.geom, {EXTENT}, {BUFFER}, true) AS geom,
+                   {columns}
+            FROM {qn(model._meta.db_table)} t, bounds
+            WHERE t.{geom_column} && ST_Transform(bounds.geom, 4326)
+              AND t.{pk_column} IN ({scope_sql})
+        )
+        SELECT ST_AsMVT(mvtgeom.*, %s, {EXTENT}, 'geom') FROM mvtgeom
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [z, x, y, *scope_params, layer])
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] is not None else b''
+
+
+# Row versions a cached tile depends on: its rows, and for fields the farms
+# that scope them (an owner or community change moves fields between scopes)
+VERSION_FIELDS = {
+    'farms': ['updated_at'],
+    'field-boundaries': ['updated_at', 'farm__updated_at'],
+}
+
+
+def tile_bounds(z, x, y):
+    """The z/x/y web-mercator tile as a lon/lat polygon (the 4326 form of ST_TileEnvelope)."""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return Polygon.from_bbox((x / n * 360 - 180, lat(y + 1), (x + 1) / n * 360 - 180, lat(y)))
+
+
+def tile_version(layer, scoped_queryset, z, x, y):
+    """
+    Version of the rows one tile shows: newest updated_at and row count of
+    the scoped rows whose bbox overlaps the tile, one GiST-indexed aggregate.
+    Edits elsewhere, or in other communities, leave it unchanged.
+    """
+    _, geom_field, _ = LAYERS[layer]
+    fields = VERSION_FIELDS[layer]
+    version = (
+        scoped_queryset.order_by()
+        .filter(**{f'{geom_field}__bboverlaps': tile_bounds(z, x, y)})
+        .aggregate(count=Count('pk'), **{f'v{i}': Max(field) for i, field in enumerate(fields)})
+    )
+    stamps = [version[f'v{i}'] for i in range(len(fields))]
+    return ':'.join([str(version['count'])] + [stamp.isoformat() if stamp else '-' for stamp in stamps])
+
+
+def cached_tile(layer, scope_key, scoped_queryset, z, x, y):
+    """
+    (etag, tile bytes), cached per layer, visibility scope and tile until
+    one of the tile's rows is added, edited or removed (see tile_version).
+    """
+    version = tile_version(layer, scoped_queryset, z, x, y)
+    key = f"mvt:{layer}:{scope_key}:{z}/{x}/{y}:{version}"
+    entry = cache.get(key)
+    if entry is None:
+        tile = render_tile(layer, scoped_queryset, z, x, y)
+        entry = (f'"{hashlib.md5(tile).hexdigest()}"', tile)
+        cache.set(key, entry, TILE_CACHE_TIMEOUT)
+    return entry
@@ -1,3 +1,7 @@
 from .user import *
 from .farm import *
-from .fieldboundary import *
\ No newline at end of file
+from .fieldboundary import *
+from .job import *
+from .tiles import *
+from .community import *
+from .export import *
@@ -0,0 +1,26 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import permissions
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.scoping import is_community_member
+from api.utils.community_stats import community_stats
+from base.models import Community
+
+
+class CommunityStatsView(APIView):
+    """
+    Dashboard totals of a community: farms, fields, hectares, pH and organic
+    carbon histograms, texture classes and recommended-crop counts. Served
+    from the materialized CommunityAggregate rows, so the cost does not grow
+    with the number of fields. Visible to the community's admin, its farmers
+    and system admins.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        community = get_object_or_404(Community, pk=pk)
+        if not is_community_member(request.user, community):
+            raise PermissionDenied("You are not a member of this community.")
+        return Response(community_stats(community))
@@ -0,0 +1,36 @@
+from django.http import FileResponse
+from django.utils import timezone
+from rest_framework import permissions
+from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.views import APIView
+
+from api.renderers import FlatGeobufRenderer, ParquetRenderer
+from api.scoping import member_community
+from api.utils.analytics_export import EXPORT_FORMATS, LAYERS, export_layer_file
+
+
+class AnalyticsExportView(APIView):
+    """
+    Columnar download of a layer (`farms` or `fields`, with soil attributes)
+    for pandas / GeoPandas: ?format=parquet (GeoParquet, the default) or
+    ?format=fgb (FlatGeobuf with a spatial index), optionally limited to
+    ?community=<uuid>. System admins only.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [ParquetRenderer, FlatGeobufRenderer]
+
+    def get(self, request, layer):
+        if not request.user.is_admin:
+            raise PermissionDenied("Only system admins can export.")
+        if layer not in LAYERS:
+            raise NotFound(f"Unknown layer {layer!r}.")
+        community = None
+        if request.query_params.get('community'):
+            community = member_community(request.user, request.query_params['community'])
+
+        fmt = request.accepted_renderer.format
+        filename = f"{layer}-{timezone.now():%Y%m%d-%H%M%S}{EXPORT_FORMATS[fmt]}"
+        return FileResponse(
+            export_layer_file(layer, fmt, community=community),
+            as_attachment=True, filename=filename, content_type=request.accepted_renderer.media_type,
+        )
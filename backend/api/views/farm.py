@@ -1,31 +1,71 @@
+import logging
+
+from django.db.models import Prefetch
 from rest_framework import viewsets, permissions
-from base.models import Farm
+from base.models import Farm, FieldBoundary
+from api.filters import GeometryFilterBackend
+from api.pagination import KeysetPagination
+from api.scoping import farm_scope
 from api.serializers import FarmSerializer
+from api.serializers.mixins import field_requested
+from api.views.mixins import ConditionalGetMixin, FastListMixin, SimplifiedGeometryMixin, combine_versions, queryset_version
+
+logger = logging.getLogger(__name__)
 
 class IsFarmOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return request.user.is_authenticated and obj.owner == request.user
 
-class FarmViewSet(viewsets.ModelViewSet):
+class FarmViewSet(ConditionalGetMixin, FastListMixin, SimplifiedGeometryMixin, viewsets.ModelViewSet):
     serializer_class = FarmSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    count_context = 'farm_count'
+    filter_backends = [GeometryFilterBackend]
+    geo_filter_field = 'coordinates'
 
     def get_queryset(self):
         community_uuid = self.request.query_params.get('community')
         user = self.request.user
-        print(f"[DEBUG] community_uuid param: {community_uuid}, user: {user}, user.role: {getattr(user, 'role', None)}")
-        if community_uuid:
-            qs = Farm.objects.filter(community__uuid=community_uuid)
-            print(f"[DEBUG] Farms for community {community_uuid}: {[f.uuid for f in qs]}")
-            return qs
-        if user.role == 'community':
-            qs = Farm.objects.filter(community=user.administered_community)
-            print(f"[DEBUG] Farms for community admin {user}: {[f.uuid for f in qs]}")
-            return qs
-        qs = Farm.objects.filter(owner=user)
-        print(f"[DEBUG] Farms for user {user}: {[f.uuid for f in qs]}")
+        scope, _, qs = farm_scope(user, community_uuid)
+        logger.debug(
+            "Farm queryset scope=%s community=%s user=%s role=%s",
+            scope, community_uuid, user.pk, user.role,
+            extra={'scope': scope, 'community': community_uuid, 'user': str(user.pk), 'role': user.role},
+        )
+        # Don't load geometries that are dropped (?fields/omit/include_geometry)
+        # or rendered by PostGIS (?simplify/zoom/precision)
+        if not self.geometry_loaded('coordinates'):
+            qs = qs.defer('coordinates')
+        if field_requested(self.request, 'field_boundaries'):
+            boundaries = FieldBoundary.objects.all()
+            if not self.geometry_loaded('boundary', top_level=False):
+                boundaries = boundaries.defer('boundary')
+            # One extra query for all nested boundaries instead of one per farm;
+            # the prefetch also fills each boundary's `farm` cache.
+            qs = qs.prefetch_related(Prefetch('field_boundaries', queryset=boundaries))
         return qs
 
+    def _with_boundaries(self, farms):
+        # Nested field boundaries change the response without touching the farm
+        version = queryset_version(farms)
+        if not field_requested(self.request, 'field_boundaries'):
+            return version
+        return combine_versions(version, queryset_version(FieldBoundary.objects.filter(farm__in=farms.values('pk'))))
+
+    def list_version(self):
+        return self._with_boundaries(self.filter_queryset(self.get_queryset()))
+
+    def object_version(self):
+        return self._with_boundaries(self.filter_queryset(self.get_queryset()).filter(pk=self.kwargs['pk']))
+
+    def geometry_targets(self, farms):
+        request = self.request
+        if field_requested(request, 'coordinates', geometry=True):
+            yield Farm, 'coordinates', [farm.pk for farm in farms]
+        if field_requested(request, 'field_boundaries') and field_requested(request, 'boundary', top_level=False, geometry=True):
+            yield FieldBoundary, 'boundary', [field.pk for farm in farms for field in farm.field_boundaries.all()]
+
     def perform_create(self, serializer):
         # Assign the farm to the currently logged-in user
         user = self.request.user
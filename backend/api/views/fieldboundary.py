@@ -1,50 +1,190 @@
-from rest_framework import viewsets, permissions
-from base.models import FieldBoundary
-from api.serializers import FieldBoundarySerializer
+import logging
+import uuid
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import viewsets, permissions, status
+from base.models import Farm, FieldBoundary
+from api.fastpath import FastRepresentation, Unsupported, stream_features
+from api.filters import GeometryFilterBackend, SoilFilterBackend
+from api.pagination import KeysetPagination
+from api.renderers import GeoJSONRenderer, NDJSONRenderer
+from api.scoping import field_boundary_scope
+from api.serializers import FieldBoundarySerializer, JobSerializer
+from api.serializers.mixins import field_requested
+from api.views.mixins import ConditionalGetMixin, FastListMixin, SimplifiedGeometryMixin
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from api.utils import analyze_soil
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.reverse import reverse
+from api.utils import (
+    FieldImportError, enqueue_community_reanalysis, enqueue_field_import, enqueue_soil_analysis, save_upload,
+)
+from api.utils.soil_history import RESOLUTIONS, field_history, parse_history_range
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+logger = logging.getLogger(__name__)
 
 class IsFarmOwnerForField(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return obj.farm.owner == request.user
 
-class FieldBoundaryViewSet(viewsets.ModelViewSet):
+class FieldBoundaryViewSet(ConditionalGetMixin, FastListMixin, SimplifiedGeometryMixin, viewsets.ModelViewSet):
     serializer_class = FieldBoundarySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    filter_backends = [GeometryFilterBackend, SoilFilterBackend]
+    geo_filter_field = 'boundary'
+    count_context = 'field_count'
 
     def get_queryset(self):
         user = self.request.user
-        if user.role == 'community':
-            # Community can see all field boundaries of all farms in their territory
-            return FieldBoundary.objects.filter(farm__community=user.administered_community)
-        return FieldBoundary.objects.filter(farm__owner=user)
+        logger.debug(
+            "Field boundary queryset user=%s role=%s", user.pk, user.role,
+            extra={'user': str(user.pk), 'role': user.role},
+        )
+        _, _, qs = field_boundary_scope(user)
+        if not self.geometry_loaded('boundary'):
+            qs = qs.defer('boundary')
+        # Object permission checks and __str__ read field.farm
+        return qs.select_related('farm')
+
+    def geometry_targets(self, fields):
+        if field_requested(self.request, 'boundary', geometry=True):
+            yield FieldBoundary, 'boundary', [field.pk for field in fields]
+
+    def _queued_response(self, request, job, **extra):
+        # The GEE + FAO analysis runs in the background; clients poll the job
+        job_url = reverse('job-detail', kwargs={'pk': job.pk}, request=request)
+        return Response(
+            {"status": "queued", "job": JobSerializer(job).data, **extra},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': job_url},
+        )
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        field = self.perform_create(serializer)
+        job = enqueue_soil_analysis(field, owner=request.user)
+        return self._queued_response(request, job, data=serializer.data)
 
     def perform_create(self, serializer):
         farm = serializer.validated_data.get('farm')
         if farm.owner != self.request.user:
             raise PermissionDenied("You do not own this farm.")
+        return serializer.save()
 
-        field = serializer.save()
-
-        # After saving, call the GEE + FAO integration using the field's boundary
-        soil_data = analyze_soil(field.boundary.geojson)
-        
-        # Update the field with external data
-        for key, value in soil_data.items():
-            setattr(field, key, value)
-        field.save()
-    
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def reanalyze(self, request, pk=None):
         field = self.get_object()
         if field.farm.owner != request.user:
             raise PermissionDenied("You do not own this field.")
 
-        soil_data = analyze_soil(field.boundary.geojson)
-        for key, value in soil_data.items():
-            setattr(field, key, value)
-        field.save()
+        job = enqueue_soil_analysis(field, owner=request.user)
+        return self._queued_response(request, job)
+
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """
+        Soil analysis time series of the field, aggregated in the database:
+        ?from= / ?to= (ISO dates, default the last year) and ?resolution=
+        raw, day (default), week or month.
+        """
+        field = self.get_object()
+        resolution = request.query_params.get('resolution', 'day')
+        if resolution not in RESOLUTIONS:
+            raise ValidationError({'resolution': f"Expected one of: {', '.join(RESOLUTIONS)}."})
+        start, end = parse_history_range(request.query_params)
+        if start >= end:
+            raise ValidationError({'from': "Must be before 'to'."})
+        return Response({
+            'field': str(field.pk),
+            'from': start,
+            'to': end,
+            'resolution': resolution,
+            'series': field_history(field, start, end, resolution),
+        })
+
+    @action(detail=False, methods=['get'], renderer_classes=[GeoJSONRenderer, NDJSONRenderer])
+    def export(self, request):
+        """
+        Every field the user can see (filters and ?fields= apply) streamed as
+        one GeoJSON FeatureCollection (?format=geojson, the default) or one
+        Feature per line (?format=ndjson). Rows come from a server-side cursor
+        and are written as they are read, so memory use does not grow with
+        the export and the first bytes go out immediately.
+        """
+        fmt = request.accepted_renderer.format
+        queryset = self.filter_queryset(self.get_queryset()).order_by('-created_at', '-uuid')
+        try:
+            fast = FastRepresentation(self.get_serializer_class()(context=self.get_serializer_context()))
+            chunks = stream_features(fast, queryset, fmt)
+        except Unsupported as exc:
+            raise ValidationError({'fields': f"Cannot export {exc}."})
+        response = StreamingHttpResponse(chunks, content_type=request.accepted_renderer.media_type)
+        filename = f"fields-{timezone.now():%Y%m%d-%H%M%S}.{fmt}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='reanalyze', url_name='reanalyze-all',
+            permission_classes=[permissions.IsAuthenticated])
+    def reanalyze_all(self, request):
+        """
+        Refresh the soil data of every field in the admin's community, in one
+        background job. Fields analyzed within `max_age_days` (default
+        SOIL_REANALYSIS_MAX_AGE_DAYS) are skipped unless `force` is true.
+        """
+        community = getattr(request.user, 'administered_community', None) if request.user.role == 'community' else None
+        if community is None:
+            raise PermissionDenied("Only community admins can reanalyze their community.")
+
+        max_age_days = request.data.get('max_age_days')
+        if max_age_days is not None:
+            try:
+                max_age_days = int(max_age_days)
+            except (TypeError, ValueError):
+                max_age_days = -1
+            if max_age_days < 0:
+                raise ValidationError({'max_age_days': "Must be a non-negative integer."})
+        force = str(request.data.get('force', 'false')).lower() in ('true', '1', 'yes')
+
+        job, created = enqueue_community_reanalysis(
+            community, owner=request.user, max_age_days=max_age_days, force=force
+        )
+        return self._queued_response(request, job, already_queued=not created)
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser],
+            permission_classes=[permissions.IsAuthenticated])
+    def import_fields(self, request):
+        """
+        Bulk import from a GeoJSON, GeoPackage or zipped Shapefile upload.
+        Form fields: `file`, plus `farm` (uuid) and/or `farm_property` (name
+        of the feature property holding each feature's farm uuid).
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': "This field is required."})
+        farm_property = request.data.get('farm_property') or None
+        farm = None
+        farm_id = request.data.get('farm')
+        if farm_id:
+            try:
+                farm_id = uuid.UUID(str(farm_id))
+            except ValueError:
+                raise ValidationError({'farm': "Must be a valid UUID."})
+            farm = Farm.objects.filter(pk=farm_id).first()
+            if farm is None:
+                raise ValidationError({'farm': "Unknown farm."})
+            if farm.owner != request.user:
+                raise PermissionDenied("You do not own this farm.")
+        elif not farm_property:
+            raise ValidationError({'farm': "Give a farm or a farm_property."})
+        analyze = str(request.data.get('analyze', 'true')).lower() not in ('false', '0', 'no')
 
-        return Response({"status": "updated", "data": FieldBoundarySerializer(field).data})
+        try:
+            path = save_upload(upload)
+        except FieldImportError as exc:
+            raise ValidationError({'file': str(exc)})
+        job = enqueue_field_import(path, request.user, farm=farm, farm_property=farm_property, analyze=analyze)
+        return self._queued_response(request, job)
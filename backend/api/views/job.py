@@ -0,0 +1,17 @@
+from rest_framework import viewsets, permissions
+from base.models import Job
+from api.serializers import JobSerializer
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Status of background jobs (e.g. soil analyses queued on field creation).
+    Users see their own jobs; system admins see all of them.
+    """
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_admin:
+            return Job.objects.all()
+        return Job.objects.filter(owner=user)
@@ -0,0 +1,186 @@
+import hashlib
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from api.fastpath import FastRepresentation, Unsupported
+from api.metrics import add_request_context, count_cache
+from api.serializers.mixins import field_requested
+from api.utils.geometry import geometry_options, simplified_geometries
+
+
+class SimplifiedGeometryMixin(ABC):
+    """
+    Handles ?simplify=, ?zoom= and ?precision= on GET requests: the geometries
+    a response needs are simplified/rounded in PostGIS (cached per zoom band)
+    and handed to the serializer pre-rendered instead of being loaded and
+    serialized through GEOS.
+    """
+
+    @abstractmethod
+    def geometry_targets(self, instances):
+        """Yield (model, geometry field name, pks) for every geometry the response renders."""
+
+    def get_geometry_options(self):
+        if self.request.method not in SAFE_METHODS:
+            return None
+        if not hasattr(self, '_geometry_options'):
+            self._geometry_options = geometry_options(self.request)
+        return self._geometry_options
+
+    def geometry_loaded(self, name, top_level=True):
+        """Whether get_queryset must load the geometry column itself."""
+        return (
+            self.get_geometry_options() is None
+            and field_requested(self.request, name, top_level=top_level, geometry=True)
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        options = self.get_geometry_options()
+        if options is not None and args:
+            instances = list(args[0]) if kwargs.get('many') else [args[0]]
+            geometries = {}
+            for model, field_name, pks in self.geometry_targets(instances):
+                for pk, geojson in simplified_geometries(model, field_name, pks, options).items():
+                    geometries[(field_name, pk)] = geojson
+            context = kwargs.setdefault('context', self.get_serializer_context())
+            context['geometries'] = geometries
+        return super().get_serializer(*args, **kwargs)
+
+
+def queryset_version(queryset):
+    """
+    (last modified, token) of a queryset from one aggregate query: the newest
+    updated_at and the row count, so edits, inserts and deletes all change it.
+    """
+    version = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+    last_modified = version['last_modified']
+    return last_modified, f"{last_modified.isoformat() if last_modified else '-'}:{version['count']}"
+
+
+def combine_versions(*versions):
+    stamps = [last_modified for last_modified, _ in versions if last_modified is not None]
+    return max(stamps, default=None), '|'.join(token for _, token in versions)
+
+
+def conditional_response(request, view_name, version, render, use_cache=True):
+    """
+    Answer a GET from its data version before doing the work:
+
+    - the ETag hashes the user, the full URL, the negotiated format and
+      `version` (see queryset_version), with Last-Modified from the version;
+    - If-None-Match / If-Modified-Since matches answer 304 right away;
+    - otherwise the serialized data is served from the per-user response
+      cache, or produced by `render()` and cached.
+
+    Cache entries are keyed by the ETag, so any write that changes the
+    version (updated_at or row count) misses the old entry; stale entries
+    expire after RESPONSE_CACHE_TIMEOUT.
+    """
+    last_modified, token = version
+    renderer = getattr(request, 'accepted_renderer', None)
+    raw = f"{view_name}:{request.user.pk}:{request.get_full_path()}:{getattr(renderer, 'format', '')}:{token}"
+    etag = quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        key = f"response:{request.user.pk}:{etag}"
+        data = cache.get(key) if use_cache else None
+        if use_cache:
+            count_cache('response', hits=int(data is not None), misses=int(data is None))
+        if data is not None:
+            response = Response(data)
+        else:
+            response = render()
+            if use_cache and response.status_code == 200:
+                cache.set(key, response.data, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+    if response.status_code not in (200, 304):
+        return response
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    # Clients must revalidate, and shared caches must not serve one user's data to another
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified, 304s and per-user response caching for list and
+    retrieve (see conditional_response). Views implement list_version() and
+    object_version(), typically with queryset_version().
+    """
+    cache_responses = True
+
+    def list_version(self):
+        return queryset_version(self.filter_queryset(self.get_queryset()))
+
+    def object_version(self):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        return queryset_version(
+            self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: self.kwargs[lookup]})
+        )
+
+    def list(self, request, *args, **kwargs):
+        return conditional_response(
+            request, f"{self.basename}-list", self.list_version(),
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+            use_cache=self.cache_responses,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_response(
+            request, f"{self.basename}-detail", self.object_version(),
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+            use_cache=self.cache_responses,
+        )
+
+
+class FastListMixin:
+    """
+    Serves JSON list responses without model instances or GEOS: rows come
+    from `.values()` with geometries rendered by PostGIS, and are turned into
+    the serializer's output by api.fastpath.FastRepresentation. Other formats
+    (e.g. the browsable API), serializers it cannot reproduce, and views with
+    `fast_list = False` go through the regular serializer path; both return
+    the same data (base.tests.FastListParityTests).
+    """
+    fast_list = getattr(settings, 'FAST_LIST_SERIALIZATION', True)
+    # Key of the listed row count in slow-request logs (api.metrics)
+    count_context = 'result_count'
+
+    def list(self, request, *args, **kwargs):
+        renderer = getattr(request, 'accepted_renderer', None)
+        if not self.fast_list or getattr(renderer, 'format', None) != 'json':
+            return super().list(request, *args, **kwargs)
+
+        context = self.get_serializer_context()
+        if self.get_geometry_options() is not None:
+            context['geometries'] = {}
+        try:
+            fast = FastRepresentation(self.get_serializer_class()(context=context))
+        except Unsupported:
+            return super().list(request, *args, **kwargs)
+
+        queryset = fast.values(self.filter_queryset(self.get_queryset()), extra=['created_at'])
+        rows = self.paginate_queryset(queryset)
+        if rows is None:
+            rows = list(queryset)
+        fast.load_nested(rows)
+        add_request_context(request, **{self.count_context: len(rows)})
+        if 'geometries' in context:
+            options = self.get_geometry_options()
+            for model, field_name, pks in fast.geometry_targets(rows):
+                for pk, geojson in simplified_geometries(model, field_name, pks, options).items():
+                    context['geometries'][(field_name, pk)] = geojson
+
+        data = fast.represent_many(rows)
+        if self.paginator is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
@@ -0,0 +1,37 @@
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework import permissions
+from rest_framework.exceptions import NotFound
+from rest_framework.views import APIView
+
+from api.renderers import MVTRenderer
+from api.scoping import farm_scope, field_boundary_scope
+from api.utils.tiles import LAYERS, cached_tile
+
+
+class VectorTileView(APIView):
+    """
+    GET /tiles/{layer}/{z}/{x}/{y}.mvt for layer 'farms' or 'field-boundaries',
+    limited to what the user sees through FarmViewSet/FieldBoundaryViewSet
+    (farms also honour ?community=, for members of that community).
+    Responses carry an ETag and answer If-None-Match with 304.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [MVTRenderer]
+
+    def get(self, request, layer, z, x, y):
+        if layer not in LAYERS or not (0 <= z <= 22 and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise NotFound("Unknown layer or tile.")
+
+        if layer == 'farms':
+            _, scope_key, qs = farm_scope(request.user, request.query_params.get('community'))
+        else:
+            _, scope_key, qs = field_boundary_scope(request.user)
+
+        etag, tile = cached_tile(layer, scope_key, qs, z, x, y)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(tile, content_type=MVTRenderer.media_type)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
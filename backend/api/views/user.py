@@ -1,3 +1,5 @@
+import hashlib
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions, viewsets
@@ -9,6 +11,7 @@ from api.serializers import (
     CustomTokenObtainPairSerializer
 )
 from base.models import User, Community, AdminAccessRequest
+from api.views.mixins import ConditionalGetMixin, conditional_response
 
 
 # -------------------- AUTH & PROFILE -------------------- #
@@ -17,7 +20,14 @@ class UserProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        return Response(UserSerializer(request.user).data)
+        # Authentication may return a cached user; version the stored row's profile columns
+        fields = UserSerializer.Meta.fields
+        values = User.objects.filter(pk=request.user.pk).values_list(*fields).first()
+        token = hashlib.sha1(repr(values).encode()).hexdigest()
+        return conditional_response(
+            request, 'user-profile', (None, token),
+            lambda: Response(UserSerializer(User(**dict(zip(fields, values)))).data),
+        )
 
 
 class UserRegistrationView(APIView):
@@ -55,7 +65,8 @@ class IsCommunityAdmin(permissions.BasePermission):
 
 # -------------------- COMMUNITY VIEWSET -------------------- #
 
-class CommunityViewSet(viewsets.ModelViewSet):
+class CommunityViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    # Versioned by Community.updated_at, which edits of the nested admin also touch (api.signals)
     queryset = Community.objects.all()
     serializer_class = CommunitySerializer
 
@@ -2,13 +2,14 @@ from django.contrib import admin
 from django.contrib.gis import admin as gis_admin
 
 from .models import User, Community, AdminAccessRequest
-from .models import Farm, FieldBoundary
+from .models import Farm, FieldBoundary, Job
 
 admin.site.register([User, Community, AdminAccessRequest])
 
 @admin.register(Farm)
 class FarmAdmin(gis_admin.GISModelAdmin):
     list_display = ('name', 'owner', 'community', 'created_at')
+    list_select_related = ('owner', 'community')
     search_fields = ('name', 'owner__first_name', 'community__name')
     list_filter = ('community', 'created_at')
     default_lon = 0
@@ -20,6 +21,7 @@ class FarmAdmin(gis_admin.GISModelAdmin):
 @admin.register(FieldBoundary)
 class FieldBoundaryAdmin(gis_admin.GISModelAdmin):
     list_display = ('farm', 'area_hectares', 'soil_type', 'created_at')
+    list_select_related = ('farm',)
     search_fields = ('farm__name', 'soil_type')
     list_filter = ('farm__community', 'created_at')
     default_lon = 0
@@ -28,3 +30,9 @@ class FieldBoundaryAdmin(gis_admin.GISModelAdmin):
     openlayers_url = 'https://openlayers.org/en/v4.6.5/build/ol.js'
     attribute_prefix = 'Ecosystem+'
 
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'status', 'attempts', 'owner', 'created_at', 'finished_at')
+    list_select_related = ('owner',)
+    list_filter = ('kind', 'status')
+    readonly_fields = ('created_at', 'updated_at', 'started_at', 'finished_at')
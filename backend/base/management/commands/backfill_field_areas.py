@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Now
+
+from base.area import GeodesicAreaHectares
+from base.models import FieldBoundary
+from base.stats import refresh_community_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute area_hectares for existing field boundaries as geodesic area "
+        "(PostGIS geography ST_Area), in set-based UPDATEs of --batch-size rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--missing-only', action='store_true', help="Only fill rows without an area.")
+
+    def handle(self, *args, **options):
+        qs = FieldBoundary.objects.order_by('pk')
+        if options['missing_only']:
+            qs = qs.filter(area_hectares__isnull=True)
+
+        updated = 0
+        last_pk = None
+        while True:
+            page = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+            pks = list(page.values_list('pk', flat=True)[:options['batch_size']])
+            if not pks:
+                break
+            updated += FieldBoundary.objects.filter(pk__in=pks).update(
+                area_hectares=GeodesicAreaHectares('boundary'), updated_at=Now(),
+            )
+            last_pk = pks[-1]
+            self.stdout.write(f"Updated {updated} field areas")
+
+        if updated:
+            # Community totals sum area_hectares; cached tiles follow updated_at
+            refresh_community_stats()
+        self.stdout.write(self.style.SUCCESS(f"Recomputed area for {updated} field boundaries"))
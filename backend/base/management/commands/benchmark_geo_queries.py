@@ -0,0 +1,119 @@
+import random
+import re
+
+from django.contrib.gis.geos import Point, Polygon
+from django.contrib.gis.measure import D
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.scoping import farm_scope, field_boundary_scope
+from base.models import Community, Farm, FieldBoundary, User
+
+BENCH_DOMAIN = 'bench.ecosystemplus.invalid'
+# Seeded fields are scattered over this box (Cameroon)
+BENCH_BBOX = (8.4, 1.6, 16.2, 13.1)
+PAGE_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN ANALYZE the farm/field list access paths (owner and community scopes "
+        "in keyset order, in_bbox and within_distance filters) and flag sequential "
+        "scans. --seed first tops the benchmark data set up to N synthetic fields."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help="Ensure at least this many synthetic fields exist.")
+        parser.add_argument('--owners', type=int, default=1000, help="Synthetic farm owners to spread farms over.")
+        parser.add_argument('--fields-per-farm', type=int, default=10)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        admin, community, owners = self.bench_users(options['owners'])
+        if options['seed']:
+            self.seed(options['seed'], community, owners, options['fields_per_farm'], options['batch_size'])
+
+        farm_count = Farm.objects.count()
+        field_count = FieldBoundary.objects.count()
+        self.stdout.write(f"Tables: {farm_count} farms, {field_count} field boundaries\n")
+
+        owner = owners[0]
+        center = Point((BENCH_BBOX[0] + BENCH_BBOX[2]) / 2, (BENCH_BBOX[1] + BENCH_BBOX[3]) / 2, srid=4326)
+        bbox = Polygon.from_bbox((center.x - 0.05, center.y - 0.05, center.x + 0.05, center.y + 0.05))
+        bbox.srid = 4326
+        ordered = ('-created_at', '-uuid')
+
+        paths = {
+            'farms by owner': farm_scope(owner)[2].order_by(*ordered),
+            'farms by community': farm_scope(admin)[2].order_by(*ordered),
+            'fields by owner': field_boundary_scope(owner)[2].order_by(*ordered),
+            'fields by community': field_boundary_scope(admin)[2].order_by(*ordered),
+            'fields in_bbox': field_boundary_scope(admin)[2].filter(boundary__intersects=bbox).order_by(*ordered),
+            'fields within_distance': field_boundary_scope(admin)[2].filter(
+                boundary__dwithin=(center, 0.01), boundary__distance_lte=(center, D(m=1000))
+            ).order_by(*ordered),
+        }
+
+        failures = 0
+        for name, qs in paths.items():
+            plan = qs[:PAGE_SIZE].explain(analyze=True, buffers=True)
+            seq_scans = sorted(set(re.findall(r'Seq Scan on (base_\w+)', plan)))
+            elapsed = re.search(r'Execution Time: ([\d.]+) ms', plan)
+            status = self.style.ERROR(f"SEQ SCAN on {', '.join(seq_scans)}") if seq_scans else self.style.SUCCESS("index")
+            failures += bool(seq_scans)
+            self.stdout.write(f"{name:<24} {status:<30} {elapsed.group(1) if elapsed else '?'} ms")
+            if options['verbosity'] > 1:
+                self.stdout.write(plan + "\n")
+
+        if failures:
+            self.stdout.write(self.style.WARNING(f"{failures} access path(s) fell back to a sequential scan"))
+
+    def bench_users(self, owner_count):
+        admin, _ = User.objects.get_or_create(
+            email=f'admin@{BENCH_DOMAIN}',
+            defaults={'username': f'admin@{BENCH_DOMAIN}', 'role': 'community'},
+        )
+        community, _ = Community.objects.get_or_create(
+            admin=admin,
+            defaults={'name': 'Benchmark community', 'email': f'admin@{BENCH_DOMAIN}', 'latitude': 7.5, 'longitude': 13.5},
+        )
+        existing = {u.email: u for u in User.objects.filter(email__endswith=f'@{BENCH_DOMAIN}', role='user')}
+        User.objects.bulk_create([
+            User(email=email, username=email, role='user')
+            for email in (f'owner{i}@{BENCH_DOMAIN}' for i in range(owner_count))
+            if email not in existing
+        ])
+        owners = list(User.objects.filter(email__endswith=f'@{BENCH_DOMAIN}', role='user').order_by('email'))
+        return admin, community, owners
+
+    def seed(self, target, community, owners, fields_per_farm, batch_size):
+        have = FieldBoundary.objects.filter(farm__community=community).count()
+        missing = target - have
+        if missing <= 0:
+            self.stdout.write(f"Already {have} benchmark fields")
+            return
+
+        rng = random.Random(have)
+        min_lon, min_lat, max_lon, max_lat = BENCH_BBOX
+        created = 0
+        while created < missing:
+            farm_total = min(batch_size // fields_per_farm, -(-(missing - created) // fields_per_farm)) or 1
+            farms, fields = [], []
+            for _ in range(farm_total):
+                lon, lat = rng.uniform(min_lon, max_lon), rng.uniform(min_lat, max_lat)
+                farm = Farm(
+                    owner=rng.choice(owners), community=community, name='Benchmark farm',
+                    coordinates=Polygon.from_bbox((lon, lat, lon + 0.01, lat + 0.01)),
+                )
+                farms.append(farm)
+                for _ in range(fields_per_farm):
+                    x, y = lon + rng.uniform(0, 0.009), lat + rng.uniform(0, 0.009)
+                    fields.append(FieldBoundary(farm=farm, boundary=Polygon.from_bbox((x, y, x + 0.001, y + 0.001))))
+            Farm.objects.bulk_create(farms)
+            FieldBoundary.objects.bulk_create(fields[:missing - created])
+            created += min(len(fields), missing - created)
+            self.stdout.write(f"Seeded {created}/{missing} fields")
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Farm._meta.db_table}")
+            cursor.execute(f"ANALYZE {FieldBoundary._meta.db_table}")
@@ -0,0 +1,174 @@
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.utils.field_import import iter_features, repair_polygons
+from api.utils.providers import SOILGRIDS_PROVIDERS, SyntheticProvider, check_providers, get_provider
+from base.models import FieldBoundary
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure latency and throughput of each SoilGrids provider on a corpus of "
+        "polygons, per region, bypassing the soil cache. The corpus is generated "
+        "inside SOIL_TILE_REGIONS, read from a file (--corpus) or sampled from "
+        "stored fields (--from-db)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--provider', action='append', dest='providers',
+                            help=f"Provider to benchmark (repeatable; default: all of {', '.join(SOILGRIDS_PROVIDERS)}).")
+        parser.add_argument('--region', action='append', dest='regions',
+                            help="Region from SOIL_TILE_REGIONS to generate polygons in (repeatable; default: all).")
+        parser.add_argument('--corpus', help="GeoJSON/GeoPackage/zipped Shapefile of polygons to use instead.")
+        parser.add_argument('--from-db', type=int, metavar='N', help="Sample N stored field boundaries instead.")
+        parser.add_argument('--count', type=int, default=100, help="Polygons generated per region.")
+        parser.add_argument('--field-size', type=float, default=0.002, help="Generated field size in degrees.")
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--concurrency', type=int, default=1, help="Parallel single-polygon requests.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        names = options['providers'] or list(SOILGRIDS_PROVIDERS)
+        unknown = set(names) - set(SOILGRIDS_PROVIDERS)
+        if unknown:
+            raise CommandError(f"Unknown provider(s): {', '.join(sorted(unknown))}")
+
+        health = check_providers(names)
+        for name, result in health.items():
+            if not result['ok']:
+                self.stderr.write(f"Skipping {name}: {result['detail']}")
+        names = [name for name in names if health[name]['ok']]
+
+        results = []
+        for corpus_name, polygons in self.corpora(options).items():
+            for name in names:
+                results.append({
+                    'region': corpus_name,
+                    'provider': name,
+                    **self.measure(get_provider(name), polygons, options),
+                })
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.report(results)
+
+    def corpora(self, options):
+        if options['corpus']:
+            polygons = [
+                json.loads(polygon.geojson)
+                for geometry, _ in iter_features(options['corpus'])
+                for polygon in repair_polygons(geometry)[0]
+            ]
+            return {options['corpus']: polygons}
+        if options['from_db']:
+            fields = FieldBoundary.objects.order_by('?').values_list('boundary', flat=True)[:options['from_db']]
+            return {'stored fields': [json.loads(boundary.geojson) for boundary in fields]}
+
+        configured = getattr(settings, 'SOIL_TILE_REGIONS', {})
+        regions = options['regions'] or list(configured)
+        unknown = set(regions) - set(configured)
+        if unknown:
+            raise CommandError(f"Unknown region(s): {', '.join(sorted(unknown))}")
+        rng = random.Random(options['seed'])
+        size = options['field_size']
+        corpora = {}
+        for region in regions:
+            min_lon, min_lat, max_lon, max_lat = configured[region]
+            polygons = []
+            for _ in range(options['count']):
+                x, y = rng.uniform(min_lon, max_lon - size), rng.uniform(min_lat, max_lat - size)
+                polygons.append({'type': 'Polygon', 'coordinates': [[
+                    [x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y],
+                ]]})
+            corpora[region] = polygons
+        return corpora
+
+    def measure(self, provider, polygons, options):
+        latencies, carbon, errors, empty = [], [], 0, 0
+
+        def single(polygon):
+            started = time.monotonic()
+            stats = provider.fetch_stats(polygon)
+            return time.monotonic() - started, stats
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            futures = [pool.submit(single, polygon) for polygon in polygons]
+            for future in futures:
+                try:
+                    elapsed, stats = future.result()
+                except Exception:
+                    errors += 1
+                    continue
+                latencies.append(elapsed * 1000)
+                empty += all(value is None for value in stats.values())
+                if stats.get('organic_carbon') is not None:
+                    carbon.append(stats['organic_carbon'])
+        single_seconds = time.monotonic() - started
+
+        batch_size = options['batch_size']
+        started = time.monotonic()
+        batch_errors = 0
+        for i in range(0, len(polygons), batch_size):
+            try:
+                provider.fetch_stats_batch(polygons[i:i + batch_size])
+            except Exception:
+                batch_errors += 1
+        batch_seconds = time.monotonic() - started
+
+        return {
+            'polygons': len(polygons),
+            'p50_ms': _percentile(latencies, 50),
+            'p95_ms': _percentile(latencies, 95),
+            'max_ms': max(latencies) if latencies else None,
+            'single_per_second': len(latencies) / single_seconds if single_seconds else None,
+            'batch_per_second': len(polygons) / batch_seconds if batch_seconds and not batch_errors else None,
+            # Providers return the same units, so this compares their data too
+            'median_organic_carbon': _percentile(carbon, 50),
+            'errors': errors,
+            'batch_errors': batch_errors,
+            'empty': empty,
+        }
+
+    def report(self, results):
+        def fmt(value, spec):
+            return format(value, spec) if value is not None else '-'.rjust(9)
+
+        self.stdout.write(
+            f"{'region':<16} {'provider':<12} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} "
+            f"{'single/s':>9} {'batch/s':>9} {'OC g/kg':>9} {'errors':>7} {'empty':>6}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['region']:<16} {row['provider']:<12} {row['polygons']:>5} "
+                f"{fmt(row['p50_ms'], '9.1f')} {fmt(row['p95_ms'], '9.1f')} {fmt(row['max_ms'], '9.1f')} "
+                f"{fmt(row['single_per_second'], '9.1f')} {fmt(row['batch_per_second'], '9.1f')} "
+                f"{fmt(row['median_organic_carbon'], '9.1f')} "
+                f"{row['errors'] + row['batch_errors']:>7} {row['empty']:>6}"
+            )
+
+        # Fastest real provider per region that answered without errors and with data
+        for region in dict.fromkeys(row['region'] for row in results):
+            usable = [
+                row for row in results
+                if row['region'] == region and not row['errors'] and not row['batch_errors']
+                and row['empty'] < row['polygons']
+                and not issubclass(SOILGRIDS_PROVIDERS[row['provider']], SyntheticProvider)
+            ]
+            if usable:
+                best = max(usable, key=lambda row: row['batch_per_second'] or 0)
+                self.stdout.write(self.style.SUCCESS(f"{region}: fastest usable provider is {best['provider']}"))
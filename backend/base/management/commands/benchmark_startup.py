@@ -0,0 +1,73 @@
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Modules that must not be imported while the app boots (slow or need the network)
+FORBIDDEN_AT_STARTUP = ('ee', 'googleapiclient')
+
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cold-start import time of the WSGI app in a fresh interpreter "
+        "(python -X importtime) and fail when it exceeds the budget or imports "
+        "modules that should load lazily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='main.wsgi', help="Module to import cold.")
+        parser.add_argument('--urls', action='store_true', help="Also load the URLconf (and so every view).")
+        parser.add_argument('--budget', type=float, default=getattr(settings, 'STARTUP_IMPORT_BUDGET_MS', 2000),
+                            help="Maximum total import time in ms.")
+        parser.add_argument('--runs', type=int, default=3, help="Take the fastest of this many runs.")
+        parser.add_argument('--top', type=int, default=15, help="Slowest top-level imports to list.")
+
+    def handle(self, *args, **options):
+        code = f"import {options['module']}"
+        if options['urls']:
+            code += f"; import {settings.ROOT_URLCONF}"
+
+        runs = [self.measure(code) for _ in range(options['runs'])]
+        total, modules = min(runs, key=lambda run: run[0])
+
+        top_level = sorted(
+            ((cumulative, name) for name, (cumulative, depth) in modules.items() if depth == 0),
+            reverse=True,
+        )
+        for cumulative, name in top_level[:options['top']]:
+            self.stdout.write(f"{cumulative / 1000:>9.1f} ms  {name}")
+
+        forbidden = sorted(name for name in modules if name.split('.')[0] in FORBIDDEN_AT_STARTUP)
+        self.stdout.write(f"Cold import of {options['module']}: {total / 1000:.1f} ms (budget {options['budget']:.0f} ms)")
+        if forbidden:
+            raise CommandError(f"Imported at startup but should load lazily: {', '.join(forbidden[:10])}")
+        if total / 1000 > options['budget']:
+            raise CommandError(f"Startup import time over budget by {total / 1000 - options['budget']:.1f} ms")
+        self.stdout.write(self.style.SUCCESS("Within budget"))
+
+    def measure(self, code):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'main.settings')}
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if proc.returncode:
+            raise CommandError(f"Importing failed:\n{proc.stderr[-2000:]}")
+
+        modules, total = {}, 0
+        for line in proc.stderr.splitlines():
+            match = IMPORTTIME_LINE.match(line)
+            if not match:
+                continue
+            cumulative, name = int(match.group(2)), match.group(4)
+            depth = (len(match.group(3)) - 1) // 2
+            modules[name] = (cumulative, depth)
+            if depth == 0:
+                total += cumulative
+        return total, modules
@@ -0,0 +1,91 @@
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.utils.providers import SOILGRIDS_LAYERS, earthengine, soilgrids_image
+from api.utils.soil_tiles import (
+    RESOLUTION, TILE_SIZE, get_tile_store, tile_bounds, tiles_for_bbox,
+)
+
+# Stand-in for masked pixels in the download; stored as NaN
+NODATA = -9999
+
+
+class Command(BaseCommand):
+    help = (
+        "Download the SoilGrids layers for the operating regions from Earth Engine "
+        "into the local tile store used by SOIL_ANALYSIS_ENGINE='local_tiles'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--region', action='append', dest='regions',
+                            help="Region name from SOIL_TILE_REGIONS (repeatable; default: all).")
+        parser.add_argument('--bbox', help="Extra area as min_lon,min_lat,max_lon,max_lat.")
+        parser.add_argument('--overwrite', action='store_true', help="Re-download tiles that already exist.")
+
+    def handle(self, *args, **options):
+        ee = earthengine()
+
+        regions = self.get_regions(options)
+        store = get_tile_store()
+        layers = list(SOILGRIDS_LAYERS)
+        image = soilgrids_image().unmask(NODATA).toFloat()
+
+        tiles = sorted({tile for bbox in regions.values() for tile in tiles_for_bbox(*bbox)})
+        self.stdout.write(f"{len(tiles)} tile(s) of {TILE_SIZE}x{TILE_SIZE} px for {', '.join(regions)}")
+
+        built = skipped = 0
+        for i, (tx, ty) in enumerate(tiles, 1):
+            if not options['overwrite'] and all(store.has_tile(layer, tx, ty) for layer in layers):
+                skipped += 1
+                continue
+            min_lon, _, _, max_lat = tile_bounds(tx, ty)
+            pixels = ee.data.computePixels({
+                'expression': image,
+                'fileFormat': 'NUMPY_NDARRAY',
+                'grid': {
+                    'dimensions': {'width': TILE_SIZE, 'height': TILE_SIZE},
+                    'affineTransform': {
+                        'scaleX': RESOLUTION, 'shearX': 0, 'translateX': min_lon,
+                        'shearY': 0, 'scaleY': -RESOLUTION, 'translateY': max_lat,
+                    },
+                    'crsCode': 'EPSG:4326',
+                },
+            })
+            for layer in layers:
+                data = np.asarray(pixels[layer], dtype=np.float32)
+                data[data == NODATA] = np.nan
+                store.write_tile(layer, tx, ty, data)
+            built += 1
+            self.stdout.write(f"[{i}/{len(tiles)}] tile {tx}_{ty}")
+
+        manifest = store.manifest()
+        manifest.update({
+            'resolution': RESOLUTION,
+            'tile_size': TILE_SIZE,
+            'layers': layers,
+            'regions': {**manifest.get('regions', {}), **regions},
+            'updated_at': timezone.now().isoformat(),
+        })
+        store.write_manifest(manifest)
+        self.stdout.write(self.style.SUCCESS(f"Built {built} tile(s), skipped {skipped} existing, in {store.root}"))
+
+    def get_regions(self, options):
+        configured = getattr(settings, 'SOIL_TILE_REGIONS', {})
+        names = options['regions'] or ([] if options['bbox'] else list(configured))
+        unknown = set(names) - set(configured)
+        if unknown:
+            raise CommandError(f"Unknown region(s): {', '.join(sorted(unknown))}")
+        regions = {name: tuple(configured[name]) for name in names}
+        if options['bbox']:
+            try:
+                bbox = tuple(float(v) for v in options['bbox'].split(','))
+            except ValueError:
+                bbox = ()
+            if len(bbox) != 4:
+                raise CommandError("--bbox must be min_lon,min_lat,max_lon,max_lat")
+            regions['bbox'] = bbox
+        if not regions:
+            raise CommandError("No regions configured in SOIL_TILE_REGIONS and no --bbox given.")
+        return regions
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.utils.providers import SOILGRIDS_PROVIDERS, check_providers
+
+
+class Command(BaseCommand):
+    help = "Health-check the registered SoilGrids providers (Earth Engine is initialized here if selected)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('providers', nargs='*', help=f"Default: all of {', '.join(SOILGRIDS_PROVIDERS)}.")
+
+    def handle(self, *args, **options):
+        unknown = set(options['providers']) - set(SOILGRIDS_PROVIDERS)
+        if unknown:
+            raise CommandError(f"Unknown provider(s): {', '.join(sorted(unknown))}")
+
+        report = check_providers(options['providers'] or None)
+        for name, result in report.items():
+            status = self.style.SUCCESS("ok") if result['ok'] else self.style.ERROR("FAIL")
+            self.stdout.write(f"{name:<12} {status:<4} {result['ms']:>8} ms  {result['detail']}")
+        if not all(result['ok'] for result in report.values()):
+            raise CommandError("Some providers are unhealthy")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.utils.soil_history import compact_soil_history
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply the soil history retention policy (settings.SOIL_HISTORY): drop "
+        "months older than RETENTION_DAYS and downsample months older than "
+        "RAW_DAYS to daily means. Meant to run daily, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--raw-days', type=int, help="Override SOIL_HISTORY['RAW_DAYS'].")
+        parser.add_argument('--retention-days', type=int, help="Override SOIL_HISTORY['RETENTION_DAYS'].")
+
+    def handle(self, *args, **options):
+        result = compact_soil_history(raw_days=options['raw_days'], retention_days=options['retention_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {result['deleted']} expired months, compacted {result['compacted']} months to daily samples"
+        ))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.utils.field_import import IMPORT_BATCH_SIZE, FieldImporter, FieldImportError
+from base.models import Farm
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import field boundaries from a GeoJSON, GeoPackage or zipped Shapefile. "
+        "Features are streamed, repaired, inserted in batches and queued for soil "
+        "analysis in batch jobs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--farm', help="Farm uuid for every feature (or the fallback with --farm-property).")
+        parser.add_argument('--farm-property', help="Feature property holding each feature's farm uuid.")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--no-analysis', action='store_true', help="Do not queue soil analyses.")
+
+    def handle(self, *args, **options):
+        farm = None
+        if options['farm']:
+            farm = Farm.objects.filter(pk=options['farm']).first()
+            if farm is None:
+                raise CommandError(f"Unknown farm {options['farm']}")
+
+        try:
+            importer = FieldImporter(
+                farm=farm,
+                farm_property=options['farm_property'],
+                batch_size=options['batch_size'],
+                analyze=not options['no_analysis'],
+                on_progress=self.progress,
+            )
+            result = importer.run(options['path'])
+        except FieldImportError as exc:
+            raise CommandError(str(exc))
+
+        for error in result['errors']:
+            self.stderr.write(f"feature {error['feature']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['imported']} fields from {result['read']} features in {result['seconds']}s "
+            f"({result['repaired']} repaired, {result['skipped']} skipped, "
+            f"{result['analysis_jobs']} soil analysis jobs queued)"
+        ))
+
+    def progress(self, stats):
+        self.stdout.write(
+            f"{stats['imported']} fields imported, {stats['read']} features read "
+            f"({stats['fields_per_second']} fields/s)"
+        )
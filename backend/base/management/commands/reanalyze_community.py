@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.utils.soil import REANALYSIS_BATCH_SIZE, reanalyze_fields
+from base.models import Community, FieldBoundary
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh soil data for every field of the given communities: identical "
+        "geometries are analyzed once, unique ones in batched provider requests, "
+        "and fields analyzed recently are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('communities', nargs='*', help="Community uuids.")
+        parser.add_argument('--all', action='store_true', help="Every active community.")
+        parser.add_argument('--max-age-days', type=int, default=getattr(settings, 'SOIL_REANALYSIS_MAX_AGE_DAYS', 30),
+                            help="Skip fields analyzed more recently than this.")
+        parser.add_argument('--force', action='store_true', help="Reanalyze fresh fields too.")
+        parser.add_argument('--batch-size', type=int, default=REANALYSIS_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['all']:
+            communities = list(Community.objects.filter(is_active=True))
+        elif options['communities']:
+            communities = list(Community.objects.filter(pk__in=options['communities']))
+            if len(communities) != len(set(options['communities'])):
+                raise CommandError("Unknown community uuid(s)")
+        else:
+            raise CommandError("Give community uuids or --all")
+
+        fresh_after = None if options['force'] else timezone.now() - timedelta(days=options['max_age_days'])
+        for community in communities:
+            self.stdout.write(f"{community.name}:")
+            stats = reanalyze_fields(
+                FieldBoundary.objects.filter(farm__community=community),
+                batch_size=options['batch_size'],
+                fresh_after=fresh_after,
+                on_progress=self.progress,
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"  {stats['analyzed']} fields reanalyzed ({stats['unique_geometries']} unique geometries, "
+                f"{stats['skipped_fresh']} fresh skipped, {stats['partial']} partial) in {stats['seconds']}s"
+            ))
+
+    def progress(self, stats):
+        self.stdout.write(
+            f"  {stats['analyzed']}/{stats['fields'] - stats['skipped_fresh']} fields, "
+            f"{stats['fields_per_second']} fields/s, ETA {stats['eta_seconds']}s"
+        )
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.models import Community
+from base.stats import refresh_community_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the materialized community aggregates behind "
+        "/communities/<uuid>/stats/ from the field boundaries. Signals keep them "
+        "current; run this periodically (e.g. nightly) to correct drift from "
+        "bulk SQL updates."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--community', action='append', dest='communities',
+                            help="Community uuid to refresh (repeatable; default: all).")
+
+    def handle(self, *args, **options):
+        ids = None
+        if options['communities']:
+            ids = list(Community.objects.filter(pk__in=options['communities']).values_list('pk', flat=True))
+            if len(ids) != len(set(options['communities'])):
+                raise CommandError("Unknown community uuid(s)")
+        started = time.monotonic()
+        count = refresh_community_stats(ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed aggregates of {count} communities in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,56 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from api.utils.jobs import claim_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (soil analyses etc.) from the Job table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Number of worker threads.")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--kind', action='append', dest='kinds', help="Only run jobs of this kind (repeatable).")
+        parser.add_argument('--stale-after', type=int, default=30, help="Requeue jobs stuck in 'running' for this many minutes.")
+        parser.add_argument('--once', action='store_true', help="Drain the jobs that are due now, then exit.")
+
+    def handle(self, *args, **options):
+        requeued, failed = requeue_stale_jobs(timezone.now() - timedelta(minutes=options['stale_after']))
+        if requeued or failed:
+            self.stdout.write(f"Requeued {requeued} stale job(s), failed {failed} out of attempts")
+
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=self.work, args=(stop, options), name=f"job-worker-{i}", daemon=True)
+            for i in range(options['workers'])
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Started {len(threads)} job worker(s)")
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            stop.set()
+            self.stdout.write("Stopping job workers...")
+            for thread in threads:
+                thread.join()
+
+    def work(self, stop, options):
+        while not stop.is_set():
+            close_old_connections()
+            job = claim_job(kinds=options['kinds'])
+            if job is None:
+                if options['once']:
+                    return
+                stop.wait(options['poll_interval'])
+                continue
+            started = time.monotonic()
+            job = run_job(job)
+            self.stdout.write(f"{job.kind} {job.pk}: {job.status} in {time.monotonic() - started:.2f}s")
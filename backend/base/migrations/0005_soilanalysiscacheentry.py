@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0004_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SoilAnalysisCacheEntry',
+            fields=[
+                ('key', models.CharField(max_length=128, primary_key=True, serialize=False)),
+                ('source', models.CharField(max_length=50)),
+                ('value', models.JSONField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Soil Analysis Cache Entry',
+                'verbose_name_plural': 'Soil Analysis Cache Entries',
+            },
+        ),
+    ]
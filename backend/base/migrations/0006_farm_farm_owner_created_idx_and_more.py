@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0005_soilanalysiscacheentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='farm',
+            index=models.Index(fields=['owner', '-created_at', '-uuid'], name='farm_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='farm',
+            index=models.Index(fields=['community', '-created_at', '-uuid'], name='farm_community_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fieldboundary',
+            index=models.Index(fields=['farm', '-created_at', '-uuid'], name='field_farm_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fieldboundary',
+            index=models.Index(fields=['-created_at', '-uuid'], name='field_created_idx'),
+        ),
+    ]
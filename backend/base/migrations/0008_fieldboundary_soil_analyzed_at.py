@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0007_job_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fieldboundary',
+            name='soil_analyzed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0008_fieldboundary_soil_analyzed_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommunityAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=32)),
+                ('bucket', models.CharField(blank=True, default='', max_length=64)),
+                ('value', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('community', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aggregates', to='base.community')),
+            ],
+            options={
+                'verbose_name': 'Community Aggregate',
+                'verbose_name_plural': 'Community Aggregates',
+                'constraints': [models.UniqueConstraint(fields=('community', 'metric', 'bucket'), name='community_aggregate_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:12
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0009_communityaggregate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fieldboundary',
+            name='sand_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='fieldboundary',
+            name='silt_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='fieldboundary',
+            name='clay_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='fieldboundary',
+            name='organic_carbon_value',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='fieldboundary',
+            name='recommended_crop_list',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=32), blank=True, null=True, size=None),
+        ),
+    ]
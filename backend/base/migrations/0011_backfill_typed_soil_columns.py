@@ -0,0 +1,81 @@
+import math
+import re
+
+from django.db import migrations
+
+BATCH_SIZE = 2000
+TEXTURE_RE = re.compile(r'([\d.]+)% sand, ([\d.]+)% silt, ([\d.]+)% clay')
+
+
+def _float(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def _percentages(values):
+    # Older texture strings hold raw SoilGrids means; scale them to sum to 100 like texture_percentages()
+    total = sum(values)
+    if not total:
+        return None, None, None
+    return tuple(round(100 * value / total, 1) for value in values)
+
+
+def backfill(apps, schema_editor):
+    """
+    Parse the texture string, text organic carbon and comma-joined crops into
+    the typed columns, and bring stored values to the units new analyses
+    write: percentages summing to 100 and pH as normalize_ph() returns it.
+    """
+    FieldBoundary = apps.get_model('base', 'FieldBoundary')
+    columns = ['sand_pct', 'silt_pct', 'clay_pct', 'soil_ph', 'organic_carbon_value', 'recommended_crop_list']
+    rows = (
+        FieldBoundary.objects
+        .only('pk', 'soil_texture', 'soil_ph', 'organic_carbon', 'recommended_crops')
+        .order_by('pk')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    batch = []
+    for field in rows:
+        match = TEXTURE_RE.search(field.soil_texture or '')
+        if match:
+            field.sand_pct, field.silt_pct, field.clay_pct = _percentages([float(v) for v in match.groups()])
+        if field.soil_ph is not None and field.soil_ph > 14:
+            # SoilGrids stores pH x 10
+            field.soil_ph = field.soil_ph / 10
+        field.organic_carbon_value = _float(field.organic_carbon)
+        if field.recommended_crops is not None:
+            field.recommended_crop_list = [c.strip() for c in field.recommended_crops.split(',') if c.strip()]
+        batch.append(field)
+        if len(batch) >= BATCH_SIZE:
+            FieldBoundary.objects.bulk_update(batch, columns)
+            batch = []
+    if batch:
+        FieldBoundary.objects.bulk_update(batch, columns)
+
+
+def restore(apps, schema_editor):
+    FieldBoundary = apps.get_model('base', 'FieldBoundary')
+    batch = []
+    for field in FieldBoundary.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        field.organic_carbon = None if field.organic_carbon_value is None else str(field.organic_carbon_value)
+        field.recommended_crops = None if field.recommended_crop_list is None else ', '.join(field.recommended_crop_list)
+        batch.append(field)
+        if len(batch) >= BATCH_SIZE:
+            FieldBoundary.objects.bulk_update(batch, ['organic_carbon', 'recommended_crops'])
+            batch = []
+    if batch:
+        FieldBoundary.objects.bulk_update(batch, ['organic_carbon', 'recommended_crops'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0010_fieldboundary_typed_soil_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, restore),
+    ]
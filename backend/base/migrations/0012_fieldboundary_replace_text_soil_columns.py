@@ -0,0 +1,48 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:14
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0011_backfill_typed_soil_columns'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='fieldboundary',
+            name='organic_carbon',
+        ),
+        migrations.RemoveField(
+            model_name='fieldboundary',
+            name='recommended_crops',
+        ),
+        migrations.RenameField(
+            model_name='fieldboundary',
+            old_name='organic_carbon_value',
+            new_name='organic_carbon',
+        ),
+        migrations.RenameField(
+            model_name='fieldboundary',
+            old_name='recommended_crop_list',
+            new_name='recommended_crops',
+        ),
+        migrations.AddIndex(
+            model_name='fieldboundary',
+            index=models.Index(fields=['soil_ph'], name='field_soil_ph_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fieldboundary',
+            index=models.Index(fields=['organic_carbon'], name='field_organic_carbon_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fieldboundary',
+            index=models.Index(fields=['soil_type'], name='field_soil_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fieldboundary',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['recommended_crops'], name='field_crops_gin'),
+        ),
+    ]
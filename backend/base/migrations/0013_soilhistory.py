@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:58
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0012_fieldboundary_replace_text_soil_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SoilHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('offsets', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=list, size=None)),
+                ('moisture', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(null=True), default=list, size=None)),
+                ('soil_ph', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(null=True), default=list, size=None)),
+                ('organic_carbon', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(null=True), default=list, size=None)),
+                ('sand_pct', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(null=True), default=list, size=None)),
+                ('silt_pct', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(null=True), default=list, size=None)),
+                ('clay_pct', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(null=True), default=list, size=None)),
+                ('compacted', models.BooleanField(default=False)),
+                ('field', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='soil_history', to='base.fieldboundary')),
+            ],
+            options={
+                'verbose_name': 'Soil History',
+                'verbose_name_plural': 'Soil History',
+                'indexes': [models.Index(fields=['month', 'compacted'], name='soil_history_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('field', 'month'), name='soil_history_field_month_unique')],
+            },
+        ),
+    ]
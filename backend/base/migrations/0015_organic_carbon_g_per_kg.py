@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:40
+
+from django.db import migrations
+
+# Earth Engine results were stored in SoilGrids mapped units (dg/kg); providers
+# now return g/kg. Community aggregates bin organic carbon, so run
+# `manage.py refresh_community_stats` after migrating.
+FIELDS_SQL = "UPDATE base_fieldboundary SET organic_carbon = organic_carbon {op} 10 WHERE organic_carbon IS NOT NULL"
+HISTORY_SQL = (
+    "UPDATE base_soilhistory SET organic_carbon = ARRAY("
+    "SELECT u.value {op} 10 FROM unnest(organic_carbon) WITH ORDINALITY AS u(value, i) ORDER BY u.i"
+    ")::double precision[]"
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0014_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [FIELDS_SQL.format(op='/'), HISTORY_SQL.format(op='/')],
+            [FIELDS_SQL.format(op='*'), HISTORY_SQL.format(op='*')],
+        ),
+    ]
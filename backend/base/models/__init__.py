@@ -1,3 +1,7 @@
 from .farm import *
 from .user import *
-from .fieldboundary import *
\ No newline at end of file
+from .fieldboundary import *
+from .job import *
+from .cache import *
+from .stats import *
+from .history import *
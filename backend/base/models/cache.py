@@ -0,0 +1,20 @@
+from django.db import models
+
+class SoilAnalysisCacheEntry(models.Model):
+    """
+    Cached soil data for one normalized geometry and data source, used by
+    api.utils.soil_cache.DatabaseCacheBackend.
+    """
+    key = models.CharField(max_length=128, primary_key=True)
+    source = models.CharField(max_length=50)
+    value = models.JSONField()
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Soil Analysis Cache Entry'
+        verbose_name_plural = 'Soil Analysis Cache Entries'
+
+    def __str__(self):
+        return self.key
+
@@ -13,12 +13,19 @@ class Farm(models.Model):
 
     community = models.ForeignKey('Community', on_delete=models.CASCADE, related_name='farms', null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Version stamp for ETags / response caching
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Farm'
         verbose_name_plural = 'Farms'
         ordering = ['-created_at']
-        
+        # Match the list access paths: scope filter + keyset order (created_at, uuid)
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-uuid'], name='farm_owner_created_idx'),
+            models.Index(fields=['community', '-created_at', '-uuid'], name='farm_community_created_idx'),
+        ]
+
     def __str__(self):
         return self.name
     
\ No newline at end of file
@@ -1,7 +1,11 @@
 from django.db import models
 from django.contrib.gis.db import models as gis_models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 import uuid
 
+from ..area import polygon_area_hectares
+
 class FieldBoundary(models.Model):
     uuid = models.UUIDField(primary_key=True, editable=False, default=uuid.uuid4)
     farm = models.ForeignKey('Farm', on_delete=models.CASCADE, related_name='field_boundaries')
@@ -13,25 +17,50 @@ class FieldBoundary(models.Model):
     area_hectares = models.FloatField(help_text="Size of the field in hectares", null=True, blank=True)
 
     soil_type = models.CharField(max_length=100, null=True, blank=True)
+    # Display string, e.g. '40% sand, 40% silt, 20% clay'; filter on the *_pct columns
     soil_texture = models.CharField(max_length=100, null=True, blank=True)
+    sand_pct = models.FloatField(null=True, blank=True)
+    silt_pct = models.FloatField(null=True, blank=True)
+    clay_pct = models.FloatField(null=True, blank=True)
     soil_ph = models.FloatField(null=True, blank=True)
-    organic_carbon = models.CharField(max_length=100, null=True, blank=True)
+    organic_carbon = models.FloatField(null=True, blank=True)
 
-    recommended_crops = models.TextField(null=True, blank=True)
+    # Best first, e.g. ['Maize', 'Sorghum']
+    recommended_crops = ArrayField(models.CharField(max_length=32), null=True, blank=True)
+    # When the soil attributes were last refreshed from the providers
+    soil_analyzed_at = models.DateTimeField(null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # Version stamp for ETags / response caching; bulk writes must set it too
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Field Boundary'
         verbose_name_plural = 'Field Boundaries'
         ordering = ['-created_at']
+        # Owner/community scopes join through farm, then walk this in keyset order
+        indexes = [
+            models.Index(fields=['farm', '-created_at', '-uuid'], name='field_farm_created_idx'),
+            models.Index(fields=['-created_at', '-uuid'], name='field_created_idx'),
+            # Soil filters (see api.filters.SoilFilterBackend)
+            models.Index(fields=['soil_ph'], name='field_soil_ph_idx'),
+            models.Index(fields=['organic_carbon'], name='field_organic_carbon_idx'),
+            models.Index(fields=['soil_type'], name='field_soil_type_idx'),
+            GinIndex(fields=['recommended_crops'], name='field_crops_gin'),
+        ]
 
     def __str__(self):
-        return f"Field in {self.farm.name} - {round(self.area_hectares, 2)} ha"
+        # Reads self.farm: use select_related('farm') when listing many fields
+        area = f"{round(self.area_hectares, 2)} ha" if self.area_hectares is not None else "unknown area"
+        return f"Field in {self.farm.name} - {area}"
     
     def save(self, *args, **kwargs):
-        if self.boundary:
-            # Transform to SRID 3857 for accurate area calculation in meters²
-            projected = self.boundary.transform(3857, clone=True)
-            self.area_hectares = projected.area / 10000  # convert m² to hectares
+        update_fields = kwargs.get('update_fields')
+        if self.boundary and (update_fields is None or 'boundary' in update_fields):
+            # Geodesic area on the WGS84 ellipsoid, computed in memory (no GDAL transform)
+            self.area_hectares = polygon_area_hectares(self.boundary)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'area_hectares'}
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'updated_at'}
         super().save(*args, **kwargs)
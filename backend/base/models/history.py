@@ -0,0 +1,39 @@
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+
+class SoilHistory(models.Model):
+    """
+    Soil analysis results of one field for one calendar month (UTC), stored
+    as parallel arrays: sample i was taken `offsets[i]` seconds after the
+    start of `month` and measured `moisture[i]`, `soil_ph[i]`, ... (NULL when
+    that provider failed). Each run appends to the arrays instead of adding a
+    row. Once a month is older than the raw retention window it is compacted
+    to one averaged sample per day (see api.utils.soil_history).
+    """
+    field = models.ForeignKey('FieldBoundary', on_delete=models.CASCADE, related_name='soil_history')
+    month = models.DateField()
+
+    offsets = ArrayField(models.IntegerField(), default=list)
+    moisture = ArrayField(models.FloatField(null=True), default=list)
+    soil_ph = ArrayField(models.FloatField(null=True), default=list)
+    organic_carbon = ArrayField(models.FloatField(null=True), default=list)
+    sand_pct = ArrayField(models.FloatField(null=True), default=list)
+    silt_pct = ArrayField(models.FloatField(null=True), default=list)
+    clay_pct = ArrayField(models.FloatField(null=True), default=list)
+
+    # True once samples were downsampled to daily means
+    compacted = models.BooleanField(default=False)
+
+    class Meta:
+        verbose_name = 'Soil History'
+        verbose_name_plural = 'Soil History'
+        constraints = [
+            models.UniqueConstraint(fields=['field', 'month'], name='soil_history_field_month_unique'),
+        ]
+        indexes = [
+            # Retention and compaction walk whole months
+            models.Index(fields=['month', 'compacted'], name='soil_history_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.field_id} {self.month:%Y-%m} ({len(self.offsets)} samples)"
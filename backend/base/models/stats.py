@@ -0,0 +1,23 @@
+from django.db import models
+
+class CommunityAggregate(models.Model):
+    """
+    One incrementally maintained dashboard counter of a community, e.g.
+    ('crop', 'Maize') -> 120 fields or ('hectares', '') -> 5230.5. Kept up to
+    date by base.stats.
+    """
+    community = models.ForeignKey('Community', on_delete=models.CASCADE, related_name='aggregates')
+    metric = models.CharField(max_length=32)
+    bucket = models.CharField(max_length=64, blank=True, default='')
+    value = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Community Aggregate'
+        verbose_name_plural = 'Community Aggregates'
+        constraints = [
+            models.UniqueConstraint(fields=['community', 'metric', 'bucket'], name='community_aggregate_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.community_id} {self.metric}:{self.bucket} = {self.value}"
@@ -56,6 +56,8 @@ class Community(models.Model):
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
     
     created = models.DateTimeField(auto_now_add=True)
+    # Version stamp for ETags / response caching
+    updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)  # Optional
 
     class Meta:
@@ -0,0 +1,101 @@
+from collections import Counter
+
+from django.db.models.signals import post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Community, Farm, FieldBoundary
+from .stats import STATS_COLUMNS, apply_delta, apply_field_changes, field_contribution
+
+# Saves limited to other columns leave the community aggregates unchanged
+AGGREGATED_FIELDS = {*STATS_COLUMNS, 'boundary', 'farm', 'farm_id'}
+
+
+# -------------------- COMMUNITY AGGREGATES -------------------- #
+
+def _deleting_community(origin):
+    # The aggregates go with the community; nothing to subtract
+    return isinstance(origin, Community) or getattr(origin, 'model', None) is Community
+
+
+def _deleted_with_farm(origin):
+    # Fields cascaded from a farm (or its owner) are subtracted by farm_stats_deleted
+    return origin is not None and not isinstance(origin, FieldBoundary) and getattr(origin, 'model', None) is not FieldBoundary
+
+
+def _contribution(instance):
+    return field_contribution(*(getattr(instance, column) for column in STATS_COLUMNS))
+
+
+def _farm_community(instance, before=None):
+    """Community id of a field's farm, looked up only when neither the loaded farm nor the pre-save row has it."""
+    if FieldBoundary.farm.is_cached(instance):
+        return instance.farm.community_id
+    if before is not None and before[0] == instance.farm_id:
+        return before[1]
+    return Farm.objects.filter(pk=instance.farm_id).values_list('community_id', flat=True).first()
+
+
+def _farm_contribution(farm):
+    """Counter of everything a farm and its fields add to its community's aggregates, in one query."""
+    counts = Counter({('farms', ''): 1})
+    for row in FieldBoundary.objects.filter(farm=farm).values_list(*STATS_COLUMNS):
+        counts.update(field_contribution(*row))
+    return counts
+
+
+@receiver(pre_save, sender=FieldBoundary)
+def field_stats_before(sender, instance, update_fields=None, **kwargs):
+    instance._stats_before = instance._farm_before = None
+    if instance._state.adding or (update_fields is not None and not AGGREGATED_FIELDS & set(update_fields)):
+        return
+    row = (
+        FieldBoundary.objects.filter(pk=instance.pk)
+        .values_list('farm_id', 'farm__community_id', *STATS_COLUMNS)
+        .first()
+    )
+    if row is not None:
+        instance._farm_before = row[:2]
+        instance._stats_before = (row[1], field_contribution(*row[2:]))
+
+
+@receiver(post_save, sender=FieldBoundary)
+def field_stats_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not AGGREGATED_FIELDS & set(update_fields):
+        return
+    after = (_farm_community(instance, getattr(instance, '_farm_before', None)), _contribution(instance))
+    apply_field_changes(getattr(instance, '_stats_before', None), after)
+
+
+@receiver(pre_delete, sender=FieldBoundary)
+def field_stats_deleted(sender, instance, origin=None, **kwargs):
+    if _deleting_community(origin) or _deleted_with_farm(origin):
+        return
+    apply_field_changes((_farm_community(instance), _contribution(instance)), None)
+
+
+@receiver(pre_save, sender=Farm)
+def farm_community_before(sender, instance, **kwargs):
+    instance._community_before = None
+    if not instance._state.adding:
+        instance._community_before = Farm.objects.filter(pk=instance.pk).values_list('community_id', flat=True).first()
+
+
+@receiver(post_save, sender=Farm)
+def farm_stats_saved(sender, instance, created=False, **kwargs):
+    if created:
+        apply_delta(instance.community_id, {('farms', ''): 1})
+        return
+    before = getattr(instance, '_community_before', None)
+    if before != instance.community_id:
+        # The farm moved its fields along
+        contribution = _farm_contribution(instance)
+        apply_field_changes((before, contribution), (instance.community_id, contribution))
+
+
+@receiver(pre_delete, sender=Farm)
+def farm_stats_deleted(sender, instance, origin=None, **kwargs):
+    # Subtracts the farm's fields too, which field_stats_deleted skips when they cascade
+    if not _deleting_community(origin):
+        delta = Counter()
+        delta.subtract(_farm_contribution(instance))
+        apply_delta(instance.community_id, delta)
@@ -0,0 +1,132 @@
+import math
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+
+from .models import Community, CommunityAggregate, Farm, FieldBoundary
+
+# Histogram bin widths; a bin is stored under its lower bound
+PH_BIN = 0.5
+ORGANIC_CARBON_BIN = 5
+# FieldBoundary columns the aggregates are computed from
+STATS_COLUMNS = ('area_hectares', 'soil_ph', 'organic_carbon', 'soil_type', 'recommended_crops')
+
+
+def _bin(value, width):
+    return format(math.floor(value / width) * width, 'g')
+
+
+def field_contribution(area_hectares, soil_ph, organic_carbon, soil_type, recommended_crops):
+    """Counter of (metric, bucket) -> amount one field adds to its community's aggregates."""
+    counts = Counter({('fields', ''): 1})
+    if area_hectares:
+        counts['hectares', ''] += area_hectares
+    if soil_ph is not None:
+        counts['ph', _bin(soil_ph, PH_BIN)] += 1
+    if organic_carbon is not None:
+        counts['organic_carbon', _bin(organic_carbon, ORGANIC_CARBON_BIN)] += 1
+    if soil_type:
+        counts['analyzed', ''] += 1
+        counts['texture', soil_type[:64]] += 1
+    for crop in recommended_crops or ():
+        counts['crop', crop] += 1
+    return counts
+
+
+def _upsert(community_id, rows, assignment):
+    table = connection.ops.quote_name(CommunityAggregate._meta.db_table)
+    values = ', '.join(['(%s, %s, %s, %s, now())'] * len(rows))
+    params = [p for metric, bucket, amount in rows for p in (community_id, metric, bucket, amount)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} AS a (community_id, metric, bucket, value, updated_at) VALUES {values} "
+            f"ON CONFLICT (community_id, metric, bucket) DO UPDATE SET value = {assignment}, updated_at = now()",
+            params,
+        )
+
+
+def apply_delta(community_id, delta):
+    """
+    Add `delta` ({(metric, bucket): amount}) to a community's aggregates with
+    one INSERT ... ON CONFLICT statement, so concurrent writers never lose
+    an update.
+    """
+    rows = [(metric, bucket, amount) for (metric, bucket), amount in delta.items() if amount]
+    if community_id is None or not rows:
+        return
+    _upsert(community_id, rows, 'a.value + EXCLUDED.value')
+
+
+def apply_field_changes(before, after):
+    """
+    Move a field's contribution: `before` and `after` are (community id,
+    field_contribution) pairs, or None for a field that did not / no longer exist.
+    """
+    deltas = defaultdict(Counter)
+    if before is not None and before[0] is not None:
+        deltas[before[0]].subtract(before[1])
+    if after is not None and after[0] is not None:
+        deltas[after[0]].update(after[1])
+    for community_id, delta in deltas.items():
+        apply_delta(community_id, delta)
+
+
+def add_fields(fields):
+    """Add freshly bulk-created FieldBoundary objects (which skip post_save) to the aggregates."""
+    farm_ids = {field.farm_id for field in fields}
+    communities = dict(Farm.objects.filter(pk__in=farm_ids).values_list('pk', 'community_id'))
+    deltas = defaultdict(Counter)
+    for field in fields:
+        community_id = communities.get(field.farm_id)
+        if community_id is not None:
+            deltas[community_id].update(field_contribution(*(getattr(field, c) for c in STATS_COLUMNS)))
+    for community_id, delta in deltas.items():
+        apply_delta(community_id, delta)
+
+
+def apply_field_updates(before, updates):
+    """
+    Move the contributions of fields changed by a bulk update (which skips
+    post_save): `before` maps pk -> (community id, *STATS_COLUMNS) as read
+    before the update, `updates` maps pk -> {column: new value}. Call it in
+    the transaction that writes the fields.
+    """
+    deltas = defaultdict(Counter)
+    for pk, changes in updates.items():
+        if pk not in before:
+            continue
+        community_id, *values = before[pk]
+        if community_id is None:
+            continue
+        after = [changes.get(column, value) for column, value in zip(STATS_COLUMNS, values)]
+        deltas[community_id].subtract(field_contribution(*values))
+        deltas[community_id].update(field_contribution(*after))
+    for community_id, delta in deltas.items():
+        apply_delta(community_id, delta)
+
+
+def refresh_community_stats(community_ids=None):
+    """
+    Recompute the aggregates of the given communities (default: all) from
+    scratch, correcting any drift from bulk updates that bypass the signals.
+    The community's aggregate rows stay locked while it is rescanned, so
+    concurrent apply_delta upserts wait and then add to the new totals.
+    Returns the number of communities refreshed.
+    """
+    if community_ids is None:
+        community_ids = list(Community.objects.values_list('pk', flat=True))
+    community_ids = [pk for pk in set(community_ids) if pk is not None]
+    for community_id in community_ids:
+        with transaction.atomic():
+            locked = CommunityAggregate.objects.select_for_update().filter(community_id=community_id)
+            existing = {(metric, bucket): pk for pk, metric, bucket in locked.values_list('pk', 'metric', 'bucket')}
+            totals = Counter({('farms', ''): Farm.objects.filter(community_id=community_id).count()})
+            fields = FieldBoundary.objects.filter(farm__community_id=community_id).values_list(*STATS_COLUMNS)
+            for row in fields.iterator(chunk_size=2000):
+                totals.update(field_contribution(*row))
+            rows = [(metric, bucket, value) for (metric, bucket), value in totals.items()]
+            _upsert(community_id, rows, 'EXCLUDED.value')
+            stale = [pk for key, pk in existing.items() if key not in totals]
+            if stale:
+                CommunityAggregate.objects.filter(pk__in=stale).delete()
+    return len(community_ids)
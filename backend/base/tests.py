@@ -1,3 +1,713 @@
-from django.test import TestCase
+import json
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.gis.geos import GEOSGeometry, Polygon
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from api import fastpath
+from api.authentication import user_cache_key
+from api.renderers import ORJSONRenderer
+from api.serializers.user import CustomTokenObtainPairSerializer
+from api.utils import jobs
+from api.utils.analytics_export import AnalyticsExportError, layer_schema, record_batches
+from api.utils.soil_history import compact_soil_history, field_history, record_soil_history
+from api.utils.soil_classification import TEXTURE_CLASSES, classify_soils, classify_texture
+from api.views import FarmViewSet, FieldBoundaryViewSet
+from base.models import Community, CommunityAggregate, Farm, FieldBoundary, Job, SoilHistory, User
+from base.stats import STATS_COLUMNS, field_contribution, refresh_community_stats
+
+
+def square(x, y, size=0.01):
+    return Polygon.from_bbox((x, y, x + size, y + size))
+
+
+class ListQueryCountTests(APITestCase):
+    """
+    The farm and field lists run a fixed number of queries whatever the
+    number of farms and fields: one version aggregate per versioned
+    queryset (ETag), the page itself, and one query per nested relation.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='farmer', email='farmer@example.com', password='x')
+        self.client.force_authenticate(self.user)
+
+    def add_farms(self, count, fields_per_farm=3):
+        for i in range(count):
+            farm = Farm.objects.create(owner=self.user, name=f"Farm {i}", coordinates=square(i, 0, 1))
+            for j in range(fields_per_farm):
+                FieldBoundary.objects.create(farm=farm, boundary=square(i + j * 0.1, 0.1))
+
+    def assertListQueries(self, url, expected):
+        for fast_list in (True, False):
+            with self.subTest(url=url, fast_list=fast_list), \
+                    mock.patch.object(FarmViewSet, 'fast_list', fast_list), \
+                    mock.patch.object(FieldBoundaryViewSet, 'fast_list', fast_list):
+                # A cached response would skip the page queries
+                cache.clear()
+                with self.assertNumQueries(expected):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_farm_list_with_nested_field_boundaries(self):
+        # farm version, nested boundaries version, farm page, nested boundaries
+        for farms in (1, 5, 20):
+            self.add_farms(farms)
+            self.assertListQueries('/api/v1/farms/', 4)
+
+    def test_farm_list_without_nested_field_boundaries(self):
+        # farm version, farm page
+        for farms in (1, 5, 20):
+            self.add_farms(farms)
+            self.assertListQueries('/api/v1/farms/?omit=field_boundaries', 2)
+
+    def test_field_boundary_list(self):
+        # field version, field page (farm selected in the same query)
+        for farms in (1, 5, 20):
+            self.add_farms(farms)
+            self.assertListQueries('/api/v1/field-boundaries/', 2)
+
+
+class FastListParityTests(APITestCase):
+    """The fast list path returns the same data as the serializers for every list variant."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='farmer', email='farmer@example.com', password='x')
+        self.client.force_authenticate(self.user)
+        for i in range(3):
+            farm = Farm.objects.create(owner=self.user, name=f"Farm {i}", coordinates=square(i, 0, 1))
+            FieldBoundary.objects.create(
+                farm=farm, boundary=square(i + 0.1, 0.1, 0.123456789), area_hectares=0.00001 * (i + 1),
+                soil_type='Loam', soil_texture='40% sand, 40% silt, 20% clay',
+                sand_pct=40.0, silt_pct=40.0, clay_pct=20.0, soil_ph=6.55, organic_carbon=1.5e-7,
+                recommended_crops=['maize', 'beans'], soil_analyzed_at=timezone.now(),
+            )
+            FieldBoundary.objects.create(farm=farm, boundary=square(i + 0.5, 0.5))
+
+    def get(self, url, fast_list):
+        with mock.patch.object(FarmViewSet, 'fast_list', fast_list), \
+                mock.patch.object(FieldBoundaryViewSet, 'fast_list', fast_list):
+            cache.clear()
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def assertSameData(self, url):
+        with self.subTest(url=url):
+            self.assertEqual(self.get(url, fast_list=True), self.get(url, fast_list=False))
+
+    def test_field_boundary_list(self):
+        for query in ('', 'page_size=1000', 'include_geometry=false',
+                      'fields=uuid,area_hectares,recommended_crops', 'zoom=12', 'precision=6'):
+            self.assertSameData(f'/api/v1/field-boundaries/?{query}')
+
+    def test_farm_list(self):
+        for query in ('', 'page_size=1000', 'omit=field_boundaries', 'include_geometry=false', 'zoom=12'):
+            self.assertSameData(f'/api/v1/farms/?{query}')
+
+
+class ConditionalGetTests(APITestCase):
+    """ETags and Last-Modified answer 304s, change with the data and never cross users."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='farmer', email='farmer@example.com', password='x')
+        self.farm = Farm.objects.create(owner=self.user, name="Farm", coordinates=square(0, 0, 1))
+        self.field = FieldBoundary.objects.create(farm=self.farm, boundary=square(0.1, 0.1))
+        self.client.force_authenticate(self.user)
+        cache.clear()
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_if_none_match_returns_304(self):
+        for url in ('/api/v1/farms/', f'/api/v1/farms/{self.farm.pk}/', '/api/v1/field-boundaries/'):
+            with self.subTest(url=url):
+                etag = self.etag(url)
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_if_modified_since_returns_304(self):
+        last_modified = self.client.get('/api/v1/farms/')['Last-Modified']
+        self.assertEqual(self.client.get('/api/v1/farms/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_etag_changes_on_edit_insert_and_delete(self):
+        url = '/api/v1/farms/?omit=field_boundaries'
+        etags = [self.etag(url)]
+        self.farm.name = "Renamed"
+        self.farm.save()
+        etags.append(self.etag(url))
+        other = Farm.objects.create(owner=self.user, name="Other", coordinates=square(2, 2))
+        etags.append(self.etag(url))
+        other.delete()
+        etags.append(self.etag(url))
+        self.assertEqual(len(set(etags)), len(etags))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etags[0]).status_code, 200)
+
+    def test_responses_are_cached_per_user(self):
+        neighbour = User.objects.create_user(username='neighbour', email='n@example.com', password='x')
+        Farm.objects.create(owner=neighbour, name="Neighbour farm", coordinates=square(3, 3))
+        etag = self.etag('/api/v1/farms/')
+
+        self.client.force_authenticate(neighbour)
+        response = self.client.get('/api/v1/farms/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([farm['name'] for farm in response.json()['results']], ["Neighbour farm"])
+
+    def test_nested_field_boundary_edit_changes_farm_etag(self):
+        nested = f'/api/v1/farms/{self.farm.pk}/'
+        omitted = f'/api/v1/farms/{self.farm.pk}/?omit=field_boundaries'
+        before = self.etag(nested), self.etag(omitted)
+        self.field.soil_type = 'Clay'
+        self.field.save()
+        self.assertNotEqual(self.etag(nested), before[0])
+        self.assertEqual(self.client.get(nested).json()['field_boundaries']['features'][0]['properties']['soil_type'], 'Clay')
+        # The farm row itself did not change
+        self.assertEqual(self.etag(omitted), before[1])
+
+    def test_community_admin_edit_changes_community_etag(self):
+        admin = User.objects.create_user(username='admin', email='admin@example.com', password='x', role='community')
+        community = Community.objects.create(name="Valley", email='v@example.com', latitude=0, longitude=0, admin=admin)
+        url = f'/api/v1/users/communities/{community.pk}/'
+        etag = self.etag(url)
+
+        admin.save(update_fields=['last_login'])
+        self.assertEqual(self.etag(url), etag)
+
+        admin.first_name = 'Amina'
+        admin.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['admin']['first_name'], 'Amina')
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    """Cached token users are dropped on saves, and stale role/community claims are rejected."""
+    url = '/api/v1/users/auth/profile/'
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com', password='x', role='community')
+        self.community = Community.objects.create(name="Valley", email='v@example.com', latitude=0, longitude=0, admin=self.admin)
+
+    def login(self, user):
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def get(self):
+        return self.client.get(self.url)
+
+    def assertRejected(self, response, code):
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], code)
+
+    def test_valid_token_is_cached(self):
+        self.login(self.admin)
+        self.assertEqual(self.get().status_code, 200)
+        self.assertIsNotNone(cache.get(user_cache_key(self.admin.pk)))
+
+    def test_saves_delete_the_cached_user(self):
+        self.login(self.admin)
+        self.get()
+        self.admin.first_name = 'Amina'
+        self.admin.save()
+        self.assertIsNone(cache.get(user_cache_key(self.admin.pk)))
+
+        self.get()
+        self.community.admin = None
+        self.community.save()
+        self.assertIsNone(cache.get(user_cache_key(self.admin.pk)))
+
+    def test_role_change_is_rejected(self):
+        farmer = User.objects.create_user(username='farmer', email='farmer@example.com', password='x')
+        self.login(farmer)
+        self.assertEqual(self.get().status_code, 200)
+        farmer.role = 'community'
+        farmer.save()
+        self.assertRejected(self.get(), 'claims_changed')
+
+    def test_lost_community_is_rejected(self):
+        self.login(self.admin)
+        self.assertEqual(self.get().status_code, 200)
+        self.community.admin = None
+        self.community.save()
+        self.assertRejected(self.get(), 'claims_changed')
+
+    def test_community_created_after_login_is_accepted(self):
+        admin = User.objects.create_user(username='new', email='new@example.com', password='x', role='community')
+        self.login(admin)
+        Community.objects.create(name="Hills", email='h@example.com', latitude=1, longitude=1, admin=admin)
+        self.assertEqual(self.get().status_code, 200)
+
+    def test_deactivated_user_is_rejected(self):
+        self.login(self.admin)
+        self.assertEqual(self.get().status_code, 200)
+        self.admin.is_active = False
+        self.admin.save()
+        self.assertRejected(self.get(), 'user_inactive')
+
+    def test_changed_password_is_rejected(self):
+        # Patched in place: api_settings is imported by reference, so override_settings would not reach it
+        with mock.patch.object(jwt_settings, 'CHECK_REVOKE_TOKEN', True):
+            self.login(self.admin)
+            self.assertEqual(self.get().status_code, 200)
+            self.admin.set_password('y')
+            self.admin.save()
+            self.assertRejected(self.get(), 'password_changed')
+
+
+class ORJSONRendererTests(SimpleTestCase):
+
+    def test_parses_to_the_same_data_as_json_renderer(self):
+        data = {
+            'small': 0.00001, 'large': 1e16, 'tiny': 1.5e-7, 'decimal': Decimal('1.50'),
+            'when': timezone.now(), 'text': "line\u2028break", 'nested': [{'a': None, 'b': True}],
+        }
+        self.assertEqual(
+            json.loads(ORJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)),
+        )
+
+    def test_escapes_line_separators_like_json_renderer(self):
+        rendered = ORJSONRenderer().render({'text': "a\u2028b\u2029c"})
+        self.assertEqual(rendered, JSONRenderer().render({'text': "a\u2028b\u2029c"}))
+
+    def test_streamed_features_encode_like_the_renderer(self):
+        feature = {'type': 'Feature', 'properties': {'area': Decimal('1.50'), 'when': timezone.now(), 'text': "a\u2028b"}}
+        fast = mock.Mock(represent=lambda row: row)
+        streamed = b''.join(fastpath._stream(fast, [feature], geojson=False))
+        self.assertEqual(streamed, ORJSONRenderer().render(feature) + b'\n')
+
+
+@override_settings(JOB_RETRY_BACKOFF=5, JOB_RETRY_BACKOFF_MAX=60)
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        handlers = {'ok': lambda job: {'done': job.payload.get('n')}, 'boom': self.fail_job}
+        patcher = mock.patch.dict(jobs.JOB_HANDLERS, handlers, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def fail_job(job):
+        raise RuntimeError("provider down")
+
+    def test_claim_takes_the_oldest_due_job_once(self):
+        later = Job.objects.create(kind='ok', run_after=timezone.now() - timedelta(seconds=1))
+        first = Job.objects.create(kind='ok', run_after=timezone.now() - timedelta(minutes=1))
+        Job.objects.create(kind='ok', run_after=timezone.now() + timedelta(hours=1))
+
+        job = jobs.claim_job()
+        self.assertEqual(job.pk, first.pk)
+        self.assertEqual((job.status, job.attempts), ('running', 1))
+        self.assertEqual(jobs.claim_job().pk, later.pk)
+        self.assertIsNone(jobs.claim_job())
+
+    def test_claim_filters_by_kind_and_id(self):
+        job = Job.objects.create(kind='ok')
+        self.assertIsNone(jobs.claim_job(kinds=['boom']))
+        self.assertIsNone(jobs.claim_job(job_id=Job.objects.create(kind='boom', status='failed').pk))
+        self.assertEqual(jobs.claim_job(job_id=job.pk, kinds=['ok']).pk, job.pk)
+
+    def test_success_stores_result(self):
+        job = jobs.process_job(Job.objects.create(kind='ok', payload={'n': 3}).pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.last_error), ('succeeded', {'done': 3}, None))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_failure_retries_with_backoff_then_fails(self):
+        job = Job.objects.create(kind='boom', max_attempts=3)
+        for attempt, delay in ((1, 5), (2, 10)):
+            before = timezone.now()
+            jobs.process_job(job.pk)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('pending', attempt))
+            self.assertEqual(job.last_error, "RuntimeError: provider down")
+            self.assertGreaterEqual(job.run_after, before + timedelta(seconds=delay))
+            self.assertIsNone(jobs.claim_job(job_id=job.pk))  # not due yet
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+
+        jobs.process_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 3))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        self.assertEqual(
+            [jobs.retry_delay(n).total_seconds() for n in (1, 2, 3, 4, 5)], [5, 10, 20, 40, 60],
+        )
+
+    def test_unknown_kind_fails(self):
+        job = jobs.process_job(Job.objects.create(kind='missing', max_attempts=1).pk)
+        self.assertEqual(job.status, 'failed')
+        self.assertIn("LookupError", job.last_error)
+
+    def test_requeue_stale_jobs(self):
+        retryable = jobs.claim_job(job_id=Job.objects.create(kind='ok', max_attempts=3).pk)
+        single_shot = jobs.claim_job(job_id=Job.objects.create(kind='ok', max_attempts=1).pk)
+        fresh = jobs.claim_job(job_id=Job.objects.create(kind='ok').pk)
+        cutoff = timezone.now() - timedelta(minutes=30)
+        Job.objects.filter(pk__in=[retryable.pk, single_shot.pk]).update(updated_at=cutoff - timedelta(minutes=1))
+
+        self.assertEqual(jobs.requeue_stale_jobs(cutoff), (1, 1))
+        statuses = dict(Job.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[retryable.pk], 'pending')
+        self.assertEqual(statuses[single_shot.pk], 'failed')
+        self.assertEqual(statuses[fresh.pk], 'running')
+        # The requeued job can be claimed again; the failed one cannot
+        self.assertEqual(jobs.claim_job().pk, retryable.pk)
+        self.assertIsNone(jobs.claim_job())
+
+
+class CommunityAggregateTests(TestCase):
+    """The signals keep every community's aggregates equal to a recount of its farms and fields."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='farmer', email='farmer@example.com', password='x')
+        self.valley = Community.objects.create(name="Valley", email='v@example.com', latitude=0, longitude=0)
+        self.hills = Community.objects.create(name="Hills", email='h@example.com', latitude=1, longitude=1)
+        self.farm = Farm.objects.create(owner=self.owner, community=self.valley, name="Farm", coordinates=square(0, 0, 1))
+
+    def add_field(self, farm=None, **soil):
+        soil = {'soil_ph': 6.2, 'organic_carbon': 12.0, 'soil_type': 'Loam', 'recommended_crops': ['Maize'], **soil}
+        return FieldBoundary.objects.create(farm=farm or self.farm, boundary=square(0.1, 0.1), **soil)
+
+    def aggregates(self, community):
+        rows = CommunityAggregate.objects.filter(community=community).values_list('metric', 'bucket', 'value')
+        return {(metric, bucket): round(value, 6) for metric, bucket, value in rows if round(value, 6)}
+
+    def recount(self, community):
+        totals = Counter({('farms', ''): Farm.objects.filter(community=community).count()})
+        for row in FieldBoundary.objects.filter(farm__community=community).values_list(*STATS_COLUMNS):
+            totals.update(field_contribution(*row))
+        return {key: round(value, 6) for key, value in totals.items() if round(value, 6)}
+
+    def assertConsistent(self):
+        for community in (self.valley, self.hills):
+            with self.subTest(community=community.name):
+                self.assertEqual(self.aggregates(community), self.recount(community))
+
+    def test_create(self):
+        self.add_field()
+        self.add_field(soil_ph=7.4, recommended_crops=['Maize', 'Beans'])
+        stats = self.aggregates(self.valley)
+        self.assertEqual(stats['farms', ''], 1)
+        self.assertEqual(stats['fields', ''], 2)
+        self.assertEqual(stats['ph', '6'], 1)
+        self.assertEqual(stats['ph', '7'], 1)
+        self.assertEqual(stats['organic_carbon', '10'], 2)
+        self.assertEqual(stats['crop', 'Maize'], 2)
+        self.assertEqual(stats['crop', 'Beans'], 1)
+        self.assertConsistent()
+
+    def test_update(self):
+        field = self.add_field()
+        field.soil_ph, field.recommended_crops = 7.4, ['Beans']
+        field.save()
+        stats = self.aggregates(self.valley)
+        self.assertNotIn(('ph', '6'), stats)
+        self.assertNotIn(('crop', 'Maize'), stats)
+        self.assertEqual(stats['ph', '7'], 1)
+        self.assertConsistent()
+
+    def test_save_of_other_columns_leaves_aggregates_alone(self):
+        field = self.add_field()
+        with mock.patch('base.signals.apply_field_changes') as apply_field_changes:
+            field.save(update_fields=['soil_texture'])
+        apply_field_changes.assert_not_called()
+
+    def test_field_moved_to_a_farm_in_another_community(self):
+        field = self.add_field()
+        field.farm = Farm.objects.create(owner=self.owner, community=self.hills, name="Hill farm", coordinates=square(1, 1))
+        field.save()
+        self.assertNotIn(('fields', ''), self.aggregates(self.valley))
+        self.assertEqual(self.aggregates(self.hills)['fields', ''], 1)
+        self.assertConsistent()
+
+    def test_farm_moved_to_another_community(self):
+        self.add_field()
+        self.add_field(soil_type='Clay')
+        self.farm.community = self.hills
+        self.farm.save()
+        self.assertEqual(self.aggregates(self.valley), {})
+        self.assertEqual(self.aggregates(self.hills)['fields', ''], 2)
+        self.assertConsistent()
+
+    def test_delete(self):
+        field = self.add_field()
+        self.add_field(soil_ph=7.4)
+        field.delete()
+        self.assertEqual(self.aggregates(self.valley)['fields', ''], 1)
+        self.assertConsistent()
+        self.farm.delete()
+        self.assertEqual(self.aggregates(self.valley), {})
+
+    def test_farm_delete_queries_do_not_grow_with_its_fields(self):
+        counts = []
+        for fields in (1, 5):
+            farm = Farm.objects.create(owner=self.owner, community=self.valley, name="Farm", coordinates=square(2, 2))
+            for _ in range(fields):
+                self.add_field(farm)
+            with CaptureQueriesContext(connection) as queries:
+                farm.delete()
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertConsistent()
+
+    def test_refresh_corrects_drift(self):
+        self.add_field()
+        # Queryset updates bypass the signals
+        FieldBoundary.objects.update(soil_ph=4.1, recommended_crops=[])
+        self.assertNotEqual(self.aggregates(self.valley), self.recount(self.valley))
+        self.assertEqual(refresh_community_stats([self.valley.pk]), 1)
+        stats = self.aggregates(self.valley)
+        self.assertNotIn(('crop', 'Maize'), stats)
+        self.assertEqual(stats['ph', '4'], 1)
+        self.assertConsistent()
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class SoilHistoryTests(TestCase):
+
+    def setUp(self):
+        owner = User.objects.create_user(username='farmer', email='farmer@example.com', password='x')
+        farm = Farm.objects.create(owner=owner, name="Farm", coordinates=square(0, 0, 1))
+        self.field = FieldBoundary.objects.create(farm=farm, boundary=square(0.1, 0.1))
+        self.other = FieldBoundary.objects.create(farm=farm, boundary=square(0.5, 0.5))
+
+    def record(self, at, soil_ph, **soil):
+        return record_soil_history([([self.field.pk], {'soil_ph': soil_ph, **soil})], at=at)
+
+    def record_march(self):
+        self.record(utc(2024, 3, 4, 6), 6.0)
+        self.record(utc(2024, 3, 4, 18), 7.0)
+        self.record(utc(2024, 3, 5), 8.0)
+        self.record(utc(2024, 4, 1), 5.0)
+
+    def test_record_appends_to_the_month_row(self):
+        self.assertEqual(record_soil_history([([self.field.pk, self.other.pk], {'soil_ph': 6.0})], at=utc(2024, 3, 4)), 2)
+        self.assertEqual(self.record(utc(2024, 3, 5), 7.0, moisture=0.3), 1)
+        # Results without any history metric are skipped
+        self.assertEqual(self.record(utc(2024, 3, 6), None), 0)
+        row = SoilHistory.objects.get(field=self.field)
+        self.assertEqual(row.month, utc(2024, 3, 1).date())
+        self.assertEqual(row.offsets, [3 * 86400, 4 * 86400])
+        self.assertEqual(row.soil_ph, [6.0, 7.0])
+        self.assertEqual(row.moisture, [None, 0.3])
+        self.assertEqual(SoilHistory.objects.get(field=self.other).offsets, [3 * 86400])
+
+        self.record(utc(2024, 4, 1), 5.0)
+        self.assertEqual(SoilHistory.objects.filter(field=self.field).count(), 2)
+
+    def test_history_per_resolution(self):
+        self.record_march()
+        start, end = utc(2024, 3, 1), utc(2024, 5, 1)
+        self.assertEqual(
+            [(point['time'], point['soil_ph']) for point in field_history(self.field, start, end, 'raw')],
+            [(utc(2024, 3, 4, 6), 6.0), (utc(2024, 3, 4, 18), 7.0), (utc(2024, 3, 5), 8.0), (utc(2024, 4, 1), 5.0)],
+        )
+        self.assertEqual(
+            [(point['time'], point['samples'], point['soil_ph']) for point in field_history(self.field, start, end, 'day')],
+            [(utc(2024, 3, 4), 2, 6.5), (utc(2024, 3, 5), 1, 8.0), (utc(2024, 4, 1), 1, 5.0)],
+        )
+        self.assertEqual(
+            [(point['time'], point['samples'], point['soil_ph']) for point in field_history(self.field, start, end, 'month')],
+            [(utc(2024, 3, 1), 3, 7.0), (utc(2024, 4, 1), 1, 5.0)],
+        )
+        self.assertEqual(field_history(self.other, start, end), [])
+
+    def test_history_range_includes_from_and_excludes_to(self):
+        self.record_march()
+        points = field_history(self.field, utc(2024, 3, 4, 18), utc(2024, 4, 1), 'raw')
+        self.assertEqual([point['time'] for point in points], [utc(2024, 3, 4, 18), utc(2024, 3, 5)])
+
+    def test_compaction_keeps_daily_means(self):
+        self.record_march()
+        result = compact_soil_history(raw_days=0, retention_days=100 * 365)
+        # Every month before the current one is complete
+        self.assertEqual(result, {'deleted': 0, 'compacted': 2})
+        march = SoilHistory.objects.get(field=self.field, month=utc(2024, 3, 1).date())
+        self.assertTrue(march.compacted)
+        self.assertEqual(march.offsets, [3 * 86400, 4 * 86400])
+        self.assertEqual(march.soil_ph, [6.5, 8.0])
+        # Compacted months still answer coarser queries from their daily means
+        points = field_history(self.field, utc(2024, 3, 1), utc(2024, 4, 1), 'month')
+        self.assertEqual([(point['samples'], point['soil_ph']) for point in points], [(2, 7.25)])
+        self.assertEqual(compact_soil_history(raw_days=0, retention_days=100 * 365)['compacted'], 0)
+
+    def test_retention_deletes_old_months(self):
+        self.record(utc(2010, 1, 15), 6.0)
+        self.record_march()
+        retention_days = (timezone.now().date() - utc(2020, 1, 1).date()).days
+        result = compact_soil_history(raw_days=100 * 365, retention_days=retention_days)
+        self.assertEqual(result, {'deleted': 1, 'compacted': 0})
+        self.assertEqual(
+            sorted(SoilHistory.objects.filter(field=self.field).values_list('month', flat=True)),
+            [utc(2024, 3, 1).date(), utc(2024, 4, 1).date()],
+        )
+
+
+class VectorTileScopeTests(APITestCase):
+    """?community= tiles are limited to members of that community."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com', password='x', role='community')
+        self.community = Community.objects.create(name="Valley", email='v@example.com', latitude=0, longitude=0, admin=self.admin)
+        self.farmer = User.objects.create_user(username='farmer', email='farmer@example.com', password='x')
+        self.outsider = User.objects.create_user(username='outsider', email='out@example.com', password='x')
+        Farm.objects.create(owner=self.farmer, community=self.community, name="Member farm", coordinates=square(0, 0))
+        self.url = f'/api/v1/tiles/farms/0/0/0.mvt?community={self.community.pk}'
+
+    def get(self, user, url=None, **headers):
+        self.client.force_authenticate(user)
+        return self.client.get(url or self.url, **headers)
+
+    def test_members_get_the_community_tile(self):
+        for user in (self.admin, self.farmer):
+            with self.subTest(user=user.username):
+                response = self.get(user)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.content)
+
+    def test_outsiders_are_denied(self):
+        self.assertEqual(self.get(self.outsider).status_code, 403)
+
+    def test_malformed_community_is_a_bad_request(self):
+        self.assertEqual(self.get(self.farmer, '/api/v1/tiles/farms/0/0/0.mvt?community=nope').status_code, 400)
+
+    def test_if_none_match_returns_304(self):
+        etag = self.get(self.farmer)['ETag']
+        self.assertEqual(self.get(self.farmer, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.get(self.farmer, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+
+class AnalyticsExportTests(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='staff', email='staff@example.com', password='x', is_admin=True)
+        owner = User.objects.create_user(username='farmer', email='farmer@example.com', password='x')
+        self.community = Community.objects.create(name="Valley", email='v@example.com', latitude=0, longitude=0)
+        member = Farm.objects.create(owner=owner, community=self.community, name="Member farm", coordinates=square(0, 0, 1))
+        other = Farm.objects.create(owner=owner, name="Other farm", coordinates=square(2, 2, 1))
+        self.fields = [
+            FieldBoundary.objects.create(farm=member, boundary=square(0.1, 0.1), soil_ph=6.5, recommended_crops=['Maize']),
+            FieldBoundary.objects.create(farm=member, boundary=square(0.3, 0.3)),
+            FieldBoundary.objects.create(farm=other, boundary=square(2.1, 2.1)),
+        ]
+
+    def test_batches_follow_batch_size_and_schema(self):
+        batches = list(record_batches('fields', batch_size=2))
+        self.assertEqual([batch.num_rows for batch in batches], [2, 1])
+        for batch in batches:
+            self.assertEqual(batch.schema, layer_schema('fields'))
+        first = batches[0].to_pylist()[0]
+        field = self.fields[0]
+        self.assertEqual(first['uuid'], str(field.pk))
+        self.assertEqual(first['owner_id'], str(field.farm.owner_id))
+        self.assertEqual(first['community_id'], str(self.community.pk))
+        self.assertEqual(first['soil_ph'], 6.5)
+        self.assertEqual(first['recommended_crops'], ['Maize'])
+        self.assertTrue(GEOSGeometry(memoryview(first['geometry'])).equals(field.boundary))
+
+    def test_batches_limited_to_a_community(self):
+        for layer, expected in (('fields', 2), ('farms', 1)):
+            with self.subTest(layer=layer):
+                rows = sum(batch.num_rows for batch in record_batches(layer, community=self.community))
+                self.assertEqual(rows, expected)
+
+    def test_unknown_layer(self):
+        with self.assertRaises(AnalyticsExportError):
+            list(record_batches('roads'))
+
+    def test_community_parameter_is_validated(self):
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get('/api/v1/exports/fields/?community=nope').status_code, 400)
+        missing = '/api/v1/exports/fields/?community=00000000-0000-0000-0000-000000000000'
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+
+class MetricsViewTests(TestCase):
+    url = '/metrics'
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', email='staff@example.com', password='x', is_staff=True)
+        self.farmer = User.objects.create_user(username='farmer', email='farmer@example.com', password='x')
+
+    def get(self, user=None, token=None):
+        self.client.logout()
+        if user is not None:
+            self.client.force_login(user)
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        return self.client.get(self.url, **headers)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_without_token_only_staff_get_through(self):
+        self.assertEqual(self.get().status_code, 403)
+        self.assertEqual(self.get(self.farmer).status_code, 403)
+        self.assertEqual(self.get(token='guess').status_code, 403)
+        response = self.get(self.staff)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'# TYPE', response.content)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_with_token(self):
+        self.assertEqual(self.get().status_code, 401)
+        self.assertEqual(self.get(self.farmer).status_code, 401)
+        self.assertEqual(self.get(token='guess').status_code, 401)
+        self.assertEqual(self.get(token='secret').status_code, 200)
+        self.assertEqual(self.get(self.staff).status_code, 200)
+
+
+class SoilClassificationTests(SimpleTestCase):
+
+    def test_texture_triangle(self):
+        # (sand, silt, clay) percentages inside each USDA class
+        samples = {
+            'Sand': (92, 4, 4), 'Loamy sand': (82, 12, 6), 'Sandy loam': (65, 25, 10), 'Loam': (40, 40, 20),
+            'Silt loam': (20, 65, 15), 'Silt': (7, 88, 5), 'Sandy clay loam': (60, 15, 25),
+            'Clay loam': (32, 34, 34), 'Silty clay loam': (10, 58, 32), 'Sandy clay': (52, 6, 42),
+            'Silty clay': (6, 47, 47), 'Clay': (20, 20, 60),
+        }
+        sand, silt, clay = zip(*samples.values())
+        classes = classify_texture(sand, silt, clay)
+        self.assertEqual([TEXTURE_CLASSES[c] for c in classes], list(samples))
+
+    def test_texture_accepts_soilgrids_g_per_kg(self):
+        self.assertEqual(TEXTURE_CLASSES[classify_texture([400], [400], [200])[0]], 'Loam')
+
+    def test_texture_unknown_when_a_fraction_is_missing(self):
+        self.assertEqual(classify_texture([float('nan'), 0], [40, 0], [20, 0]).tolist(), [-1, -1])
+
+    def test_no_recommendations_without_soil_data(self):
+        empty = {'sand': None, 'silt': None, 'clay': None, 'ph': None, 'organic_carbon': None}
+        for stats in (empty, None, {}):
+            with self.subTest(stats=stats):
+                self.assertEqual(
+                    classify_soils([stats], [12.0]), [{'soil_type': None, 'recommended_crops': None}],
+                )
+
+    def test_recommendations_from_partial_data(self):
+        loam = {'sand': 400, 'silt': 400, 'clay': 200, 'ph': 62, 'organic_carbon': 30}
+        result, ph_only = classify_soils([loam, {'ph': 6.0}])
+        self.assertEqual(result['soil_type'], 'Loam')
+        self.assertIn('Maize', result['recommended_crops'])
+        self.assertIsNone(ph_only['soil_type'])
+        self.assertTrue(ph_only['recommended_crops'])
+
+    def test_acidic_soil_excludes_crops_outside_their_ph_range(self):
+        (result,) = classify_soils([{'sand': 400, 'silt': 400, 'clay': 200, 'ph': 4.0, 'organic_carbon': 30}])
+        self.assertEqual(result['recommended_crops'], [])
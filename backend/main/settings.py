@@ -44,12 +44,14 @@ CORS_ALLOWED_ORIGINS = [
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.gis',
+    'django.contrib.postgres',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'base',
+    'api',
 
     'rest_framework',
     'rest_framework_simplejwt',
@@ -65,6 +67,8 @@ INSTALLED_APPS = [
 # }
 
 MIDDLEWARE = [
+    # First, so its latency and query counts cover the whole stack
+    'api.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -159,8 +163,113 @@ AUTHENTICATION_BACKENDS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'api.authentication.CachedJWTAuthentication',
+    ),
+    # Page size for the keyset-paginated farm/field lists (?page_size= up to 1000)
+    'PAGE_SIZE': 100,
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+}
+
+# Farm/field JSON lists are built from .values() rows and PostGIS GeoJSON
+# instead of the serializers (api.views.mixins.FastListMixin)
+FAST_LIST_SERIALIZATION = True
+
+# Seconds a serialized GET response stays in the per-user response cache
+# (default cache). Entries are keyed by data version, so writes never serve stale data.
+RESPONSE_CACHE_TIMEOUT = 300
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api': {
+            'handlers': ['console'],
+            'level': os.getenv('API_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+# Requests slower than this (seconds) are logged by api.metrics.MetricsMiddleware
+# with their user role, community and row counts
+SLOW_REQUEST_SECONDS = float(os.getenv('SLOW_REQUEST_SECONDS', '1.0'))
+# Bearer token Prometheus sends to /metrics; when unset, only signed-in staff can read it
+METRICS_TOKEN = os.getenv('METRICS_TOKEN') or None
+
+# Background jobs (soil analysis etc.). Use 'api.utils.jobs.InlineJobExecutor'
+# in tests, or 'api.utils.jobs.QueueOnlyJobExecutor' to leave every job to
+# `manage.py run_jobs` workers.
+JOB_EXECUTOR = os.getenv('JOB_EXECUTOR', 'api.utils.jobs.ThreadPoolJobExecutor')
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_BACKOFF = 5  # seconds, doubled on every retry
+JOB_RETRY_BACKOFF_MAX = 300
+
+# Where SoilGrids stats come from: 'earthengine', 'local_tiles' to read
+# the offline tile store built by `manage.py build_soil_tiles`, 'synthetic'
+# for generated offline values (load tests; see SOIL_SYNTHETIC_LATENCY), or
+# 'fake', the same without latency (tests, local development).
+# Compare them with `manage.py benchmark_soil_providers`.
+# Earth Engine is only initialized on first use.
+EARTHENGINE_PROJECT = os.getenv('EARTHENGINE_PROJECT', 'ecosystemplus')
+# Cold import budget for main.wsgi, enforced by `manage.py benchmark_startup`
+STARTUP_IMPORT_BUDGET_MS = 2000
+SOIL_ANALYSIS_ENGINE = os.getenv('SOIL_ANALYSIS_ENGINE', 'earthengine')
+SOIL_TILE_ROOT = os.getenv('SOIL_TILE_ROOT', str(BASE_DIR / 'data' / 'soil_tiles'))
+SOIL_SYNTHETIC_LATENCY = {'CALL': 0.0, 'POLYGON': 0.0}  # seconds
+# Operating regions to build tiles for: name -> (min_lon, min_lat, max_lon, max_lat)
+SOIL_TILE_REGIONS = {
+    'cameroon': (8.4, 1.6, 16.2, 13.1),
+}
+
+# External soil data providers, queried concurrently by analyze_soil.
+# Per provider (or '*' for defaults): TIMEOUT seconds, and circuit breaker
+# FAILURE_THRESHOLD consecutive failures / RESET_TIMEOUT seconds.
+# Engines may set RATE_LIMIT, in requests per minute across all processes
+# sharing the default cache.
+SOIL_MOISTURE_API_URL = os.getenv('SOIL_MOISTURE_API_URL')
+SOIL_PROVIDER_WORKERS = int(os.getenv('SOIL_PROVIDER_WORKERS', '16'))
+SOIL_FANOUT_MAX_WAIT = 120
+SOIL_PROVIDERS = {
+    '*': {'TIMEOUT': 10, 'FAILURE_THRESHOLD': 5, 'RESET_TIMEOUT': 60},
+    'soilgrids': {'TIMEOUT': 60},  # batched reduceRegions calls are slow
+    'moisture': {'TIMEOUT': 5},
+    'earthengine': {'RATE_LIMIT': 60},
+}
+
+# Bulk reanalysis skips fields whose soil data is younger than this
+SOIL_REANALYSIS_MAX_AGE_DAYS = 30
+
+# Soil history retention: samples are kept as-is for RAW_DAYS, then averaged
+# per day by `manage.py compact_soil_history`; months older than RETENTION_DAYS are dropped
+SOIL_HISTORY = {
+    'RAW_DAYS': 90,
+    'RETENTION_DAYS': 5 * 365,
+}
+
+# Uploaded files waiting for a background field import job
+FIELD_IMPORT_ROOT = os.getenv('FIELD_IMPORT_ROOT', str(BASE_DIR / 'data' / 'imports'))
+
+# Soil analysis cache, keyed by normalized geometry + dataset version.
+# BACKEND is one of api.utils.soil_cache.LRUCacheBackend (per process),
+# DjangoCacheBackend (settings.CACHES) or DatabaseCacheBackend (shared table).
+SOIL_CACHE = {
+    'BACKEND': os.getenv('SOIL_CACHE_BACKEND', 'api.utils.soil_cache.LRUCacheBackend'),
+    'OPTIONS': {},
+    'SNAP_PRECISION': 5,
+    # Sources are per provider: 'soilgrids' (Earth Engine), 'soilgrids_local' (tile store)
+    # -gkg: organic carbon converted to g/kg by the providers
+    'DATASET_VERSIONS': {'soilgrids': 'soilgrids-2.0-gkg', 'soilgrids_local': 'soilgrids-2.0-gkg', 'moisture': '1'},
+    'TTL': {
+        'soilgrids': 90 * 24 * 3600,  # static dataset
+        'soilgrids_local': 90 * 24 * 3600,
+        'moisture': 6 * 3600,
+    },
 }
 
 SIMPLE_JWT = {
@@ -169,6 +278,13 @@ SIMPLE_JWT = {
     # ...other settings...
 }
 
+# Seconds api.authentication.CachedJWTAuthentication keeps a resolved user.
+# Saves invalidate it only in the saving process's cache: with the default
+# per-process LocMemCache, other workers may serve a deactivated user, a
+# changed password or role for up to this long. Raise it only with a shared
+# cache (e.g. Redis) configured in CACHES.
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', '5'))
+
 # SIMPLE_JWT = {
 #     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
 #     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
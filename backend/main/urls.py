@@ -17,7 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path,include
 
+from api.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/', include('api.urls')),
+    # Prometheus scrape target (api.metrics): staff sessions, or a bearer token once METRICS_TOKEN is set
+    path('metrics', metrics_view, name='metrics'),
 ]
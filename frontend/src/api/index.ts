@@ -30,8 +30,26 @@ export const fetchCommunities = (token: string) =>
     headers: { Authorization: `Bearer ${token}` },
   });
 
-export const fetchFarms = (token: string) =>
-  axios.get(`${API_BASE}/farms/`, {
+// One page of farms: { next, previous, results }. Pass `next` back as `url` for the following page.
+export const fetchFarms = (token: string, url = `${API_BASE}/farms/`) =>
+  axios.get(url, {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+
+// Every farm of the user, following the `next` links of the paginated list
+export const fetchAllFarms = async (token: string) => {
+  const farms: any[] = [];
+  let url: string | null = `${API_BASE}/farms/?page_size=1000`;
+  while (url) {
+    const response = await fetchFarms(token, url);
+    farms.push(...response.data.results);
+    url = response.data.next;
+  }
+  return farms;
+};
+
+export const fetchFarm = (uuid: string, token: string) =>
+  axios.get(`${API_BASE}/farms/${uuid}/`, {
     headers: { Authorization: `Bearer ${token}` },
   });
 
@@ -60,6 +78,8 @@ export default {
   createCommunity,
   fetchCommunities,
   fetchFarms,
+  fetchAllFarms,
+  fetchFarm,
   addFarm,
   updateFarm,
   deleteFarm,